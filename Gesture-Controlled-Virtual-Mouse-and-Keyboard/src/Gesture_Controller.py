@@ -3,12 +3,21 @@ import cv2
 import mediapipe as mp
 import pyautogui
 import math
+import threading
+import time
+import numpy as np
 from enum import IntEnum
-from ctypes import cast, POINTER
-from comtypes import CLSCTX_ALL
-from pycaw.pycaw import AudioUtilities, IAudioEndpointVolume
-from google.protobuf.json_format import MessageToDict
-import screen_brightness_control as sbcontrol
+from pipeline import FramePipeline
+from frame_source import CameraSource, landmark_model, landmarks_to_array
+from handedness import HandednessResolver
+from system_controls import SystemLevels, VOLUME, BRIGHTNESS
+from actuator import shared_actuator
+from filters import make_filter
+from roi_inference import LandmarkModels, RoiInference
+from preview import make_preview, handle_stop_signals, restore_signals
+from metrics import loop_metrics
+from gesture_fsm import GestureMachine, Rule
+from timing import Debouncer, HoldTimer
 
 pyautogui.FAILSAFE = False
 mp_drawing = mp.solutions.drawing_utils
@@ -37,367 +46,404 @@ class HLabel(IntEnum):
     MINOR = 0
     MAJOR = 1
 
+# Landmark pairs every gesture rule needs, measured in one vectorized pass:
+# fingertip->knuckle and knuckle->wrist for the four fingers, then the pinch,
+# V-gesture and fingertip pairs used by get_gesture
+FEATURE_PAIRS = np.array([
+    [8, 5], [12, 9], [16, 13], [20, 17],
+    [5, 0], [9, 0], [13, 0], [17, 0],
+    [8, 4], [8, 12], [5, 9],
+])
+FINGER_BITS = np.array([8, 4, 2, 1])  # index, middle, ring, pinky
+
+# Gesture features for a (H, 21, 3) stack of hands.
+# Returns finger bitmasks, thumb-index pinch distance, V-gesture ratio and
+# the depth gap between index and middle fingertips, one entry per hand.
+def hand_features(points):
+    first = points[:, FEATURE_PAIRS[:, 0]]
+    second = points[:, FEATURE_PAIRS[:, 1]]
+    dist = np.sqrt((first[..., 0] - second[..., 0])**2 + (first[..., 1] - second[..., 1])**2)
+    signed = np.where(first[..., 1] < second[..., 1], dist, -dist)
+
+    tip_dist = signed[:, 0:4]
+    base_dist = signed[:, 4:8]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = np.round(tip_dist / np.where(base_dist == 0, 0.01, base_dist), 1)
+        v_ratio = dist[:, 9] / dist[:, 10]
+    finger = ((ratio > 0.5) * FINGER_BITS).sum(axis=1)
+
+    pinch_dist = dist[:, 8]
+    tip_dz = np.abs(points[:, 8, 2] - points[:, 12, 2])
+    return finger, pinch_dist, v_ratio, tip_dz
+
 # Convert Mediapipe Landmarks to recognizable Gestures
+# A gesture is reported once it has been seen for `hold` seconds
 class HandRecog:
-    def __init__(self, hand_label):
+    def __init__(self, hand_label, hold=0.15):
         self.finger = 0
-        self.ori_gesture = Gest.PALM
-        self.prev_gesture = Gest.PALM
-        self.frame_count = 0
+        self.debouncer = Debouncer(hold, Gest.PALM)
         self.hand_result = None
         self.hand_label = hand_label
+        self.points = None
+        self.pinch_dist = 0.0
+        self.v_ratio = 0.0
+        self.tip_dz = 0.0
 
     def update_hand_result(self, hand_result):
         self.hand_result = hand_result
+        self.points = None if hand_result is None else landmarks_to_array(hand_result)
 
     def get_signed_dist(self, point):
-        sign = -1
-        if self.hand_result.landmark[point[0]].y < self.hand_result.landmark[point[1]].y:
-            sign = 1
-        dist = (self.hand_result.landmark[point[0]].x - self.hand_result.landmark[point[1]].x)**2
-        dist += (self.hand_result.landmark[point[0]].y - self.hand_result.landmark[point[1]].y)**2
-        dist = math.sqrt(dist)
-        return dist*sign
+        a, b = self.points[point[0]], self.points[point[1]]
+        dist = math.sqrt((a[0] - b[0])**2 + (a[1] - b[1])**2)
+        return dist if a[1] < b[1] else -dist
 
     def get_dist(self, point):
-        dist = (self.hand_result.landmark[point[0]].x - self.hand_result.landmark[point[1]].x)**2
-        dist += (self.hand_result.landmark[point[0]].y - self.hand_result.landmark[point[1]].y)**2
-        dist = math.sqrt(dist)
-        return dist
+        a, b = self.points[point[0]], self.points[point[1]]
+        return math.sqrt((a[0] - b[0])**2 + (a[1] - b[1])**2)
 
     def get_dz(self, point):
-        return abs(self.hand_result.landmark[point[0]].z - self.hand_result.landmark[point[1]].z)
+        return abs(self.points[point[0]][2] - self.points[point[1]][2])
 
     # Function to find Gesture Encoding using current finger_state.
     # Finger_state: 1 if finger is open, else 0
     def set_finger_state(self):
-        if self.hand_result is None:
-            return
+        HandRecog.set_finger_states([self])
 
-        points = [[8,5,0],[12,9,0],[16,13,0],[20,17,0]]
-        self.finger = 0
-        self.finger = self.finger | 0 #thumb
-        for idx, point in enumerate(points):
-            dist = self.get_signed_dist(point[:2])
-            dist2 = self.get_signed_dist(point[1:])
-        
-            try:
-                ratio = round(dist/dist2, 1)
-            except ZeroDivisionError:
-                ratio = round(dist/0.01, 1)
+    # Finger states and gesture features for several hands in one batched call
+    @staticmethod
+    def set_finger_states(recognizers):
+        active = [hr for hr in recognizers if hr.points is not None]
+        if not active:
+            return
 
-            self.finger = self.finger << 1
-            if ratio > 0.5:
-                self.finger = self.finger | 1
+        finger, pinch_dist, v_ratio, tip_dz = hand_features(np.stack([hr.points for hr in active]))
+        for idx, hr in enumerate(active):
+            hr.finger = int(finger[idx])
+            hr.pinch_dist = float(pinch_dist[idx])
+            hr.v_ratio = float(v_ratio[idx])
+            hr.tip_dz = float(tip_dz[idx])
 
     # Handling Fluctations due to noise
-    def get_gesture(self):
+    def get_gesture(self, timestamp=None):
         if self.hand_result is None:
             return Gest.PALM
 
         current_gesture = Gest.PALM
-        if self.finger in [Gest.LAST3, Gest.LAST4] and self.get_dist([8,4]) < 0.05:
+        if self.finger in [Gest.LAST3, Gest.LAST4] and self.pinch_dist < 0.05:
             if self.hand_label == HLabel.MINOR:
                 current_gesture = Gest.PINCH_MINOR
             else:
                 current_gesture = Gest.PINCH_MAJOR
 
         elif Gest.FIRST2 == self.finger:
-            point = [[8,12],[5,9]]
-            dist1 = self.get_dist(point[0])
-            dist2 = self.get_dist(point[1])
-            ratio = dist1/dist2
-            if ratio > 1.7:
+            if self.v_ratio > 1.7:
                 current_gesture = Gest.V_GEST
             else:
-                if self.get_dz([8,12]) < 0.1:
+                if self.tip_dz < 0.1:
                     current_gesture = Gest.TWO_FINGER_CLOSED
                 else:
                     current_gesture = Gest.MID
         
         else:
             current_gesture = self.finger
-    
-        if current_gesture == self.prev_gesture:
-            self.frame_count += 1
-        else:
-            self.frame_count = 0
-
-        self.prev_gesture = current_gesture
 
-        if self.frame_count > 4:
-            self.ori_gesture = current_gesture
-        return self.ori_gesture
+        return self.debouncer.update(current_gesture, timestamp)
 
-# Executes commands according to detected gestures
+# Executes commands according to detected gestures.
+# Every GestureController owns one Controller, so its state machine and
+# pinch tracking are per stream; the actuator and system levels are
+# process-wide by default since there is only one cursor and one set of
+# system levels. Which action a gesture triggers is decided by the
+# CONTROL_RULES table below (see gesture_fsm.GestureMachine).
 class Controller:
-    tx_old = 0
-    ty_old = 0
-    trial = True
-    flag = False
-    grabflag = False
-    pinchmajorflag = False
-    pinchminorflag = False
-    pinchstartxcoord = None
-    pinchstartycoord = None
-    pinchdirectionflag = None
-    prevpinchlv = 0
-    pinchlv = 0
-    framecount = 0
-    prev_hand = None
+    actuator = shared_actuator()  # cursor moves and clicks run on its thread
+    system = SystemLevels()  # backend picked on first use, see system_controls.create_backend
     pinch_threshold = 0.3
-
-    @classmethod
-    def getpinchylv(cls, hand_result):
-        dist = round((cls.pinchstartycoord - hand_result.landmark[8].y)*10, 1)
+    pinch_hold = 0.15  # seconds a pinch level must stay put before it is applied
+
+    def __init__(self, actuator=None, system=None, cursor_filter=None):
+        if actuator is not None:
+            self.actuator = actuator
+        if system is not None:
+            self.system = system
+        self.cursor_filter = cursor_filter or make_filter('one_euro', min_cutoff=1.0, beta=0.007)
+        self.machine = GestureMachine(self, CONTROL_RULES, CONTROL_ENTER, CONTROL_EXIT)
+        self.pinchstartxcoord = None
+        self.pinchstartycoord = None
+        self.pinchdirectionflag = None
+        self.prevpinchlv = 0
+        self.pinchlv = 0
+        self.pinch_timer = HoldTimer(self.pinch_hold)
+        self.prev_hand = None
+        self.position = None
+
+    def getpinchylv(self, hand_result):
+        dist = round((self.pinchstartycoord - hand_result.landmark[8].y)*10, 1)
         return dist
 
-    @classmethod
-    def getpinchxlv(cls, hand_result):
-        dist = round((hand_result.landmark[8].x - cls.pinchstartxcoord)*10, 1)
+    def getpinchxlv(self, hand_result):
+        dist = round((hand_result.landmark[8].x - self.pinchstartxcoord)*10, 1)
         return dist
 
-    @classmethod
-    def changesystembrightness(cls):
-        currentBrightnessLv = sbcontrol.get_brightness(display=0)[-1]/100.0 
-        currentBrightnessLv += cls.pinchlv/50.0
-        if currentBrightnessLv > 1.0:
-            currentBrightnessLv = 1.0
-        elif currentBrightnessLv < 0.0:
-            currentBrightnessLv = 0.0       
-        sbcontrol.fade_brightness(int(100*currentBrightnessLv), start=sbcontrol.get_brightness(display=0))
-
-    @classmethod
-    def changesystemvolume(cls):
-        devices = AudioUtilities.GetSpeakers()
-        interface = devices.Activate(IAudioEndpointVolume._iid_, CLSCTX_ALL, None)
-        volume = cast(interface, POINTER(IAudioEndpointVolume))
-        currentVolumeLv = volume.GetMasterVolumeLevelScalar()
-        currentVolumeLv += cls.pinchlv/50.0
-        if currentVolumeLv > 1.0:
-            currentVolumeLv = 1.0
-        elif currentVolumeLv < 0.0:
-            currentVolumeLv = 0.0
-        volume.SetMasterVolumeLevelScalar(currentVolumeLv, None)
-
-    @classmethod
-    def scrollVertical(cls):
-        pyautogui.scroll(120 if cls.pinchlv > 0.0 else -120)
-
-    @classmethod
-    def scrollHorizontal(cls):
-        pyautogui.keyDown('shift')
-        pyautogui.keyDown('ctrl')
-        pyautogui.scroll(-120 if cls.pinchlv > 0.0 else 120)
-        pyautogui.keyUp('ctrl')
-        pyautogui.keyUp('shift')
+    # Level changes are handed to the system-levels worker and never block the frame loop
+    def changesystembrightness(self):
+        self.system.nudge(BRIGHTNESS, self.pinchlv/50.0)
+
+    def changesystemvolume(self):
+        self.system.nudge(VOLUME, self.pinchlv/50.0)
+
+    def scrollVertical(self):
+        self.actuator.scroll(120 if self.pinchlv > 0.0 else -120)
+
+    @staticmethod
+    def shift_ctrl_scroll(clicks, _pause=False):
+        pyautogui.keyDown('shift', _pause=_pause)
+        pyautogui.keyDown('ctrl', _pause=_pause)
+        pyautogui.scroll(clicks, _pause=_pause)
+        pyautogui.keyUp('ctrl', _pause=_pause)
+        pyautogui.keyUp('shift', _pause=_pause)
+
+    def scrollHorizontal(self):
+        self.actuator.submit(self.shift_ctrl_scroll, -120 if self.pinchlv > 0.0 else 120)
 
     # Locate Hand to get Cursor Position
-    # Stabilize cursor by Dampening
-    @classmethod
-    def get_position(cls, hand_result):
+    # Stabilize cursor with cursor_filter, then scale the hand's movement
+    # so slow moves stay precise and fast moves cover the screen
+    def get_position(self, hand_result, timestamp=None):
         point = 9
         position = [hand_result.landmark[point].x, hand_result.landmark[point].y]
-        sx, sy = pyautogui.size()
-        x_old, y_old = pyautogui.position()
-        x = int(position[0]*sx)
-        y = int(position[1]*sy)
-        if cls.prev_hand is None:
-            cls.prev_hand = x, y
-        delta_x = x - cls.prev_hand[0]
-        delta_y = y - cls.prev_hand[1]
-
-        distsq = delta_x**2 + delta_y**2
-        ratio = 1
-        cls.prev_hand = [x, y]
-
-        if distsq <= 25:
-            ratio = 0
-        elif distsq <= 900:
-            ratio = 0.07 * (distsq ** (1/2))
-        else:
-            ratio = 2.1
+        sx, sy = self.actuator.screen_size()
+        x_old, y_old = self.actuator.position()
+        if self.prev_hand is None:
+            self.cursor_filter.reset()
+        x, y = self.cursor_filter((position[0]*sx, position[1]*sy), timestamp)
+        if self.prev_hand is None:
+            self.prev_hand = x, y
+        delta_x = x - self.prev_hand[0]
+        delta_y = y - self.prev_hand[1]
+        self.prev_hand = [x, y]
+
+        ratio = min(0.07 * math.hypot(delta_x, delta_y), 2.1)
         x, y = x_old + delta_x*ratio, y_old + delta_y*ratio
         return (x, y)
 
-    @classmethod
-    def pinch_control_init(cls, hand_result):
-        cls.pinchstartxcoord = hand_result.landmark[8].x
-        cls.pinchstartycoord = hand_result.landmark[8].y
-        cls.pinchlv = 0
-        cls.prevpinchlv = 0
-        cls.framecount = 0
-
-    # Hold final position for 5 frames to change status
-    @classmethod
-    def pinch_control(cls, hand_result, controlHorizontal, controlVertical):
-        if cls.framecount == 5:
-            cls.framecount = 0
-            cls.pinchlv = cls.prevpinchlv
+    def pinch_control_init(self, hand_result, timestamp):
+        self.pinchstartxcoord = hand_result.landmark[8].x
+        self.pinchstartycoord = hand_result.landmark[8].y
+        self.pinchlv = 0
+        self.prevpinchlv = 0
+        self.pinch_timer.restart(timestamp)
+
+    # Hold final position for pinch_hold seconds to change status; keeps
+    # repeating every pinch_hold seconds while the level stays put
+    def pinch_control(self, hand_result, timestamp, controlHorizontal, controlVertical):
+        if self.pinch_timer.expired(timestamp) and self.pinchdirectionflag is not None:
+            self.pinch_timer.restart(timestamp)
+            self.pinchlv = self.prevpinchlv
             
-            if cls.pinchdirectionflag == True:
+            if self.pinchdirectionflag == True:
                 controlHorizontal() #x
             
-            elif cls.pinchdirectionflag == False:
+            elif self.pinchdirectionflag == False:
                 controlVertical() #y
 
-        lvx = cls.getpinchxlv(hand_result)
-        lvy = cls.getpinchylv(hand_result)
+        lvx = self.getpinchxlv(hand_result)
+        lvy = self.getpinchylv(hand_result)
         
-        if abs(lvy) > abs(lvx) and abs(lvy) > cls.pinch_threshold:
-            cls.pinchdirectionflag = False
-            if abs(cls.prevpinchlv - lvy) < cls.pinch_threshold:
-                cls.framecount += 1
-            else:
-                cls.prevpinchlv = lvy
-                cls.framecount = 0
+        if abs(lvy) > abs(lvx) and abs(lvy) > self.pinch_threshold:
+            self.pinchdirectionflag = False
+            if abs(self.prevpinchlv - lvy) >= self.pinch_threshold:
+                self.prevpinchlv = lvy
+                self.pinch_timer.restart(timestamp)
+
+        elif abs(lvx) > self.pinch_threshold:
+            self.pinchdirectionflag = True
+            if abs(self.prevpinchlv - lvx) >= self.pinch_threshold:
+                self.prevpinchlv = lvx
+                self.pinch_timer.restart(timestamp)
 
-        elif abs(lvx) > cls.pinch_threshold:
-            cls.pinchdirectionflag = True
-            if abs(cls.prevpinchlv - lvx) < cls.pinch_threshold:
-                cls.framecount += 1
-            else:
-                cls.prevpinchlv = lvx
-                cls.framecount = 0
+        else:
+            self.pinch_timer.restart(timestamp)
 
-    @classmethod
-    def handle_controls(cls, gesture, hand_result):  
-        x, y = None, None
-        if gesture != Gest.PALM:
-            x, y = cls.get_position(hand_result)
-    
-        # flag reset
-        if gesture != Gest.FIST and cls.grabflag:
-            cls.grabflag = False
-            pyautogui.mouseUp(button="left")
-
-        if gesture != Gest.PINCH_MAJOR and cls.pinchmajorflag:
-            cls.pinchmajorflag = False
-
-        if gesture != Gest.PINCH_MINOR and cls.pinchminorflag:
-            cls.pinchminorflag = False
-
-        # implementation
-        if gesture == Gest.V_GEST:
-            cls.flag = True
-            pyautogui.moveTo(x, y, duration=0.1)
-
-        elif gesture == Gest.FIST:
-            if not cls.grabflag: 
-                cls.grabflag = True
-                pyautogui.mouseDown(button="left")
-            pyautogui.moveTo(x, y, duration=0.1)
-
-        elif gesture == Gest.MID and cls.flag:
-            pyautogui.click()
-            cls.flag = False
-
-        elif gesture == Gest.INDEX and cls.flag:
-            pyautogui.click(button='right')
-            cls.flag = False
-
-        elif gesture == Gest.TWO_FINGER_CLOSED and cls.flag:
-            pyautogui.doubleClick()
-            cls.flag = False
-
-        elif gesture == Gest.PINCH_MINOR:
-            if cls.pinchminorflag == False:
-                cls.pinch_control_init(hand_result)
-                cls.pinchminorflag = True
-            cls.pinch_control(hand_result, cls.scrollHorizontal, cls.scrollVertical)
-    
-        elif gesture == Gest.PINCH_MAJOR:
-            if cls.pinchmajorflag == False:
-                cls.pinch_control_init(hand_result)
-                cls.pinchmajorflag = True
-            cls.pinch_control(hand_result, cls.changesystembrightness, cls.changesystemvolume)
+    # State machine actions, see CONTROL_RULES
+    def move_cursor(self, hand_result, timestamp, on_moved):
+        self.actuator.move_to(self.position[0], self.position[1], on_moved)
+
+    def grab_start(self, hand_result, timestamp, on_moved):
+        self.actuator.mouse_down(button="left")
+
+    def grab_end(self, hand_result, timestamp, on_moved):
+        self.actuator.mouse_up(button="left")
+
+    def left_click(self, hand_result, timestamp, on_moved):
+        self.actuator.click()
+
+    def right_click(self, hand_result, timestamp, on_moved):
+        self.actuator.click(button='right')
 
+    def double_click(self, hand_result, timestamp, on_moved):
+        self.actuator.double_click()
+
+    def pinch_start(self, hand_result, timestamp, on_moved):
+        self.pinch_control_init(hand_result, timestamp)
+
+    def pinch_scroll(self, hand_result, timestamp, on_moved):
+        self.pinch_control(hand_result, timestamp, self.scrollHorizontal, self.scrollVertical)
+
+    def pinch_levels(self, hand_result, timestamp, on_moved):
+        self.pinch_control(hand_result, timestamp, self.changesystembrightness, self.changesystemvolume)
+
+    # on_moved: called on the actuator thread once the cursor moves for this frame
+    def handle_controls(self, gesture, hand_result, timestamp=None, on_moved=None):
+        if timestamp is None:
+            timestamp = time.monotonic()
+        if gesture != Gest.PALM:
+            self.position = self.get_position(hand_result, timestamp)
+        self.machine.step(gesture, hand_result, timestamp, on_moved)
+
+# Gesture -> action table for Controller. V gesture moves the cursor and
+# arms the one-shot clicks; fist drags; pinches scroll (minor hand) or change
+# brightness/volume (major hand). Any other gesture leaves the current mode.
+CONTROL_RULES = {
+    Gest.V_GEST: Rule(action='move_cursor', arms=True),
+    Gest.FIST: Rule(mode='grab', action='move_cursor'),
+    Gest.MID: Rule(action='left_click', requires_armed=True),
+    Gest.INDEX: Rule(action='right_click', requires_armed=True),
+    Gest.TWO_FINGER_CLOSED: Rule(action='double_click', requires_armed=True),
+    Gest.PINCH_MINOR: Rule(mode='pinch_minor', action='pinch_scroll'),
+    Gest.PINCH_MAJOR: Rule(mode='pinch_major', action='pinch_levels'),
+}
+CONTROL_ENTER = {'grab': 'grab_start', 'pinch_minor': 'pinch_start', 'pinch_major': 'pinch_start'}
+CONTROL_EXIT = {'grab': 'grab_end'}
+
+def hands_model():
+    return LandmarkModels(lambda static: mp_hands.Hands(static_image_mode=static, max_num_hands=2,
+                                                        min_detection_confidence=0.5, min_tracking_confidence=0.5))
+
+# One input stream: its source, hand tracking and gesture state.
+# gc_mode stays on the class as the process-wide on/off switch (Proton
+# flips it to stop gesture control); everything else lives on the instance,
+# so several controllers can run side by side (see multistream.py).
 class GestureController:
     gc_mode = 0
-    cap = None
-    CAM_HEIGHT = None
-    CAM_WIDTH = None
-    hr_major = None # Right Hand by default
-    hr_minor = None # Left hand by default
-    dom_hand = True
-
-    def __init__(self):
+
+    # source: any frame_source.FrameSource; defaults to the live camera
+    # adaptive_input: detect on a downscaled frame and track on a crop around
+    # the hands (see roi_inference.RoiInference); False sends full frames
+    # preview: preview.make_preview spec, e.g. 'window', 'headless', 'mjpeg/5'
+    # controller: Controller driving the cursor; control=False only recognises gestures
+    # metrics: metrics.LoopMetrics for the stage timings, 'gesture' by default
+    def __init__(self, source=None, adaptive_input=True, preview=None, controller=None, control=True, metrics=None):
         GestureController.gc_mode = 1
-        GestureController.cap = cv2.VideoCapture(0 + cv2.CAP_DSHOW) 
-        GestureController.CAM_HEIGHT = GestureController.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)
-        GestureController.CAM_WIDTH = GestureController.cap.get(cv2.CAP_PROP_FRAME_WIDTH)
-
-    @classmethod
-    def classify_hands(cls, results):
-        left, right = None, None
-        try:
-            handedness_dict = MessageToDict(results.multi_handedness[0])
-            if handedness_dict['classification'][0]['label'] == 'Right':
-                right = results.multi_hand_landmarks[0]
-            else:
-                left = results.multi_hand_landmarks[0]
-        except:
-            pass
-
-        try:
-            handedness_dict = MessageToDict(results.multi_handedness[1])
-            if handedness_dict['classification'][0]['label'] == 'Right':
-                right = results.multi_hand_landmarks[1]
-            else:
-                left = results.multi_hand_landmarks[1]
-        except:
-            pass
-    
-        if GestureController.dom_hand == True:
-            GestureController.hr_major = right
-            GestureController.hr_minor = left
+        self.preview = make_preview(preview, 'Gesture Controller', quit_keys=(13,))  # 13 is Enter key
+        self.stop_event = threading.Event()
+        self.hand_input = RoiInference('multi_hand_landmarks', enabled=adaptive_input, max_targets=2)
+        self.cap = source if source is not None else CameraSource(0, cv2.CAP_DSHOW)
+        self.CAM_HEIGHT = self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)
+        self.CAM_WIDTH = self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)
+        self.controller = controller or Controller()
+        self.control = control
+        self.handedness = HandednessResolver()
+        self.dom_hand = True
+        self.hr_major = None # Right Hand by default
+        self.hr_minor = None # Left hand by default
+        self.hr_major_score = 0.0
+        self.hr_minor_score = 0.0
+        self.handmajor = HandRecog(HLabel.MAJOR)
+        self.handminor = HandRecog(HLabel.MINOR)
+        self.gesture = None  # last gesture recognised
+        self.metrics = metrics or loop_metrics('gesture')
+
+    # Split detected hands into major/minor using the tracked handedness
+    def classify_hands(self, results):
+        left, right = self.handedness.resolve(results)
+        if self.dom_hand == True:
+            major, minor = right, left
         else:
-            GestureController.hr_major = left
-            GestureController.hr_minor = right
+            major, minor = left, right
+
+        self.hr_major = major.landmarks if major else None
+        self.hr_minor = minor.landmarks if minor else None
+        self.hr_major_score = major.confidence if major else 0.0
+        self.hr_minor_score = minor.confidence if minor else 0.0
+
+    # Inference stage: runs on the pipeline's worker thread
+    def process_frame(self, hands, packet):
+        if packet.landmarks is not None:
+            return packet.landmarks
+        if packet.timer is not None:
+            packet.timer.begin()
+        packet.image = cv2.flip(packet.image, 1)
+        return self.hand_input.process(hands, packet.image, packet.timer)
+
+    # Gesture and action stage for one inferred packet; draws the landmarks
+    # on packet.image when `draw` is set. Returns the gesture acted on.
+    def handle_frame(self, packet, draw=False):
+        results = packet.results
+        timer = packet.timer
+        if timer is not None:
+            timer.begin()
+        if not results.multi_hand_landmarks:
+            self.handedness.resolve(results)
+            self.controller.prev_hand = None
+            self.gesture = None
+            return None
+
+        self.classify_hands(results)
+        self.handmajor.update_hand_result(self.hr_major)
+        self.handminor.update_hand_result(self.hr_minor)
+
+        HandRecog.set_finger_states([self.handmajor, self.handminor])
+        hand = self.handminor
+        gest_name = hand.get_gesture(packet.timestamp)
+        if gest_name != Gest.PINCH_MINOR:
+            hand = self.handmajor
+            gest_name = hand.get_gesture(packet.timestamp)
+        if timer is not None:
+            timer.mark('gesture')
+        if self.control:
+            on_moved = timer.acted if timer is not None else None
+            self.controller.handle_controls(gest_name, hand.hand_result, packet.timestamp, on_moved)
+            if timer is not None:
+                timer.mark('actuation')
+
+        if draw:
+            for hand_landmarks in results.multi_hand_landmarks:
+                mp_drawing.draw_landmarks(packet.image, hand_landmarks, mp_hands.HAND_CONNECTIONS)
+        self.gesture = gest_name
+        return gest_name
 
     def start(self):
-        handmajor = HandRecog(HLabel.MAJOR)
-        handminor = HandRecog(HLabel.MINOR)
-
-        with mp_hands.Hands(max_num_hands=2, min_detection_confidence=0.5, min_tracking_confidence=0.5) as hands:
-            while GestureController.cap.isOpened() and GestureController.gc_mode:
-                success, image = GestureController.cap.read()
-
-                if not success:
-                    print("Ignoring empty camera frame.")
-                    continue
-            
-                image = cv2.cvtColor(cv2.flip(image, 1), cv2.COLOR_BGR2RGB)
-                image.flags.writeable = False
-                results = hands.process(image)
-            
-                image.flags.writeable = True
-                image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
-
-                if results.multi_hand_landmarks:                   
-                    GestureController.classify_hands(results)
-                    handmajor.update_hand_result(GestureController.hr_major)
-                    handminor.update_hand_result(GestureController.hr_minor)
-
-                    handmajor.set_finger_state()
-                    handminor.set_finger_state()
-                    gest_name = handminor.get_gesture()
-
-                    if gest_name == Gest.PINCH_MINOR:
-                        Controller.handle_controls(gest_name, handminor.hand_result)
-                    else:
-                        gest_name = handmajor.get_gesture()
-                        Controller.handle_controls(gest_name, handmajor.hand_result)
-                
-                    for hand_landmarks in results.multi_hand_landmarks:
-                        mp_drawing.draw_landmarks(image, hand_landmarks, mp_hands.HAND_CONNECTIONS)
-                else:
-                    Controller.prev_hand = None
-                cv2.imshow('Gesture Controller', image)
-                if cv2.waitKey(5) & 0xFF == 13:  # 13 is Enter key
-                    break
-        GestureController.cap.release()
-        cv2.destroyAllWindows()
+        with landmark_model(self.cap, hands_model) as hands:
+            pipeline = FramePipeline(self.cap, lambda packet: self.process_frame(hands, packet), metrics=self.metrics)
+            pipeline.start()
+            previous_signals = handle_stop_signals(self.stop_event)
+            try:
+                while GestureController.gc_mode and not self.stop_event.is_set():
+                    packet = pipeline.get(timeout=0.5)
+                    if packet is None:
+                        if pipeline.finished():
+                            break
+                        continue
+
+                    # Action/render stage
+                    show = self.preview.due()
+                    self.handle_frame(packet, draw=show)
+                    closed = self.preview.show(packet.image)
+                    packet.timer.mark('render')
+                    packet.timer.done()
+                    if closed:
+                        break
+            finally:
+                pipeline.stop()
+                restore_signals(previous_signals)
+        self.cap.release()
+        self.preview.close()
+
+    # Ask a running start() loop to finish, from any thread
+    def stop(self):
+        self.stop_event.set()
 
 # uncomment to run directly
 if __name__ == "__main__":
@@ -6,6 +6,12 @@ import glob
 import math
 import pyautogui
 import time
+import threading
+from frame_source import CameraSource
+from actuator import shared_actuator
+from preview import make_preview, handle_stop_signals, restore_signals
+from metrics import loop_metrics
+from timing import HoldTimer
 
 class Marker:
     def __init__(self, dict_type=aruco.DICT_4X4_50, thresh_constant=1):
@@ -313,30 +319,33 @@ class Glove:
         
         self.fingers = l
         
+    # frame: image to label with the gesture, or None to skip drawing
     def find_gesture(self, frame):
-        font = cv2.FONT_HERSHEY_SIMPLEX
         self.gesture = 0
         if self.fingers == 1:
             if self.arearatio < 15:
-                cv2.putText(frame, '0', (0, 50), font, 2, (0, 0, 255), 3, cv2.LINE_AA)
+                self.label(frame, '0')
                 self.gesture = 0
             elif self.arearatio < 25:
-                cv2.putText(frame, '2 fingers', (0, 50), font, 2, (0, 0, 255), 3, cv2.LINE_AA)
+                self.label(frame, '2 fingers')
                 self.gesture = 2
             else:
-                cv2.putText(frame, '1 finger', (0, 50), font, 2, (0, 0, 255), 3, cv2.LINE_AA)
+                self.label(frame, '1 finger')
                 self.gesture = 1
                     
         elif self.fingers == 2:
-            cv2.putText(frame, '2', (0, 50), font, 2, (0, 0, 255), 3, cv2.LINE_AA)
+            self.label(frame, '2')
             self.gesture = 3
 
+    def label(self, frame, text):
+        if frame is not None:
+            cv2.putText(frame, text, (0, 50), cv2.FONT_HERSHEY_SIMPLEX, 2, (0, 0, 255), 3, cv2.LINE_AA)
+
 class Tracker:
     def __init__(self):
         self.tracker_started = False
         self.tracker = None
-        self.start_time = 0.0
-        self.now_time = 0.0
+        self.track_time = HoldTimer(2.0)  # re-detect the marker after this long
         self.tracker_bbox = None
         
     def corners_to_tracker(self, corners):
@@ -359,7 +368,7 @@ class Tracker:
         final_bbox[0][3] = [self.tracker_bbox[0], self.tracker_bbox[1] + self.tracker_bbox[3]]
         return [np.array(final_bbox, dtype='f')]
         
-    def CSRT_tracker(self, frame):        
+    def CSRT_tracker(self, frame, draw=True, timestamp=None):
         if self.tracker_bbox is None and self.tracker_started == False:
             return
         
@@ -369,7 +378,7 @@ class Tracker:
         
         if self.tracker_bbox is not None:
             try:
-                self.start_time = time.time()
+                self.track_time.restart(timestamp)
                 ok = self.tracker.init(frame, self.tracker_bbox)
                 self.tracker_started = True
             except:
@@ -379,23 +388,25 @@ class Tracker:
         except:
             ok = None
             print("tracker.update failed")
-        self.now_time = time.time()
         
-        if self.now_time - self.start_time >= 2.0:
-            cv2.putText(frame, 'Posture your hand correctly', (10, 10), cv2.FONT_HERSHEY_SIMPLEX, 0.75, (0, 0, 255), 1, cv2.LINE_AA)
+        if self.track_time.expired(timestamp):
+            if draw:
+                cv2.putText(frame, 'Posture your hand correctly', (10, 10), cv2.FONT_HERSHEY_SIMPLEX, 0.75, (0, 0, 255), 1, cv2.LINE_AA)
             self.tracker_started = False
             self.tracker_bbox = None
             return
             
         if ok:
             # Tracking success
-            p1 = (int(self.tracker_bbox[0]), int(self.tracker_bbox[1]))
-            p2 = (int(self.tracker_bbox[0] + self.tracker_bbox[2]), int(self.tracker_bbox[1] + self.tracker_bbox[3]))
-            cv2.rectangle(frame, p1, p2, (80, 255, 255), 2, 1)
+            if draw:
+                p1 = (int(self.tracker_bbox[0]), int(self.tracker_bbox[1]))
+                p2 = (int(self.tracker_bbox[0] + self.tracker_bbox[2]), int(self.tracker_bbox[1] + self.tracker_bbox[3]))
+                cv2.rectangle(frame, p1, p2, (80, 255, 255), 2, 1)
         else:
             # Tracking failure
             self.tracker_started = False
-            cv2.putText(frame, "Tracking failure detected", (100, 80), cv2.FONT_HERSHEY_SIMPLEX, 0.75, (0, 0, 255), 2)
+            if draw:
+                cv2.putText(frame, "Tracking failure detected", (100, 80), cv2.FONT_HERSHEY_SIMPLEX, 0.75, (0, 0, 255), 2)
             print("Tracking failure detected")
 
 class Mouse:
@@ -404,14 +415,16 @@ class Mouse:
         self.ty_old = 0
         self.trial = True
         self.flag = 0
+        self.actuator = shared_actuator()
         
-    def move_mouse(self, frame, position, gesture):
+    # on_moved: called on the actuator thread once the cursor moves for this frame
+    def move_mouse(self, frame, position, gesture, on_moved=None):
         if position is None:
             return
             
-        (sx, sy) = pyautogui.size()
+        (sx, sy) = self.actuator.screen_size()
         (camx, camy) = (frame.shape[1], frame.shape[0])  # width, height
-        (mx_old, my_old) = pyautogui.position()
+        (mx_old, my_old) = self.actuator.position()
         
         Damping = 2  # Hyperparameter we will have to adjust
         tx = position[0]
@@ -427,11 +440,11 @@ class Mouse:
             self.flag = 0
             mx = mx_old + (delta_tx * sx) // (camx * Damping)
             my = my_old + (delta_ty * sy) // (camy * Damping)            
-            pyautogui.moveTo(mx, my, duration=0.1)
+            self.actuator.move_to(mx, my, on_moved)
 
         elif gesture == 0:
             if self.flag == 0:
-                pyautogui.doubleClick()
+                self.actuator.double_click()
                 self.flag = 1
         elif gesture == 1:
             print('1 Finger Open')
@@ -451,8 +464,14 @@ class GestureController:
     csrt_track = Tracker()
     mouse = Mouse()
     
-    def __init__(self):
-        GestureController.cap = cv2.VideoCapture(0)
+    # source: any frame_source.FrameSource; defaults to the live camera
+    # preview: preview.make_preview spec, e.g. 'window', 'headless', 'mjpeg/5'
+    # metrics: metrics.LoopMetrics for the stage timings, 'gloved' by default
+    def __init__(self, source=None, preview=None, metrics=None):
+        self.preview = make_preview(preview, 'frame', quit_keys=(ord('q'),))
+        self.stop_event = threading.Event()
+        self.metrics = metrics or loop_metrics('gloved')
+        GestureController.cap = source if source is not None else CameraSource(0)
         if GestureController.cap.isOpened():
             GestureController.cam_width = int(GestureController.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
             GestureController.cam_height = int(GestureController.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
@@ -464,53 +483,75 @@ class GestureController:
         GestureController.f_now_time = time.time()
         
     def start(self):
-        while True:
-            # mode checking
-            if not GestureController.gc_mode:
-                print('Exiting Gesture Controller')
-                break
+        previous_signals = handle_stop_signals(self.stop_event)
+        try:
+            while not self.stop_event.is_set():
+                # mode checking
+                if not GestureController.gc_mode:
+                    print('Exiting Gesture Controller')
+                    break
                 
-            # read camera
-            ret, frame = GestureController.cap.read()
-            if not ret:
-                break
+                # read camera
+                timer = self.metrics.timer()
+                ret, frame = GestureController.cap.read()
+                if not ret:
+                    break
+                timer.mark('capture')
+                timer.captured = time.monotonic()
                 
-            frame = cv2.flip(frame, 1)
+                frame = cv2.flip(frame, 1)
+                show = self.preview.due()
             
-            # detect Marker, find ROI, find glove HSV, get FinalMask on glove
-            GestureController.aru_marker.detect(frame)
-            if GestureController.aru_marker.is_detected():
-                GestureController.csrt_track.corners_to_tracker(GestureController.aru_marker.corners)
-                GestureController.csrt_track.CSRT_tracker(frame)
-            else:
-                GestureController.csrt_track.tracker_bbox = None
-                GestureController.csrt_track.CSRT_tracker(frame)
-                GestureController.aru_marker.corners = GestureController.csrt_track.tracker_to_corner()
+                # Stages here: 'inference' is marker detection and tracking,
+                # 'colour' the HSV glove segmentation
+            
+                # detect Marker, find ROI, find glove HSV, get FinalMask on glove
+                GestureController.aru_marker.detect(frame)
+                if GestureController.aru_marker.is_detected():
+                    GestureController.csrt_track.corners_to_tracker(GestureController.aru_marker.corners)
+                    GestureController.csrt_track.CSRT_tracker(frame, show, GestureController.cap.timestamp)
+                else:
+                    GestureController.csrt_track.tracker_bbox = None
+                    GestureController.csrt_track.CSRT_tracker(frame, show, GestureController.cap.timestamp)
+                    GestureController.aru_marker.corners = GestureController.csrt_track.tracker_to_corner()
+                timer.mark('inference')
             
-            if GestureController.aru_marker.is_detected():
-                GestureController.hand_roi.findROI(frame, GestureController.aru_marker)
-                GestureController.hand_roi.find_glove_hsv(frame, GestureController.aru_marker)
-                FinalMask = GestureController.hand_roi.cropROI(frame)
-                if FinalMask is not None:
-                    GestureController.glove.find_fingers(FinalMask)
-                    GestureController.glove.find_gesture(frame)
-                    GestureController.mouse.move_mouse(frame, GestureController.hand_roi.marker_top, GestureController.glove.gesture)
+                if GestureController.aru_marker.is_detected():
+                    GestureController.hand_roi.findROI(frame, GestureController.aru_marker)
+                    GestureController.hand_roi.find_glove_hsv(frame, GestureController.aru_marker)
+                    FinalMask = GestureController.hand_roi.cropROI(frame)
+                    timer.mark('colour')
+                    if FinalMask is not None:
+                        GestureController.glove.find_fingers(FinalMask)
+                        GestureController.glove.find_gesture(frame if show else None)
+                        timer.mark('gesture')
+                        GestureController.mouse.move_mouse(frame, GestureController.hand_roi.marker_top, GestureController.glove.gesture, timer.acted)
+                        timer.mark('actuation')
             
-            # draw call
-            if GestureController.aru_marker.is_detected():
-                GestureController.aru_marker.draw_marker(frame)
-                draw_box(frame, GestureController.hand_roi.roi_corners, (255, 0, 0))
-                draw_box(frame, GestureController.hand_roi.hsv_corners, (0, 0, 250))
-                cv2.imshow('FinalMask', FinalMask)
+                # draw call
+                if show and GestureController.aru_marker.is_detected():
+                    GestureController.aru_marker.draw_marker(frame)
+                    draw_box(frame, GestureController.hand_roi.roi_corners, (255, 0, 0))
+                    draw_box(frame, GestureController.hand_roi.hsv_corners, (0, 0, 250))
+                    if FinalMask is not None:
+                        self.preview.show(FinalMask, 'FinalMask')
             
-            # display frame
-            cv2.imshow('frame', frame)
-            if cv2.waitKey(1) & 0xFF == ord('q'):
-                break
+                # display frame
+                closed = self.preview.show(frame)
+                timer.mark('render')
+                timer.done()
+                if closed:
+                    break
+        finally:
+            restore_signals(previous_signals)
         
         # When everything done, release the capture
         GestureController.cap.release()
-        cv2.destroyAllWindows()
+        self.preview.close()
+
+    # Ask a running start() loop to finish, from any thread
+    def stop(self):
+        self.stop_event.set()
 
 if __name__ == "__main__":
     gc = GestureController()
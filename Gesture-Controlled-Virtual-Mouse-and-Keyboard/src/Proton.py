@@ -1,5 +1,4 @@
 import pyttsx3
-import speech_recognition as sr
 from datetime import date
 import time
 import webbrowser
@@ -14,6 +13,9 @@ import smtplib
 import wikipedia
 import Gesture_Controller
 from threading import Thread
+from contextlib import nullcontext
+from voice_stream import VoiceListener
+from speech_backends import Transcriber, make_backend
 
 today = date.today()
 keyboard = Controller()
@@ -42,15 +44,30 @@ files = []
 path = ''
 is_awake = True  # Bot status
 
-# Initialize speech recognizer
+# Initialize speech recognizer, chosen with PROTON_ASR (see speech_backends);
+# offline models load here, once
 try:
-    r = sr.Recognizer()
+    asr = make_backend()
     speech_recognition_available = True
-    print("✅ Speech recognition available")
+    print(f"✅ Speech recognition available ({asr.name})")
 except Exception as e:
+    asr = None
     speech_recognition_available = False
     print(f"❌ Speech recognition failed: {e}")
 
+# Whole utterances that need nothing after them. With a streaming
+# recognizer, a partial transcript that is exactly one of these, and has not
+# changed for a moment (see speech_backends.Transcriber), is acted on
+# straight away instead of after the speaker stops. Only phrases whose
+# branch in respond() comes before 'search' belong here: whatever else the
+# speaker adds cannot turn them into another command, unlike e.g.
+# "open chrome" (and search cats) or "copy" (the location of ...).
+COMPLETE_COMMANDS = ('what is your name', 'what time is it', 'what is the time', 'what is the date',
+                     "what's the time", "what's the date")
+
+def is_complete_command(text):
+    return " ".join(text.lower().replace('proton', ' ').split()) in COMPLETE_COMMANDS
+
 # Try to import app module but handle errors gracefully
 app_available = False
 ChatBot = None
@@ -69,6 +86,20 @@ except Exception as e:
 
 def proton_chat():
     print("🎙️ Starting Voice Assistant...")
+
+    # One microphone stream for the whole session; utterances are cut out of
+    # it in the background (see voice_stream), so listening starts at once,
+    # and recognized while they are spoken (see speech_backends)
+    listener = transcriber = None
+    if speech_recognition_available:
+        try:
+            transcriber = Transcriber(asr, early=is_complete_command)
+            transcriber.start()
+            listener = VoiceListener(events=transcriber.events).open()
+            print("✅ Microphone stream open")
+        except Exception as e:
+            listener = None
+            print(f"Microphone error: {e}")
     
     def reply(audio):
         try:
@@ -79,8 +110,10 @@ def proton_chat():
                     app.ChatBot.addAppMsg(audio)
                 except Exception as e:
                     print(f"GUI update failed: {e}")
-            engine.say(audio)
-            engine.runAndWait()
+            # don't let the microphone pick up our own voice
+            with listener.muted() if listener is not None else nullcontext():
+                engine.say(audio)
+                engine.runAndWait()
         except Exception as e:
             print(f"TTS Error: {e}")
 
@@ -94,35 +127,28 @@ def proton_chat():
             reply("Good Evening!")  
         reply("I am Proton, your voice assistant. How may I help you?")
 
-    def record_audio():
-        if not speech_recognition_available:
+    # Only speech that started after `since` (time.monotonic(); default: now)
+    # counts: anything said while a command was running is not for this prompt
+    def record_audio(timeout=10, since=None):
+        if listener is None:
             print("Speech recognition not available")
             return ""
-            
-        try:
-            with sr.Microphone() as source:
-                print("🔊 Adjusting for ambient noise...")
-                r.adjust_for_ambient_noise(source, duration=1)
-                print("🎤 Listening...")
-                audio = r.listen(source, timeout=10, phrase_time_limit=8)
-                
-            print("🔍 Recognizing...")
-            voice_data = r.recognize_google(audio).lower()
-            print(f"You said: {voice_data}")
-            return voice_data
-        except sr.WaitTimeoutError:
+
+        print("🎤 Listening...")
+        since = time.monotonic() if since is None else since
+        transcript = transcriber.next_transcript(timeout, since=since)
+        if transcript is None:
             print("Listening timeout")
             return ""
-        except sr.UnknownValueError:
-            print("Could not understand audio")
-            return ""
-        except sr.RequestError as e:
-            print(f"Could not request results; {e}")
+        if transcript.error is not None:
+            print(f"Could not request results; {transcript.error}")
             reply("Sorry, there's an issue with the speech recognition service.")
             return ""
-        except Exception as e:
-            print(f"Microphone error: {e}")
+        if not transcript.text:
+            print("Could not understand audio")
             return ""
+        print(f"You said: {transcript.text}")
+        return transcript.text
 
     def respond(voice_data):
         global file_exp_status, files, is_awake, path
@@ -275,6 +301,7 @@ def proton_chat():
 
     # Main loop
     wish()
+    idle_since = time.monotonic()  # when the last command finished
     
     while True:
         try:
@@ -290,10 +317,11 @@ def proton_chat():
             
             # If no GUI input, get voice input
             if not voice_data:
-                voice_data = record_audio()
+                voice_data = record_audio(since=idle_since)
 
             if voice_data:
                 result = respond(voice_data)
+                idle_since = time.monotonic()
                 if result == "exit":
                     break
                     
@@ -304,6 +332,8 @@ def proton_chat():
             print(f"Error in main loop: {e}")
             time.sleep(1)
 
+    if listener is not None:
+        listener.stop()
     print("Voice assistant closed")
 
 # Make sure this runs
@@ -0,0 +1,158 @@
+import threading
+import time
+from collections import deque
+import pyautogui
+
+pyautogui.FAILSAFE = False
+
+# Screen size, cached and only re-queried every `check_every` seconds
+# (from the actuator thread) to notice display changes
+class ScreenInfo:
+    def __init__(self, check_every=2.0):
+        self.check_every = check_every
+        self.size = pyautogui.size()
+        self.checked = time.monotonic()
+
+    def poll(self, now):
+        if now - self.checked >= self.check_every:
+            self.checked = now
+            size = pyautogui.size()
+            if size != self.size:
+                print(f"🖥 Display changed: {self.size[0]}x{self.size[1]} -> {size[0]}x{size[1]}")
+                self.size = size
+
+# Cursor target: an (x, y) tuple that can carry a callback, run on the
+# actuator thread when the cursor starts moving towards it
+class Target(tuple):
+    def __new__(cls, x, y, on_moved=None):
+        target = super().__new__(cls, (x, y))
+        target.on_moved = on_moved
+        return target
+
+# Moves the cursor and performs clicks on its own thread.
+# Callers write the newest target into a single slot (a plain attribute
+# assignment, no lock) and never wait; the actuator glides from where the
+# cursor is to the latest target over `glide` seconds at `rate` Hz, so
+# intermediate targets that arrive mid-glide are simply overtaken.
+# Clicks and other actions queue up in order and run after the cursor has
+# reached the current target.
+class CursorActuator(threading.Thread):
+    def __init__(self, rate=60, glide=0.1):
+        super().__init__(name="cursor-actuator", daemon=True)
+        self.rate = rate
+        self.glide = glide
+        self.target = None       # latest (x, y) requested
+        self.reached = None      # target the cursor last arrived at
+        self.actions = deque()   # (function, args, kwargs)
+        self.wake = threading.Event()
+        self.stop_event = threading.Event()
+        self.screen = None
+        self.current = (0, 0)
+        self.start_lock = threading.Lock()
+
+    def ensure_started(self):
+        if self.is_alive():
+            return
+        with self.start_lock:
+            if not self.is_alive() and not self.stop_event.is_set():
+                self.screen = ScreenInfo()
+                self.current = tuple(pyautogui.position())
+                self.start()
+
+    def screen_size(self):
+        self.ensure_started()
+        return self.screen.size
+
+    # Where the cursor is, or is heading to when a move is in progress
+    def position(self):
+        self.ensure_started()
+        target = self.target
+        if target is not None and target is not self.reached:
+            return target
+        return self.current
+
+    # on_moved: optional callable run once the cursor first moves towards (x, y)
+    def move_to(self, x, y, on_moved=None):
+        self.ensure_started()
+        self.target = Target(x, y, on_moved)
+        self.wake.set()
+
+    # Queue a pyautogui call (or any callable taking _pause) behind pending moves
+    def submit(self, function, *args, **kwargs):
+        self.ensure_started()
+        self.actions.append((function, args, kwargs))
+        self.wake.set()
+
+    def mouse_down(self, button='left'):
+        self.submit(pyautogui.mouseDown, button=button)
+
+    def mouse_up(self, button='left'):
+        self.submit(pyautogui.mouseUp, button=button)
+
+    def click(self, button='left'):
+        self.submit(pyautogui.click, button=button)
+
+    def double_click(self):
+        self.submit(pyautogui.doubleClick)
+
+    def scroll(self, clicks):
+        self.submit(pyautogui.scroll, clicks)
+
+    def stop(self, timeout=1.0):
+        self.stop_event.set()
+        self.wake.set()
+        if self.is_alive():
+            self.join(timeout)
+
+    def run(self):
+        period = 1.0 / self.rate
+        segment = None  # (start, end, start time)
+        while not self.stop_event.is_set():
+            now = time.monotonic()
+            self.screen.poll(now)
+
+            target = self.target
+            if target is not None and target is not self.reached:
+                fresh = segment is None or segment[1] is not target
+                if fresh:
+                    segment = (self.current, target, now)
+                start, end, t0 = segment
+                progress = 1.0 if self.glide <= 0 else min(1.0, (now - t0) / self.glide)
+                # Actions must happen at the target, so finish the glide first
+                if self.actions:
+                    progress = 1.0
+                x = start[0] + (end[0] - start[0]) * progress
+                y = start[1] + (end[1] - start[1]) * progress
+                pyautogui.moveTo(int(x), int(y), _pause=False)
+                self.current = (x, y)
+                if fresh and target.on_moved is not None:
+                    target.on_moved()
+                if progress >= 1.0:
+                    self.reached = target
+                    segment = None
+
+            while self.actions:
+                function, args, kwargs = self.actions.popleft()
+                try:
+                    function(*args, _pause=False, **kwargs)
+                except Exception as e:
+                    print(f"Cursor action failed: {e}")
+
+            if segment is not None:
+                time.sleep(period)
+            else:
+                # Idle: pick up manual mouse movement and wait for work
+                self.current = tuple(pyautogui.position())
+                self.wake.wait(0.25)
+                self.wake.clear()
+
+_shared = None
+_shared_lock = threading.Lock()
+
+# One actuator per process: there is only one system cursor
+def shared_actuator():
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = CursorActuator()
+        return _shared
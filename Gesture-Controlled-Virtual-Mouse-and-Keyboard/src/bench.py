@@ -0,0 +1,414 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+import types
+
+# Offline benchmark: replays recorded sessions through the controllers with
+# no camera, display, mouse or keyboard. pyautogui and pynput are replaced
+# by recorders before any controller is imported, previews run headless and
+# system levels use the fake backend.
+#
+#   python bench.py --hands hands.jsonl --eye face.jsonl --keyboard hands.jsonl \
+#                   --glove glove.mp4 --swipe traces.jsonl --json bench.json
+#
+# Recordings are anything frame_source.open_source accepts: landmark JSONL/NPZ
+# files (no model runs) or videos / image folders (the models run too).
+# Each benchmark reports frames, fps, per-stage p50/p95/p99/mean in ms from
+# the loop's metrics, the actions it produced and the peak Python memory of
+# a second, traced replay (skip it with --no-memory). --swipe takes swipe.py
+# traces instead and reports decode time, accuracy and words per minute.
+
+# Recording stand-in for pyautogui
+def fake_pyautogui():
+    module = types.ModuleType('pyautogui')
+    module.FAILSAFE = False
+    module.calls = {}
+    module._position = [0, 0]
+
+    def record(name):
+        def call(*args, **kwargs):
+            module.calls[name] = module.calls.get(name, 0) + 1
+        return call
+
+    def moveTo(x, y, *args, **kwargs):
+        module._position = [x, y]
+        record('moveTo')()
+
+    for name in ('click', 'doubleClick', 'mouseDown', 'mouseUp', 'scroll', 'keyDown', 'keyUp', 'press', 'hotkey'):
+        setattr(module, name, record(name))
+    module.moveTo = moveTo
+    module.size = lambda: (1920, 1080)
+    module.position = lambda: tuple(module._position)
+    return module
+
+# Recording stand-in for pynput.keyboard
+def fake_pynput():
+    package = types.ModuleType('pynput')
+    keyboard = types.ModuleType('pynput.keyboard')
+    keyboard.pressed = []
+
+    class Controller:
+        def press(self, key):
+            keyboard.pressed.append(key)
+
+        def release(self, key):
+            pass
+
+        def type(self, text):
+            keyboard.pressed.extend(text)
+
+    keyboard.Controller = Controller
+    keyboard.Key = types.SimpleNamespace()
+    package.keyboard = keyboard
+    return package, keyboard
+
+def install_fakes():
+    os.environ.setdefault('GVE_SYSTEM_BACKEND', 'fake')
+    os.environ.setdefault('GVE_PREVIEW', 'headless')
+    os.environ['GVE_METRICS_LOG'] = '0'
+    sys.modules['pyautogui'] = fake_pyautogui()
+    package, keyboard = fake_pynput()
+    sys.modules['pynput'] = package
+    sys.modules['pynput.keyboard'] = keyboard
+
+# Stage summary of a metrics.LoopMetrics, in ms
+def stage_report(loop):
+    stages = {}
+    for stage, h in loop.stages.items():
+        if h.count:
+            stages[stage] = {
+                'p50_ms': round(1000*h.quantile(0.5), 3),
+                'p95_ms': round(1000*h.quantile(0.95), 3),
+                'p99_ms': round(1000*h.quantile(0.99), 3),
+                'mean_ms': round(1000*h.sum / h.count, 3),
+            }
+    latency = None
+    if loop.latency.count:
+        latency = {'p50_ms': round(1000*loop.latency.quantile(0.5), 3),
+                   'p99_ms': round(1000*loop.latency.quantile(0.99), 3)}
+    return stages, latency
+
+# Hand gestures: the same steps as GestureController.start, run frame by
+# frame on this thread so no frame is dropped and runs are repeatable
+def run_gesture(path, fps):
+    from frame_source import open_source, landmark_model
+    from pipeline import FramePacket
+    from metrics import LoopMetrics
+    from Gesture_Controller import GestureController, hands_model
+
+    source = open_source(path, fps=fps)
+    controller = GestureController(source, preview='headless', metrics=LoopMetrics('bench-gesture', log_every=0))
+    gestures = {}
+    with landmark_model(source, hands_model) as hands:
+        while source.isOpened():
+            timer = controller.metrics.timer()
+            success, image = source.read()
+            if not success:
+                break
+            timer.mark('capture')
+            packet = FramePacket(source.frame_index, source.timestamp, image, source.landmarks, timer)
+            packet.results = controller.process_frame(hands, packet)
+            gesture = controller.handle_frame(packet)
+            timer.done()
+            if gesture is not None:
+                name = getattr(gesture, 'name', str(gesture))
+                gestures[name] = gestures.get(name, 0) + 1
+    source.release()
+    return controller.metrics, {'gestures': gestures}
+
+# Fixed gaze calibration for the eye benchmark, so a run never picks up the
+# host's saved one (gaze_calibration.CALIBRATION_DIR): poly2, mapping gaze
+# offsets of about +-0.14, the range of a real session, onto the screen
+def bench_calibration():
+    import numpy as np
+    from gaze_calibration import GazeCalibration
+
+    matrix = np.zeros((6, 2))
+    matrix[0] = 0.5
+    matrix[1, 0] = matrix[2, 1] = 3.5
+    return GazeCalibration('poly2', matrix)
+
+# Eye mouse: blink and gaze-hold detection plus the cursor, via eye_move()
+def run_eye(path, fps):
+    from frame_source import open_source
+    from metrics import LoopMetrics
+    from eye import EyeController
+
+    metrics = LoopMetrics('bench-eye', log_every=0)
+    EyeController(open_source(path, fps=fps), preview='headless', calibration=bench_calibration(),
+                  metrics=metrics).eye_move()
+    return metrics, {}
+
+# Virtual keyboard: key hit-testing and presses, via vk_keyboard()
+def run_keyboard(path, fps):
+    from frame_source import open_source
+    from metrics import LoopMetrics
+    from samvk import vk_keyboard
+
+    keyboard = sys.modules['pynput.keyboard']
+    start = len(keyboard.pressed)
+    metrics = LoopMetrics('bench-keyboard', log_every=0)
+    vk_keyboard(open_source(path, fps=fps), preview='headless', metrics=metrics)
+    return metrics, {'keys_pressed': len(keyboard.pressed) - start}
+
+# Coloured glove: marker tracking, ROI, HSV mask and finger counting
+def run_glove(path, fps):
+    from frame_source import open_source
+    from metrics import LoopMetrics
+    from Gesture_Controller_Gloved import GestureController
+
+    metrics = LoopMetrics('bench-gloved', log_every=0)
+    GestureController(open_source(path, fps=fps), preview='headless', metrics=metrics).start()
+    return metrics, {}
+
+# Swipe typing: decode recorded traces (see swipe.py) with the qwerty decoder.
+# One trace is one "frame"; words per minute counts correctly decoded words
+# over the time spent tracing them (`fps` spaces out traces without "t").
+def run_swipe(path, fps):
+    from metrics import LoopMetrics
+    from swipe import load_decoder, load_traces
+
+    decoder = load_decoder()
+    metrics = LoopMetrics('bench-swipe', log_every=0)
+    top1 = top3 = 0
+    seconds = 0.0
+    traces = load_traces(path)
+    for trace in traces:
+        timer = metrics.timer()
+        candidates = [w for w, _ in decoder.decode(trace['points'])]
+        timer.mark('gesture')
+        timer.done()
+        top1 += bool(candidates) and candidates[0] == trace['word']
+        top3 += trace['word'] in candidates
+        t = trace.get('t')
+        seconds += t[-1] - t[0] if t else len(trace['points']) / (fps or 30.0)
+    count = max(len(traces), 1)
+    return metrics, {
+        'words': len(traces),
+        'top1_accuracy': round(top1 / count, 4),
+        'top3_accuracy': round(top3 / count, 4),
+        'wpm': round(60.0 * top1 / seconds, 1) if seconds > 0 else None,
+    }
+
+# Blink detection: replay an EAR trace (see blink.py) through the adaptive
+# detector, timing it per frame, and score both it and the old fixed
+# threshold against the trace's labels.
+def run_blinks(path, fps):
+    from metrics import LoopMetrics
+    from blink import BlinkDetector, evaluate, load_trace
+
+    frames = load_trace(path)
+    metrics = LoopMetrics('bench-blinks', log_every=0)
+    detector = BlinkDetector()
+    for frame in frames:
+        timer = metrics.timer()
+        detector.update(frame['ear'], frame['t'])
+        timer.mark('gesture')
+        timer.done()
+    return metrics, {
+        'adaptive': evaluate(BlinkDetector(), frames),
+        'fixed': evaluate(BlinkDetector(adaptive=False), frames),
+    }
+
+# Dwell: replay a gaze trace (see dwell.py) through the dwell engine, timing
+# it per sample, and score it and the old frame-to-frame rule on the labels.
+def run_dwell(path, fps):
+    from metrics import LoopMetrics
+    from dwell import DwellEngine, FrameToFrameDwell, evaluate, load_trace
+
+    samples = load_trace(path)
+    metrics = LoopMetrics('bench-dwell', log_every=0)
+    engine = DwellEngine()
+    for sample in samples:
+        timer = metrics.timer()
+        engine.update(sample['xy'], sample['t'])
+        timer.mark('gesture')
+        timer.done()
+    return metrics, {
+        'dwell': evaluate(DwellEngine(), samples),
+        'frame_to_frame': evaluate(FrameToFrameDwell(), samples),
+    }
+
+# Voice input: replay a 16-bit WAV through the utterance segmenter (energy
+# VAD + endpointing), timing it per audio chunk
+def run_voice(path, fps):
+    from metrics import LoopMetrics
+    from voice_stream import UtteranceSegmenter, WavSource
+
+    source = WavSource(path)
+    source.open()
+    segmenter = UtteranceSegmenter(source.sample_rate, source.chunk_samples)
+    metrics = LoopMetrics('bench-voice', log_every=0)
+    utterances = []
+    while True:
+        chunk = source.read()
+        if chunk is None:
+            break
+        timer = metrics.timer()
+        utterance = segmenter.push(chunk)
+        timer.mark('gesture')
+        timer.done()
+        if utterance is not None:
+            utterances.append(utterance)
+    source.close()
+    return metrics, {
+        'utterances': len(utterances),
+        'speech_seconds': round(sum(u.seconds for u in utterances), 2),
+    }
+
+# Speech recognition: the voice replay with a recognizer behind it, fed as
+# the audio streams (see speech_backends). The backend comes from PROTON_ASR,
+# defaulting to the offline stub here so the bench never needs the network.
+def run_speech(path, fps):
+    from metrics import LoopMetrics
+    from speech_backends import make_backend
+    from voice_stream import UtteranceSegmenter, WavSource
+
+    backend = make_backend(os.environ.get('PROTON_ASR', 'stub'))
+    source = WavSource(path)
+    source.open()
+    segmenter = UtteranceSegmenter(source.sample_rate, source.chunk_samples)
+    metrics = LoopMetrics('bench-speech', log_every=0)
+    session = None
+    finals = []
+    while True:
+        chunk = source.read()
+        events = segmenter.close() if chunk is None else None
+        timer = metrics.timer()
+        if events is None:
+            events = segmenter.stream(chunk)
+        timer.mark('capture')
+        for kind, data in events:
+            if kind == 'start':
+                session = backend.session(data[0])
+                session.feed(data[1])
+            elif kind == 'audio' and session is not None:
+                session.feed(data)
+            elif kind == 'end' and session is not None:
+                started = time.perf_counter()
+                finals.append((session.finish(), time.perf_counter() - started))
+                session = None
+            elif kind == 'abort':
+                session = None
+        timer.mark('inference')
+        timer.done()
+        if chunk is None:
+            break
+    source.close()
+    return metrics, {
+        'backend': backend.name,
+        'transcripts': [text for text, _ in finals],
+        'final_ms': round(1000 * max((s for _, s in finals), default=0.0), 3),
+    }
+
+BENCHMARKS = {
+    'hands': run_gesture,
+    'eye': run_eye,
+    'keyboard': run_keyboard,
+    'glove': run_glove,
+    'swipe': run_swipe,
+    'blinks': run_blinks,
+    'dwell': run_dwell,
+    'voice': run_voice,
+    'speech': run_speech,
+}
+
+def run_benchmark(name, path, fps=None, memory=True):
+    runner = BENCHMARKS[name]
+    calls_before = dict(sys.modules['pyautogui'].calls)
+    started = time.perf_counter()
+    loop, extra = runner(path, fps)
+    seconds = time.perf_counter() - started
+    stages, latency = stage_report(loop)
+    calls = sys.modules['pyautogui'].calls
+    report = {
+        'source': path,
+        'frames': loop.frames,
+        'seconds': round(seconds, 3),
+        'fps': round(loop.frames / seconds, 1) if seconds > 0 else None,
+        'stages': stages,
+        'photon_to_cursor': latency,
+        'pyautogui_calls': {k: v - calls_before.get(k, 0) for k, v in calls.items() if v != calls_before.get(k, 0)},
+    }
+    report.update(extra)
+
+    if memory:
+        tracemalloc.start()
+        runner(path, fps)
+        report['peak_memory_mb'] = round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+        tracemalloc.stop()
+    return report
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL,
+                                       cwd=os.path.dirname(os.path.abspath(__file__))).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay recorded sessions through the controllers")
+    parser.add_argument('--hands', help="recording for the hand gesture controller")
+    parser.add_argument('--eye', help="face recording for the eye controller")
+    parser.add_argument('--keyboard', help="hand recording for the virtual keyboard")
+    parser.add_argument('--glove', help="video for the gloved controller")
+    parser.add_argument('--swipe', help="swipe traces (swipe.py) for the swipe decoder")
+    parser.add_argument('--blinks', help="EAR trace (blink.py) for the blink detector")
+    parser.add_argument('--dwell', help="gaze trace (dwell.py) for the dwell engine")
+    parser.add_argument('--voice', help="16-bit WAV for the voice activity detector")
+    parser.add_argument('--speech', help="16-bit WAV for the speech recognizer (PROTON_ASR, default stub)")
+    parser.add_argument('--fps', type=float, default=None, help="frame rate for recordings without timestamps")
+    parser.add_argument('--json', help="write the report to this file")
+    parser.add_argument('--no-memory', action='store_true', help="skip the traced replay for peak memory")
+    args = parser.parse_args(argv)
+
+    install_fakes()
+    selected = [(name, getattr(args, name)) for name in BENCHMARKS if getattr(args, name)]
+    if not selected:
+        parser.error("give at least one of --hands, --eye, --keyboard, --glove, --swipe, --blinks, --dwell, --voice, --speech")
+
+    report = {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'benchmarks': {},
+    }
+    for name, path in selected:
+        result = run_benchmark(name, path, args.fps, memory=not args.no_memory)
+        report['benchmarks'][name] = result
+        print(f"🏁 {name}: {result['frames']} frames, {result['fps']} fps")
+        print(f"   {'stage':<10}{'p50':>9}{'p95':>9}{'p99':>9}")
+        for stage, r in result['stages'].items():
+            print(f"   {stage:<10}{r['p50_ms']:>9.3f}{r['p95_ms']:>9.3f}{r['p99_ms']:>9.3f} ms")
+        if 'wpm' in result:
+            print(f"   {result['wpm']} wpm, top-1 {result['top1_accuracy']:.1%}, top-3 {result['top3_accuracy']:.1%}")
+        for detector in ('adaptive', 'fixed'):
+            if detector in result:
+                print(f"   {detector}: {result[detector]['false_clicks_per_min']} false clicks/min, recall " +
+                      ", ".join(f"{event} {r['recall']}" for event, r in result[detector].items()
+                                if event != 'false_clicks_per_min'))
+        for engine in ('dwell', 'frame_to_frame'):
+            if engine in result:
+                r = result[engine]
+                print(f"   {engine}: recall {r['recall']}, {r['false_actions_per_min']} false actions/min, "
+                      f"dwell {r['mean_dwell_s']} s")
+        if 'utterances' in result:
+            print(f"   {result['utterances']} utterances, {result['speech_seconds']} s of speech")
+        if 'transcripts' in result:
+            print(f"   {result['backend']}: {len(result['transcripts'])} transcripts, "
+                  f"final result at most {result['final_ms']} ms after the end of speech")
+        if 'peak_memory_mb' in result:
+            print(f"   peak memory {result['peak_memory_mb']} MB")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    return report
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+import argparse
+import json
+import math
+import numpy as np
+
+# Running p-quantile in O(1) memory and time: the P-square algorithm
+# (Jain & Chlamtac, 1985). Five markers track the minimum, p/2, p, (1+p)/2
+# and the maximum; each sample shifts marker positions and adjusts their
+# heights with a parabolic (or linear) fit.
+class P2Quantile:
+    def __init__(self, p):
+        self.p = p
+        self.count = 0
+        self.heights = []
+        self.positions = [1.0, 2.0, 3.0, 4.0, 5.0]
+        self.desired = [1.0, 1 + 2*p, 1 + 4*p, 3 + 2*p, 5.0]
+        self.steps = [0.0, p/2, p, (1 + p)/2, 1.0]
+
+    @property
+    def value(self):
+        if self.count >= 5:
+            return self.heights[2]
+        if not self.heights:
+            return float('nan')
+        ordered = sorted(self.heights)
+        return ordered[int(round(self.p * (len(ordered) - 1)))]
+
+    def add(self, x):
+        self.count += 1
+        q, n = self.heights, self.positions
+        if self.count <= 5:
+            q.append(x)
+            if self.count == 5:
+                q.sort()
+            return
+
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = next(i for i in range(1, 5) if x < q[i]) - 1
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.desired[i] += self.steps[i]
+
+        for i in (1, 2, 3):
+            d = self.desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                parabolic = q[i] + d / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i]) +
+                    (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+                if q[i - 1] < parabolic < q[i + 1]:
+                    q[i] = parabolic
+                else:
+                    q[i] = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                n[i] += d
+
+# Blink and wink classifier on per-frame eye aspect ratios (left, right).
+#
+# Each eye learns its own open level (running median of its EAR) and closed
+# level (running `closed_quantile` percentile, below the noise of the open
+# eye but within its closures) with P2Quantile. The close threshold sits
+# `depth` of the way from the closed to the open level, at most
+# `max_close` of the open level, so the half-closed eye of a wink does not
+# count as closed. An eye counts as closed below the threshold and open
+# again above a higher one (hysteresis), so noise around the threshold does
+# not flicker. No events are reported during the first `warmup` seconds
+# while the levels settle; adaptive=False uses `fixed_threshold` from the
+# start instead.
+#
+# Events, from the closed/open states over a short window:
+#   left_wink / right_wink: one eye closed for `wink_hold` seconds while the
+#       other stays open (fires while still closed); a wink that starts
+#       during a blink counts from the end of the blink
+#   double_blink: both eyes close again within `double_gap` seconds of the
+#       end of a two-eye blink that lasted at least `min_closure` seconds;
+#       after one, no other for `double_refractory` seconds, so a natural
+#       blink right after it does not start another
+# A single natural blink, or a closure longer than `max_blink`, does nothing.
+class BlinkDetector:
+    def __init__(self, adaptive=True, warmup=2.0, wink_hold=0.15, double_gap=0.3, min_closure=0.09,
+                 double_refractory=1.0, max_blink=0.6, hysteresis=0.4, fixed_threshold=0.15,
+                 closed_quantile=0.02, depth=0.4, max_close=0.6):
+        self.adaptive = adaptive
+        self.warmup = warmup
+        self.wink_hold = wink_hold
+        self.double_gap = double_gap
+        self.min_closure = min_closure
+        self.double_refractory = double_refractory
+        self.max_blink = max_blink
+        self.hysteresis = hysteresis
+        self.fixed_threshold = fixed_threshold
+        self.depth = depth
+        self.max_close = max_close
+        self.open_level = [P2Quantile(0.5), P2Quantile(0.5)]
+        self.closed_level = [P2Quantile(closed_quantile), P2Quantile(closed_quantile)]
+        self.started = None
+        self.elapsed = 0.0
+        self.closed = [False, False]
+        self.closed_since = [None, None]
+        self.both_since = None       # both eyes closed since
+        self.winked = False          # a wink already fired in this closure
+        self.last_blink_end = -math.inf
+        self.quiet_until = -math.inf  # double blink refractory period
+        self.both_closed = False
+
+    @property
+    def warm(self):
+        return not self.adaptive or self.started is not None and self.elapsed >= self.warmup
+
+    # (close, reopen) thresholds of one eye
+    def thresholds(self, eye):
+        if not self.adaptive:
+            close = self.fixed_threshold
+            return close, close * (1 + self.hysteresis)
+        open_level = self.open_level[eye].value
+        low = self.closed_level[eye].value
+        if low < 0.75 * open_level:
+            close = min(low + self.depth * (open_level - low), self.max_close * open_level)
+        else:
+            close = 0.5 * open_level  # no closures seen yet
+        return close, close + self.hysteresis * (open_level - close)
+
+    def update(self, ears, now):
+        if self.started is None:
+            self.started = now
+        self.elapsed = now - self.started
+        for eye in (0, 1):
+            self.open_level[eye].add(ears[eye])
+            self.closed_level[eye].add(ears[eye])
+            close, reopen = self.thresholds(eye)
+            if not self.closed[eye] and ears[eye] < close:
+                self.closed[eye] = True
+                self.closed_since[eye] = now
+            elif self.closed[eye] and ears[eye] > reopen:
+                self.closed[eye] = False
+                self.closed_since[eye] = None
+        if not self.warm:
+            return None
+        return self.classify(now)
+
+    def classify(self, now):
+        left, right = self.closed
+        if left and right:
+            if not self.both_closed:
+                self.both_closed = True
+                self.both_since = now
+                if now >= self.quiet_until and now - self.last_blink_end <= self.double_gap:
+                    self.last_blink_end = -math.inf
+                    self.quiet_until = now + self.double_refractory
+                    return "double_blink"
+            return None
+
+        if self.both_closed:
+            # a two-eye closure just ended; only short, deliberate ones count
+            # as the first half of a double blink
+            self.both_closed = False
+            seconds = now - self.both_since
+            self.last_blink_end = now if self.min_closure <= seconds <= self.max_blink else -math.inf
+            # after a blink, an eye still closed may be a wink, timed from
+            # here so the other eye's slow reopening is not one
+            if seconds <= self.max_blink:
+                for eye in (0, 1):
+                    if self.closed[eye]:
+                        self.closed_since[eye] = now
+                self.winked = False
+            else:
+                self.winked = True
+            return None
+
+        if not left and not right:
+            self.winked = False
+            return None
+
+        eye = 0 if left else 1
+        if not self.winked and now - self.closed_since[eye] >= self.wink_hold:
+            self.winked = True
+            return "left_wink" if eye == 0 else "right_wink"
+        return None
+
+# EAR traces are JSONL, one frame per line:
+#   {"t": 12.033, "ear": [left, right], "event": "left_wink"}
+# "event" (optional) labels the frame where a deliberate gesture starts.
+def load_trace(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+# Detected events matched to labelled ones: a detection counts if it comes
+# within `tolerance` seconds after a label of the same kind; anything else is
+# a false click. Returns per-event precision / recall and false clicks per minute.
+def evaluate(detector, frames, tolerance=1.0):
+    labels = [(f['t'], f['event']) for f in frames if f.get('event')]
+    detected = []
+    for frame in frames:
+        event = detector.update(frame['ear'], frame['t'])
+        if event:
+            detected.append((frame['t'], event))
+
+    used = set()
+    hits = {}
+    false = {}
+    for t, event in detected:
+        match = next((i for i, (lt, le) in enumerate(labels)
+                      if i not in used and le == event and lt <= t <= lt + tolerance), None)
+        if match is None:
+            false[event] = false.get(event, 0) + 1
+        else:
+            used.add(match)
+            hits[event] = hits.get(event, 0) + 1
+
+    minutes = max((frames[-1]['t'] - frames[0]['t']) / 60.0, 1e-9) if frames else 1e-9
+    report = {}
+    for event in ('left_wink', 'right_wink', 'double_blink'):
+        labelled = sum(1 for _, le in labels if le == event)
+        found = hits.get(event, 0)
+        wrong = false.get(event, 0)
+        report[event] = {
+            'labelled': labelled,
+            'detected': found + wrong,
+            'recall': round(found / labelled, 3) if labelled else None,
+            'precision': round(found / (found + wrong), 3) if found + wrong else None,
+        }
+    report['false_clicks_per_min'] = round(sum(false.values()) / minutes, 2)
+    return report
+
+# Synthetic EAR trace of one user: per-eye open levels, noise, natural
+# blinks at ~`blink_rate` per minute and labelled winks / double blinks
+def synth_trace(minutes=2.0, fps=30.0, seed=0, blink_rate=15.0, gestures_per_min=6.0):
+    rng = np.random.default_rng(seed)
+    n = int(minutes * 60 * fps)
+    t = np.arange(n) / fps
+    open_level = rng.uniform(0.18, 0.36) * np.array([1.0, rng.uniform(0.85, 1.15)])  # tilt / asymmetry
+    closed_level = open_level * rng.uniform(0.15, 0.45)
+    ear = open_level * (1 + 0.04*np.sin(2*np.pi*t[:, None]/rng.uniform(20, 60))) \
+        + rng.normal(0, 0.06, (n, 2)) * open_level
+    closure = np.zeros((n, 2))
+    events = [None] * n
+
+    def close(start, seconds, eyes, depth=1.0):
+        a, b = int(start*fps), min(int((start + seconds)*fps), n)
+        if b > a:
+            closure[a:b, eyes] = np.maximum(closure[a:b, eyes], depth)
+
+    for start in np.cumsum(rng.exponential(60.0 / blink_rate, int(minutes*blink_rate*2))):
+        if start < minutes*60 - 1:
+            close(start, rng.uniform(0.08, 0.2), [0, 1])
+    for start in np.arange(5.0, minutes*60 - 3, 60.0 / gestures_per_min) + rng.uniform(0, 2, 1):
+        kind = rng.choice(['left_wink', 'right_wink', 'double_blink'])
+        if kind == 'double_blink':
+            first = rng.uniform(0.1, 0.2)
+            close(start, first, [0, 1])
+            close(start + first + rng.uniform(0.1, 0.25), rng.uniform(0.1, 0.2), [0, 1])
+        else:
+            eye = 0 if kind == 'left_wink' else 1
+            close(start, rng.uniform(0.3, 0.6), [eye])
+            close(start, 0.5, [1 - eye], depth=0.25)  # the other eye squints a little
+        events[int(start*fps)] = str(kind)
+
+    ear = ear * (1 - closure) + closed_level * closure
+    return [{'t': round(float(t[i]), 4), 'ear': [round(float(ear[i, 0]), 4), round(float(ear[i, 1]), 4)],
+             **({'event': events[i]} if events[i] else {})} for i in range(n)]
+
+# Make synthetic traces:    python blink.py synth trace.jsonl [--minutes 2 --seed 0]
+# EAR trace of a face recording (unlabelled):  python blink.py record face.jsonl trace.jsonl
+# Evaluate a trace:         python blink.py eval trace.jsonl
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Adaptive blink detector")
+    parser.add_argument('command', choices=['synth', 'record', 'eval'])
+    parser.add_argument('paths', nargs='+')
+    parser.add_argument('--minutes', type=float, default=2.0)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    if args.command == 'synth':
+        frames = synth_trace(args.minutes, seed=args.seed)
+    elif args.command == 'record':
+        from frame_source import LandmarkSource, landmarks_to_array
+        from eye import eye_features
+        source = LandmarkSource(args.paths[0])
+        frames = []
+        while source.isOpened():
+            success, image = source.read()
+            if not success:
+                break
+            faces = source.landmarks.multi_face_landmarks
+            if faces:
+                ears = eye_features(landmarks_to_array(faces[0]), image.shape[1] / image.shape[0])[0]
+                frames.append({'t': round(source.timestamp, 4), 'ear': [round(float(e), 4) for e in ears]})
+    else:
+        frames = load_trace(args.paths[0])
+        for name, detector in (('adaptive', BlinkDetector()), ('fixed', BlinkDetector(adaptive=False))):
+            print(name, json.dumps(evaluate(detector, frames)))
+    if args.command != 'eval':
+        with open(args.paths[-1], 'w') as f:
+            f.writelines(json.dumps(frame) + "\n" for frame in frames)
+        print(f"👁 {len(frames)} frames written to {args.paths[-1]}")
@@ -0,0 +1,269 @@
+import argparse
+import json
+import numpy as np
+
+# Dwell actions and the fixation time (seconds) each one needs
+#   click:  left click once per fixation
+#   drag:   dwell presses the button; it is released when the gaze moves on
+#           (the fixation ends), as the eye controller always did
+#   drag_toggle: opt-in instead of drag: the first dwell presses the button
+#           and the next dwell (where the drag should end) releases it, so
+#           the gaze can travel with the button held
+#   scroll: fixating near the top or bottom edge of the screen scrolls that
+#           way, repeatedly while the fixation lasts
+DEFAULT_ACTIONS = {'drag': 1.5}
+
+# Salvucci dispersion of (N, 2) points: x range + y range
+def dispersion(points):
+    return float(np.ptp(points[:, 0]) + np.ptp(points[:, 1])) if len(points) else 0.0
+
+# Dwell engine for a gaze cursor, in screen pixels.
+#
+# Fixations are found by dispersion threshold (I-DT): the gaze samples of the
+# last `min_fixation` seconds starting within `enter` px of dispersion open a
+# fixation. Its samples go into a fixed-size ring buffer (the last `capacity`
+# samples) whose mean is the fixation centroid. The fixation ends when
+#   - samples stay more than `exit` / 2 from the centroid for `exit_hold`
+#     seconds (a saccade; shorter outliers such as blinks are skipped), or
+#   - the buffered samples spread over more than `exit` px (slow drift)
+# exit > enter gives hysteresis: jitter that opened a fixation cannot end it.
+#
+# `actions` maps action names (see DEFAULT_ACTIONS) to dwell seconds.
+# update() returns one event per frame at most: "click", "drag_start",
+# "drag_end", "scroll_up", "scroll_down" or None.
+# "drag_end" comes from the end of the fixation for 'drag' and from the
+# next dwell for 'drag_toggle'.
+class DwellEngine:
+    def __init__(self, actions=None, screen=(1920, 1080), enter=50.0, exit=80.0, min_fixation=0.1,
+                 exit_hold=0.12, capacity=64, scroll_edge=0.15, scroll_every=0.3):
+        self.actions = sorted((DEFAULT_ACTIONS if actions is None else actions).items(), key=lambda a: a[1])
+        self.screen = screen
+        self.enter = enter
+        self.exit = exit
+        self.min_fixation = min_fixation
+        self.exit_hold = exit_hold
+        self.scroll_edge = scroll_edge
+        self.scroll_every = scroll_every
+        self.buffer = np.zeros((capacity, 3))  # t, x, y
+        self.head = 0   # next slot
+        self.count = 0
+        self.pending = []  # outlier samples while fixated
+        self.fixation_start = None
+        self.fired = set()
+        self.next_scroll = None
+        self.dragging = False
+
+    @property
+    def fixated(self):
+        return self.fixation_start is not None
+
+    # Buffered samples, oldest first until the ring wraps (order does not
+    # matter for the centroid or the dispersion)
+    @property
+    def samples(self):
+        return self.buffer[:self.count]
+
+    @property
+    def centroid(self):
+        return self.samples[:, 1:].mean(axis=0) if self.count else None
+
+    # Seconds the current fixation has lasted
+    def dwell(self, now):
+        return 0.0 if self.fixation_start is None else now - self.fixation_start
+
+    def push(self, t, x, y):
+        self.buffer[self.head] = (t, x, y)
+        self.head = (self.head + 1) % len(self.buffer)
+        self.count = min(self.count + 1, len(self.buffer))
+
+    def clear(self, keep=()):
+        self.head = self.count = 0
+        for sample in keep:
+            self.push(*sample)
+
+    # Returns "drag_end" when this releases a 'drag'
+    def end_fixation(self, keep=()):
+        self.fixation_start = None
+        self.fired = set()
+        self.next_scroll = None
+        self.pending = []
+        self.clear(keep)
+        if self.dragging and not any(action == 'drag_toggle' for action, _ in self.actions):
+            self.dragging = False
+            return "drag_end"
+        return None
+
+    def update(self, point, now):
+        x, y = point
+        if not self.fixated:
+            self.push(now, x, y)
+            samples = self.samples
+            window = samples[samples[:, 0] >= now - self.min_fixation]
+            if len(window) < 3 or len(window) == len(samples) and samples[:, 0].min() > now - self.min_fixation:
+                return None  # not enough history for a full window yet
+            if dispersion(window[:, 1:]) > self.enter:
+                return None
+            self.fixation_start = window[:, 0].min()
+            self.clear(window)
+            return self.act(now)
+
+        if np.hypot(x - self.centroid[0], y - self.centroid[1]) > self.exit / 2:
+            self.pending.append((now, x, y))
+            if now - self.pending[0][0] >= self.exit_hold:
+                return self.end_fixation(self.pending)
+            return None
+        self.pending = []
+        self.push(now, x, y)
+        if dispersion(self.samples[:, 1:]) > self.exit:
+            return self.end_fixation([(now, x, y)])
+        return self.act(now)
+
+    def act(self, now):
+        dwell = self.dwell(now)
+        y = self.centroid[1] / self.screen[1]
+        edge = 'scroll_up' if y < self.scroll_edge else 'scroll_down' if y > 1 - self.scroll_edge else None
+        for action, seconds in self.actions:
+            if dwell < seconds:
+                break
+            if action == 'scroll':
+                if edge and (self.next_scroll is None or now >= self.next_scroll):
+                    self.next_scroll = now + self.scroll_every
+                    return edge
+                continue
+            if edge and any(a == 'scroll' for a, _ in self.actions):
+                continue  # edge fixations are for scrolling
+            if action in self.fired:
+                continue
+            self.fired.add(action)
+            if action == 'click':
+                return "click"
+            if action == 'drag' and not self.dragging:
+                self.dragging = True
+                return "drag_start"
+            if action == 'drag_toggle':
+                self.dragging = not self.dragging
+                return "drag_start" if self.dragging else "drag_end"
+        return None
+
+# The eye controller's previous rule, for comparison: compares each point
+# with the one before and presses after `hold` seconds of frame-to-frame
+# movement under `movement` px (L1), releasing ("release") on the next move
+class FrameToFrameDwell:
+    def __init__(self, hold=1.5, movement=25.0):
+        self.hold = hold
+        self.movement = movement
+        self.last = None
+        self.since = None
+        self.dragging = False
+
+    def update(self, point, now):
+        if self.last is None:
+            self.last, self.since = point, now
+            return None
+        event = None
+        if abs(point[0] - self.last[0]) + abs(point[1] - self.last[1]) < self.movement:
+            if now - self.since >= self.hold and not self.dragging:
+                self.dragging = True
+                event = "drag_start"
+        else:
+            self.since = now
+            if self.dragging:
+                self.dragging = False
+                event = "release"
+        self.last = point
+        return event
+
+# Gaze traces are JSONL, one sample per line, in screen pixels:
+#   {"t": 3.2, "xy": [812.0, 430.5], "event": "dwell"}
+# "event" (optional) marks where a deliberate dwell starts.
+def load_trace(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+# Dwell events matched to labelled dwells: an event counts if it comes within
+# `window` seconds after a label; anything else is a false action. Returns
+# recall, false actions per minute and the mean dwell time until the action.
+def evaluate(engine, samples, window=3.0):
+    labels = [s['t'] for s in samples if s.get('event') == 'dwell']
+    events = []
+    for sample in samples:
+        event = engine.update(sample['xy'], sample['t'])
+        if event and event not in ("release", "drag_end"):
+            events.append(sample['t'])
+
+    used = set()
+    latencies = []
+    false = 0
+    for t in events:
+        match = next((i for i, lt in enumerate(labels) if i not in used and lt <= t <= lt + window), None)
+        if match is None:
+            false += 1
+        else:
+            used.add(match)
+            latencies.append(t - labels[match])
+    minutes = max((samples[-1]['t'] - samples[0]['t']) / 60.0, 1e-9) if samples else 1e-9
+    return {
+        'labelled': len(labels),
+        'recall': round(len(used) / len(labels), 3) if labels else None,
+        'false_actions_per_min': round(false / minutes, 2),
+        'mean_dwell_s': round(float(np.mean(latencies)), 3) if latencies else None,
+    }
+
+# Synthetic filtered gaze cursor: short fixations and saccades, slow drift
+# (reading, smooth pursuit) and labelled deliberate dwells, with jitter and
+# the odd blink glitch
+def synth_trace(minutes=2.0, fps=30.0, seed=0, screen=(1920, 1080), jitter=4.0):
+    rng = np.random.default_rng(seed)
+    size = np.array(screen, np.float64)
+    samples = []
+    t = 0.0
+    point = size / 2
+
+    def emit(xy, event=None):
+        nonlocal t
+        sample = {'t': round(t, 4), 'xy': [round(float(v), 1) for v in xy]}
+        if event:
+            sample['event'] = event
+        samples.append(sample)
+        t += 1.0 / fps
+
+    while t < minutes * 60:
+        kind = rng.choice(['glance', 'drift', 'dwell'], p=[0.5, 0.3, 0.2])
+        target = rng.uniform(0.2, 0.8, 2) * size
+        for step in np.linspace(0, 1, 4)[1:]:  # saccade
+            emit(point + (target - point) * step)
+        point = target
+        if kind == 'drift':
+            velocity = rng.normal(0, 1, 2)
+            velocity *= rng.uniform(40, 120) / np.hypot(*velocity)
+            n = int(rng.uniform(2, 5) * fps)
+        else:
+            velocity = np.zeros(2)
+            n = int((rng.uniform(1.8, 2.5) if kind == 'dwell' else rng.uniform(0.2, 1.0)) * fps)
+        for i in range(n):
+            point = point + velocity / fps
+            xy = point + rng.normal(0, jitter, 2)
+            if rng.random() < 0.01:
+                xy = xy + rng.normal(0, 150, 2)  # blink glitch
+            emit(xy, 'dwell' if kind == 'dwell' and i == 0 else None)
+    return samples
+
+# Make synthetic traces:  python dwell.py synth trace.jsonl [--minutes 2 --seed 0]
+# Evaluate a trace:       python dwell.py eval trace.jsonl
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gaze dwell engine")
+    parser.add_argument('command', choices=['synth', 'eval'])
+    parser.add_argument('trace')
+    parser.add_argument('--minutes', type=float, default=2.0)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    if args.command == 'synth':
+        samples = synth_trace(args.minutes, seed=args.seed)
+        with open(args.trace, 'w') as f:
+            f.writelines(json.dumps(sample) + "\n" for sample in samples)
+        print(f"👁 {len(samples)} samples written to {args.trace}")
+    else:
+        samples = load_trace(args.trace)
+        for name, engine in (('dwell', DwellEngine()), ('frame-to-frame', FrameToFrameDwell())):
+            print(name, json.dumps(evaluate(engine, samples)))
@@ -1,120 +1,100 @@
+import argparse
 import cv2
-import mediapipe as mp
-import pyautogui
+import numpy as np
 import time
+import threading
+from frame_source import CameraSource, landmarks_to_array
+from face_tracking import FaceMeshTracker
+from actuator import shared_actuator
+from filters import make_filter
+from preview import make_preview, handle_stop_signals, restore_signals
+from metrics import loop_metrics
+from timing import Cooldown
+from blink import BlinkDetector
+from dwell import DwellEngine
+from gaze_calibration import CalibrationSession, calibration_path, grid_targets, load_calibration
 
-class EyeController:
-    def __init__(self):
-        self.cam = cv2.VideoCapture(0)
-        self.face_mesh = mp.solutions.face_mesh.FaceMesh(refine_landmarks=True)
-        self.screen_w, self.screen_h = pyautogui.size()
-        
-        # Blink detection variables
-        self.left_eye_closed = False
-        self.right_eye_closed = False
-        self.last_blink_time = 0
-        self.blink_cooldown = 0.5  # seconds
-        self.double_blink_threshold = 0.3  # seconds for double blink
-        self.last_blink_end_time = 0
-        
-        # Gaze holding variables
-        self.gaze_start_time = 0
-        self.gaze_hold_threshold = 1.5  # seconds to trigger drag
-        self.is_dragging = False
-        self.last_gaze_point = None
-        
-        # Click cooldown
-        self.click_cooldown = 0
+# Face mesh indices (left eye first): eye outline per eye as corner, top,
+# top, corner, bottom, bottom, and the four points on each iris' rim
+EYE_INDICES = np.array([[33, 160, 158, 133, 153, 144],
+                        [362, 385, 387, 263, 373, 380]])
+IRIS_RIMS = np.array([[469, 470, 471, 472],
+                      [474, 475, 476, 477]])
+IRIS_RIM = slice(474, 478)
 
-    def get_eye_aspect_ratio(self, eye_landmarks):
-        # Calculate eye aspect ratio for blink detection
-        # Vertical points
-        v1 = abs(eye_landmarks[1].y - eye_landmarks[5].y)
-        v2 = abs(eye_landmarks[2].y - eye_landmarks[4].y)
-        # Horizontal points
-        h = abs(eye_landmarks[0].x - eye_landmarks[3].x)
-        
-        ear = (v1 + v2) / (2.0 * h)
-        return ear
+# All per-frame eye measurements from the (478, 3) face mesh array at once:
+#   ears:  eye aspect ratios (left, right), small when the eye is closed;
+#          euclidean lengths, so they hold up when the head tilts
+#   iris:  centre of the right iris (mean of its 4 rim points), frame coordinates
+#   gaze:  each iris centre in its eye's own frame - relative to the midpoint
+#          of the eye corners, along and across the corner-to-corner axis, in
+#          eye widths - averaged over both eyes; head position, distance and
+#          roll cancel out
+# `aspect` is the frame's width / height, making x and y the same scale.
+def eye_features(points, aspect=1.0):
+    scale = np.array([aspect, 1.0])
+    eyes = points[EYE_INDICES, :2] * scale  # (2 eyes, 6 points, xy)
+    lids = eyes[:, [1, 2]] - eyes[:, [5, 4]]
+    vertical = np.hypot(lids[..., 0], lids[..., 1]).sum(axis=1)
+    corners = eyes[:, 0] - eyes[:, 3]
+    horizontal = np.hypot(corners[:, 0], corners[:, 1])
+    ears = vertical / (2.0 * np.maximum(horizontal, 1e-9))
 
-    def detect_blinks(self, landmarks):
-        # Left eye landmarks (indices from MediaPipe)
-        left_eye_indices = [33, 160, 158, 133, 153, 144]
-        right_eye_indices = [362, 385, 387, 263, 373, 380]
-        
-        left_eye = [landmarks[i] for i in left_eye_indices]
-        right_eye = [landmarks[i] for i in right_eye_indices]
-        
-        left_ear = self.get_eye_aspect_ratio(left_eye)
-        right_ear = self.get_eye_aspect_ratio(right_eye)
-        
-        # Blink threshold (adjust based on testing)
-        blink_threshold = 0.2
-        
-        current_time = time.time()
-        
-        # Detect left wink
-        if left_ear < blink_threshold and right_ear > blink_threshold:
-            if not self.left_eye_closed and current_time - self.last_blink_time > self.blink_cooldown:
-                self.left_eye_closed = True
-                self.last_blink_time = current_time
-                return "left_wink"
-        
-        # Detect right wink  
-        elif right_ear < blink_threshold and left_ear > blink_threshold:
-            if not self.right_eye_closed and current_time - self.last_blink_time > self.blink_cooldown:
-                self.right_eye_closed = True
-                self.last_blink_time = current_time
-                return "right_wink"
-        
-        # Detect double blink (both eyes)
-        elif left_ear < blink_threshold and right_ear < blink_threshold:
-            if not self.left_eye_closed and not self.right_eye_closed:
-                self.left_eye_closed = True
-                self.right_eye_closed = True
-                current_time = time.time()
-                
-                # Check for double blink
-                if current_time - self.last_blink_end_time < self.double_blink_threshold:
-                    self.last_blink_end_time = 0
-                    return "double_blink"
-                self.last_blink_time = current_time
-        
-        # Reset eye states when eyes open
-        else:
-            if self.left_eye_closed or self.right_eye_closed:
-                self.last_blink_end_time = time.time()
-            self.left_eye_closed = False
-            self.right_eye_closed = False
-            
-        return None
+    irises = points[IRIS_RIMS, :2].mean(axis=1)  # (2 eyes, xy)
+    first, second = eyes[:, 0], eyes[:, 3]
+    axis = second - first
+    width = np.maximum(np.hypot(axis[:, 0], axis[:, 1]), 1e-9)[:, None]
+    along = axis / width
+    offset = (irises*scale - (first + second)/2) / width
+    across = offset[:, 1]*along[:, 0] - offset[:, 0]*along[:, 1]
+    gaze = np.stack([(offset*along).sum(axis=1), across], axis=1).mean(axis=0)
+    return ears, irises[1], gaze
 
-    def check_gaze_holding(self, gaze_point):
-        current_time = time.time()
+class EyeController:
+    # source: any frame_source.FrameSource; defaults to the live camera
+    # cursor_filter: a filters.CursorFilter or make_filter() spec for the gaze cursor
+    # preview: preview.make_preview spec, e.g. 'window', 'headless', 'mjpeg/5'
+    # calibration: a gaze_calibration.GazeCalibration; by default the saved one
+    #              of `user` (the login name) is loaded, if they have calibrated
+    # adaptive_input: run the face mesh on a crop around the tracked face
+    #                 (see face_tracking.FaceMeshTracker); False sends full frames
+    # iris_every: run the iris model every Nth frame only, holding the iris
+    #             relative to the eye corners in between
+    # dwell_actions: what fixating the cursor does, e.g. {'click': 1.0} or
+    #                {'drag': 1.5, 'scroll': 0.8}; see dwell.DEFAULT_ACTIONS.
+    #                'drag' releases when the gaze moves on; {'drag_toggle':
+    #                1.5} releases on the next dwell instead
+    # metrics: metrics.LoopMetrics for the stage timings, 'eye' by default
+    def __init__(self, source=None, cursor_filter=None, preview=None, calibration=None, user=None,
+                 adaptive_input=True, iris_every=1, dwell_actions=None, metrics=None):
+        self.preview = make_preview(preview, 'Eye Controlled Mouse', quit_keys=(ord('q'),))
+        self.metrics = metrics or loop_metrics('eye')
+        self.stop_event = threading.Event()
+        self.cam = source if source is not None else CameraSource(0)
+        self.face = None
+        if not self.cam.provides_landmarks:
+            self.face = FaceMeshTracker(adaptive_input, iris_every)
+        self.actuator = shared_actuator()
+        self.gaze = None  # head-pose-normalised gaze of the last frame, see eye_features
+        self.user = user
+        self.calibration = calibration
+        if calibration is None:
+            self.calibration = load_calibration(user)
+            if self.calibration is not None:
+                print(f"👁 Using gaze calibration ({self.calibration.kind}) from {calibration_path(user)}")
+        if cursor_filter is None:
+            cursor_filter = {'type': 'one_euro', 'min_cutoff': 0.3, 'beta': 0.003}
+        self.cursor_filter = make_filter(cursor_filter)
         
-        if self.last_gaze_point is None:
-            self.last_gaze_point = gaze_point
-            self.gaze_start_time = current_time
-            return False
-            
-        # Check if gaze is stable (within small movement threshold)
-        movement = abs(gaze_point[0] - self.last_gaze_point[0]) + abs(gaze_point[1] - self.last_gaze_point[1])
+        # Winks and double blinks, with per-user thresholds (see blink)
+        self.blinks = BlinkDetector()
         
-        if movement < 0.01:  # Small movement threshold
-            if current_time - self.gaze_start_time > self.gaze_hold_threshold:
-                if not self.is_dragging:
-                    self.is_dragging = True
-                    pyautogui.mouseDown()
-                    return "drag_start"
-        else:
-            self.gaze_start_time = current_time
-            if self.is_dragging:
-                self.is_dragging = False
-                pyautogui.mouseUp()
-                return "drag_end"
-                
-        self.last_gaze_point = gaze_point
-        return None
+        # Dwell actions on gaze fixations (see dwell)
+        self.dwell = DwellEngine(dwell_actions, self.actuator.screen_size())
+        
+        # Click cooldown, in seconds (it used to be 20 / 30 frames at ~30 fps)
+        self.click_cooldown = Cooldown(0.67)
+        self.double_click_cooldown = 1.0
 
     def eye_move(self):
         print("👁 Starting Eye Controlled Mouse...")
@@ -124,108 +104,202 @@ class EyeController:
         print("😑 Double Blink - Double click")
         print("👁️ Stare/Hold Gaze (1.5s) - Click and drag")
         print("Press 'Q' to quit")
-        
-        while True:
-            success, frame = self.cam.read()
-            if not success:
-                continue
+        previous_signals = handle_stop_signals(self.stop_event)
+        try:
+            while self.cam.isOpened() and not self.stop_event.is_set():
+                timer = self.metrics.timer()
+                success, frame = self.cam.read()
+                if not success:
+                    continue
+                timer.mark('capture')
+                timer.captured = time.monotonic()
                 
-            frame = cv2.flip(frame, 1)
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            output = self.face_mesh.process(rgb_frame)
-            landmark_points = output.multi_face_landmarks
-            frame_h, frame_w, _ = frame.shape
+                frame = cv2.flip(frame, 1)
+                points = self.face_points(frame, timer)
+                frame_h, frame_w, _ = frame.shape
+                show = self.preview.due()
             
-            if landmark_points:
-                landmarks = landmark_points[0].landmark
+                if points is not None:
+                    ears, iris, self.gaze = eye_features(points, frame_w / frame_h)
                 
-                # Cursor movement with right eye
-                for id, landmark in enumerate(landmarks[474:478]):
-                    x = int(landmark.x * frame_w)
-                    y = int(landmark.y * frame_h)
-                    cv2.circle(frame, (x, y), 3, (0, 255, 0))
-                    
-                    if id == 1:
-                        screen_x = self.screen_w * landmark.x
-                        screen_y = self.screen_h * landmark.y
-                        pyautogui.moveTo(screen_x, screen_y)
-                        
-                        # Check gaze holding for drag
-                        gaze_action = self.check_gaze_holding((landmark.x, landmark.y))
-                        if gaze_action == "drag_start":
-                            cv2.putText(frame, "DRAGGING", (50, 100), 
-                                      cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
+                    # Cursor movement, one move per frame: calibrated gaze, or the
+                    # right iris' position in the frame until the user calibrates
+                    if self.calibration is not None:
+                        target = np.clip(self.calibration.map(self.gaze), 0.0, 1.0)
+                    else:
+                        target = iris
+                    screen_w, screen_h = self.actuator.screen_size()
+                    screen_x, screen_y = self.cursor_filter((screen_w * target[0], screen_h * target[1]), self.cam.timestamp)
                 
-                # Blink detection
-                if self.click_cooldown <= 0:
-                    blink_action = self.detect_blinks(landmarks)
-                    
+                    # Dwell on the cursor for drag (and click / scroll if configured)
+                    self.dwell.screen = (screen_w, screen_h)
+                    dwell_action = self.dwell.update((screen_x, screen_y), self.cam.timestamp)
+                
+                    # Blink detection; the detector sees every frame to keep its
+                    # levels current, clicks wait for the cooldown
+                    blink_action = self.blinks.update(ears, self.cam.timestamp)
+                    if not self.click_cooldown.ready(self.cam.timestamp):
+                        blink_action = None
+                    timer.mark('gesture')
+                
+                    self.actuator.move_to(screen_x, screen_y, timer.acted)
+                    if dwell_action == "drag_start":
+                        self.actuator.mouse_down()
+                    elif dwell_action == "drag_end":
+                        self.actuator.mouse_up()
+                    elif dwell_action == "click":
+                        self.actuator.click()
+                    elif dwell_action in ("scroll_up", "scroll_down"):
+                        self.actuator.scroll(3 if dwell_action == "scroll_up" else -3)
+                
+                    label = None
                     if blink_action == "left_wink":
-                        pyautogui.click()
-                        self.click_cooldown = 20
-                        cv2.putText(frame, "LEFT CLICK", (50, 50), 
-                                  cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-                        
+                        self.actuator.click()
+                        self.click_cooldown.trigger(now=self.cam.timestamp)
+                        label = ("LEFT CLICK", (0, 255, 0))
+                    
                     elif blink_action == "right_wink":
-                        pyautogui.click(button='right')
-                        self.click_cooldown = 20
-                        cv2.putText(frame, "RIGHT CLICK", (50, 50), 
-                                  cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-                        
+                        self.actuator.click(button='right')
+                        self.click_cooldown.trigger(now=self.cam.timestamp)
+                        label = ("RIGHT CLICK", (0, 255, 0))
+                    
                     elif blink_action == "double_blink":
-                        pyautogui.doubleClick()
-                        self.click_cooldown = 30
-                        cv2.putText(frame, "DOUBLE CLICK", (50, 50), 
-                                  cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 0, 0), 2)
+                        self.actuator.double_click()
+                        self.click_cooldown.trigger(self.double_click_cooldown, self.cam.timestamp)
+                        label = ("DOUBLE CLICK", (255, 0, 0))
+                    timer.mark('actuation')
                 
-                # Visual feedback for eye states
-                left_color = (0, 0, 255) if self.left_eye_closed else (0, 255, 0)
-                right_color = (0, 0, 255) if self.right_eye_closed else (0, 255, 0)
-                
-                cv2.putText(frame, "L", (50, 150), cv2.FONT_HERSHEY_SIMPLEX, 
-                          1, left_color, 2)
-                cv2.putText(frame, "R", (100, 150), cv2.FONT_HERSHEY_SIMPLEX, 
-                          1, right_color, 2)
-                
-                # Draw eye landmarks for visualization
-                for landmark in [landmarks[145], landmarks[159]]:  # Left eye
-                    x = int(landmark.x * frame_w)
-                    y = int(landmark.y * frame_h)
-                    cv2.circle(frame, (x, y), 3, (0, 255, 255), -1)
+                    if show:
+                        for x, y in points[IRIS_RIM, :2] * (frame_w, frame_h):
+                            cv2.circle(frame, (int(x), int(y)), 3, (0, 255, 0))
+                        if self.dwell.dragging:
+                            cv2.putText(frame, "DRAGGING", (50, 100), 
+                                      cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
+                        if label:
+                            cv2.putText(frame, label[0], (50, 50), 
+                                      cv2.FONT_HERSHEY_SIMPLEX, 1, label[1], 2)
                 
-                for landmark in [landmarks[374], landmarks[386]]:  # Right eye
-                    x = int(landmark.x * frame_w)
-                    y = int(landmark.y * frame_h)
-                    cv2.circle(frame, (x, y), 3, (0, 255, 255), -1)
-            
-            # Update cooldown
-            if self.click_cooldown > 0:
-                self.click_cooldown -= 1
+                    if show:
+                        self.draw_eye_state(frame, points)
             
-            # Display instructions
-            cv2.putText(frame, "Left Wink: Left Click", (10, frame_h - 100), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
-            cv2.putText(frame, "Right Wink: Right Click", (10, frame_h - 80), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
-            cv2.putText(frame, "Double Blink: Double Click", (10, frame_h - 60), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
-            cv2.putText(frame, "Hold Gaze: Drag", (10, frame_h - 40), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
-            cv2.putText(frame, "Press 'Q' to quit", (10, frame_h - 20), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
-            
-            cv2.imshow('Eye Controlled Mouse', frame)
-            
-            if cv2.waitKey(1) & 0xFF == ord('q'):
-                break
-        
+                if show:
+                    self.draw_instructions(frame)
+                closed = self.preview.show(frame)
+                timer.mark('render')
+                timer.done()
+                if closed:
+                    break
+        finally:
+            restore_signals(previous_signals)
+            if self.dwell.dragging:
+                self.actuator.mouse_up()
+        if self.face is not None:
+            self.face.close()
         self.cam.release()
-        cv2.destroyAllWindows()
+        self.preview.close()
         print("✅ Eye Controller Closed")
 
-def eye_move():
-    controller = EyeController()
+    # (478, 3) face mesh landmarks of the frame, recorded or from the model
+    def face_points(self, frame, timer=None):
+        if self.cam.landmarks is not None:
+            faces = self.cam.landmarks.multi_face_landmarks
+            return landmarks_to_array(faces[0]) if faces else None
+        return self.face.process(frame, timer)
+
+    # Calibration mode: shows a cols x rows grid of targets one at a time,
+    # fits gaze -> screen (gaze_calibration.GazeCalibration, 'poly2' or
+    # 'homography'), saves it for the user and starts using it
+    def calibrate(self, cols=3, rows=3, kind='poly2', settle=0.8, collect=1.0):
+        session = CalibrationSession(grid_targets(cols, rows), settle, collect)
+        screen_w, screen_h = self.actuator.screen_size()
+        canvas = np.zeros((screen_h, screen_w, 3), np.uint8)
+        if self.preview.mode == 'window':
+            cv2.namedWindow(self.preview.window_name, cv2.WINDOW_NORMAL)
+            cv2.setWindowProperty(self.preview.window_name, cv2.WND_PROP_FULLSCREEN, cv2.WINDOW_FULLSCREEN)
+        print(f"🎯 Gaze calibration: look at each of the {len(session.targets)} targets until it turns green")
+        previous_signals = handle_stop_signals(self.stop_event)
+        try:
+            while not session.done and self.cam.isOpened() and not self.stop_event.is_set():
+                success, frame = self.cam.read()
+                if not success:
+                    continue
+                frame = cv2.flip(frame, 1)
+                points = self.face_points(frame)
+                gaze = None
+                if points is not None:
+                    gaze = eye_features(points, frame.shape[1] / frame.shape[0])[2]
+                now = self.cam.timestamp
+                target = session.update(gaze, now)
+            
+                if target is not None and self.preview.due():
+                    canvas.fill(0)
+                    x, y = int(target[0] * screen_w), int(target[1] * screen_h)
+                    colour = (0, 255, 0) if session.sampling(now) else (0, 0, 255)
+                    cv2.circle(canvas, (x, y), 20, colour, cv2.FILLED)
+                    cv2.circle(canvas, (x, y), 4, (255, 255, 255), cv2.FILLED)
+                    if gaze is None:
+                        cv2.putText(canvas, "No face found", (50, 50), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
+                    if self.preview.show(canvas):
+                        break
+        finally:
+            restore_signals(previous_signals)
+        if self.preview.mode == 'window':
+            cv2.setWindowProperty(self.preview.window_name, cv2.WND_PROP_FULLSCREEN, cv2.WINDOW_NORMAL)
+        if not session.done:
+            print("🎯 Calibration cancelled")
+            return None
+        self.calibration = session.fit(kind)
+        path = calibration_path(self.user)
+        self.calibration.save(path)
+        print(f"🎯 Calibrated, RMS error {100*self.calibration.error:.1f}% of the screen, saved to {path}")
+        return self.calibration
+
+    # Ask a running eye_move() loop to finish, from any thread
+    def stop(self):
+        self.stop_event.set()
+
+    # Visual feedback for eye states
+    def draw_eye_state(self, frame, points):
+        frame_h, frame_w, _ = frame.shape
+        left_closed, right_closed = self.blinks.closed
+        left_color = (0, 0, 255) if left_closed else (0, 255, 0)
+        right_color = (0, 0, 255) if right_closed else (0, 255, 0)
+        
+        cv2.putText(frame, "L", (50, 150), cv2.FONT_HERSHEY_SIMPLEX, 
+                  1, left_color, 2)
+        cv2.putText(frame, "R", (100, 150), cv2.FONT_HERSHEY_SIMPLEX, 
+                  1, right_color, 2)
+        
+        # Draw eye landmarks for visualization (left eye 145/159, right eye 374/386)
+        for x, y in points[[145, 159, 374, 386], :2] * (frame_w, frame_h):
+            cv2.circle(frame, (int(x), int(y)), 3, (0, 255, 255), -1)
+
+    # Display instructions
+    def draw_instructions(self, frame):
+        frame_h = frame.shape[0]
+        cv2.putText(frame, "Left Wink: Left Click", (10, frame_h - 100), 
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
+        cv2.putText(frame, "Right Wink: Right Click", (10, frame_h - 80), 
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
+        cv2.putText(frame, "Double Blink: Double Click", (10, frame_h - 60), 
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
+        cv2.putText(frame, "Hold Gaze: Drag / Drop", (10, frame_h - 40), 
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
+        cv2.putText(frame, "Press 'Q' to quit", (10, frame_h - 20), 
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
+
+# calibrate: run the calibration grid first (always done when there is no
+# saved calibration for `user` and calibrate is None)
+def eye_move(source=None, preview=None, user=None, calibrate=False):
+    controller = EyeController(source, preview=preview, user=user)
+    if calibrate or (calibrate is None and controller.calibration is None):
+        controller.calibrate()
     controller.eye_move()
 
+#   python eye.py [--calibrate] [--user NAME]
 if __name__ == "__main__":
-    eye_move()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Eye controlled mouse")
+    parser.add_argument('--calibrate', action='store_true', help="run gaze calibration before starting")
+    parser.add_argument('--user', default=None, help="whose calibration to use (default: login name)")
+    args = parser.parse_args()
+    eye_move(user=args.user, calibrate=args.calibrate)
\ No newline at end of file
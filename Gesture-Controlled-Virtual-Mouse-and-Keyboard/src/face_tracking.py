@@ -0,0 +1,97 @@
+import mediapipe as mp
+import numpy as np
+from frame_source import landmarks_to_array
+from roi_inference import LandmarkModels, RoiInference
+
+# Iris landmarks of the refined face mesh (centre + 4 rim points per iris)
+# and the corners of the eye each set belongs to (left eye first)
+IRIS_POINTS = np.array([[468, 469, 470, 471, 472],
+                        [473, 474, 475, 476, 477]])
+EYE_CORNERS = np.array([[33, 133],
+                        [362, 263]])
+
+def face_mesh_model(refine_landmarks=True, static_image_mode=False):
+    return mp.solutions.face_mesh.FaceMesh(static_image_mode=static_image_mode, max_num_faces=1,
+                                           refine_landmarks=refine_landmarks, min_detection_confidence=0.5,
+                                           min_tracking_confidence=0.5)
+
+# Per-eye frame: corner midpoint, unit axis along the corners, the normal
+# to it and the eye width, from the (N, 3) mesh
+def eye_frames(points, aspect):
+    scale = np.array([aspect, 1.0])
+    corners = points[EYE_CORNERS, :2] * scale  # (2 eyes, 2 corners, xy)
+    mid = corners.mean(axis=1)
+    axis = corners[:, 1] - corners[:, 0]
+    width = np.maximum(np.hypot(axis[:, 0], axis[:, 1]), 1e-9)[:, None]
+    along = axis / width
+    normal = np.stack([-along[:, 1], along[:, 0]], axis=1)
+    return mid, along, normal, width, scale
+
+# Face mesh for the eye controller, as cheap as tracking allows.
+#   - The mesh runs through a RoiInference: a crop around the last face
+#     while it is tracked, a downscaled full frame to find it again.
+#   - iris_every > 1 runs the refined (iris) model only every Nth frame and
+#     the plain 468-point mesh in between. The iris is held in each eye's
+#     own frame (eye_frames) from the last refined result and placed with
+#     the current eye corners, so it still follows the head exactly; only
+#     eye-in-head movement updates at the lower rate. The refined model then
+#     runs in static image mode, as it never sees consecutive frames; the
+#     plain model's tracking restarts after each frame it skips.
+# process() returns the (478, 3) landmark array of the face, or None.
+class FaceMeshTracker:
+    def __init__(self, adaptive_input=True, iris_every=1):
+        self.iris_every = max(1, int(iris_every))
+        self.refined = LandmarkModels(lambda static: face_mesh_model(True, static), tracking=self.iris_every == 1)
+        self.plain = LandmarkModels(lambda static: face_mesh_model(False, static)) if self.iris_every > 1 else None
+        self.input = RoiInference('multi_face_landmarks', margin=0.25, enabled=adaptive_input)
+        self.frame_index = -1
+        self.iris = None  # (2 eyes, 5 points, 3): iris in eye coordinates
+        self.counts = {'refined': 0, 'held': 0}
+
+    def process(self, image, timer=None):
+        self.frame_index += 1
+        h, w = image.shape[:2]
+        aspect = w / h
+        if self.plain is None or self.iris is None or self.frame_index % self.iris_every == 0:
+            points = self.run(self.refined, image, timer)
+            self.iris = None
+            if points is not None:
+                self.counts['refined'] += 1
+                self.iris = self.to_eye(points, aspect)
+            return points
+
+        points = self.run(self.plain, image, timer)
+        if points is None:
+            self.iris = None
+            return None
+        self.counts['held'] += 1
+        points = np.concatenate([points[:468], np.zeros((10, 3))])
+        points[IRIS_POINTS] = self.from_eye(points, aspect)
+        if timer is not None:
+            timer.mark('inference')
+        return points
+
+    def run(self, models, image, timer):
+        results = self.input.process(models, image, timer)
+        faces = results.multi_face_landmarks
+        return landmarks_to_array(faces[0]) if faces else None
+
+    def to_eye(self, points, aspect):
+        mid, along, normal, width, scale = eye_frames(points, aspect)
+        offset = points[IRIS_POINTS, :2]*scale - mid[:, None]
+        rel = np.empty((2, 5, 3))
+        rel[..., 0] = (offset * along[:, None]).sum(axis=2) / width
+        rel[..., 1] = (offset * normal[:, None]).sum(axis=2) / width
+        rel[..., 2] = points[IRIS_POINTS, 2] - points[EYE_CORNERS, 2].mean(axis=1)[:, None]
+        return rel
+
+    def from_eye(self, points, aspect):
+        mid, along, normal, width, scale = eye_frames(points, aspect)
+        xy = mid[:, None] + width[:, None] * (self.iris[..., :1]*along[:, None] + self.iris[..., 1:2]*normal[:, None])
+        z = points[EYE_CORNERS, 2].mean(axis=1)[:, None] + self.iris[..., 2]
+        return np.concatenate([xy / scale, z[..., None]], axis=2)
+
+    def close(self):
+        self.refined.close()
+        if self.plain is not None:
+            self.plain.close()
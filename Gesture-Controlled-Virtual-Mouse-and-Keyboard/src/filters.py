@@ -0,0 +1,233 @@
+import json
+import math
+import sys
+import time
+import numpy as np
+
+# Cursor smoothing filters for 2-D points.
+# Call a filter with a point and its timestamp (seconds, any monotonic base)
+# and it returns the filtered point. Every filter also keeps a velocity
+# estimate: with `lead` > 0 the output is extrapolated that many seconds
+# ahead to make up for capture/inference latency, and predict() does the same
+# on demand.
+class CursorFilter:
+    def __init__(self, lead=0.0):
+        self.lead = lead
+        self.position = None
+        self.velocity = (0.0, 0.0)
+        self.last_time = None
+
+    def reset(self):
+        self.position = None
+        self.velocity = (0.0, 0.0)
+        self.last_time = None
+
+    def __call__(self, point, t=None):
+        if t is None:
+            t = time.monotonic()
+        if self.position is None:
+            self.position = (float(point[0]), float(point[1]))
+            self.velocity = (0.0, 0.0)
+        else:
+            dt = t - self.last_time
+            if dt <= 0:
+                dt = 1e-3
+            self.position, self.velocity = self.update(point, dt)
+        self.last_time = t
+        return self.predict(self.lead)
+
+    def update(self, point, dt):
+        raise NotImplementedError
+
+    def predict(self, lead):
+        return (self.position[0] + self.velocity[0]*lead,
+                self.position[1] + self.velocity[1]*lead)
+
+# Plain passthrough, for comparison
+class NoFilter(CursorFilter):
+    def update(self, point, dt):
+        vx = (point[0] - self.position[0]) / dt
+        vy = (point[1] - self.position[1]) / dt
+        return (float(point[0]), float(point[1])), (vx, vy)
+
+# Exponential moving average with a fixed smoothing factor
+class ExponentialFilter(CursorFilter):
+    def __init__(self, alpha=0.5, lead=0.0):
+        super().__init__(lead)
+        self.alpha = alpha
+
+    def update(self, point, dt):
+        x = self.position[0] + self.alpha*(point[0] - self.position[0])
+        y = self.position[1] + self.alpha*(point[1] - self.position[1])
+        return (x, y), ((x - self.position[0]) / dt, (y - self.position[1]) / dt)
+
+def smoothing_factor(cutoff, dt):
+    r = 2 * math.pi * cutoff * dt
+    return r / (r + 1)
+
+# One Euro filter (Casiez et al.): the cutoff frequency rises with speed,
+# so the cursor is steady when the hand is still and responsive when it moves
+class OneEuroFilter(CursorFilter):
+    def __init__(self, min_cutoff=1.0, beta=0.007, d_cutoff=1.0, lead=0.0):
+        super().__init__(lead)
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+
+    def update(self, point, dt):
+        raw_vx = (point[0] - self.position[0]) / dt
+        raw_vy = (point[1] - self.position[1]) / dt
+        a_d = smoothing_factor(self.d_cutoff, dt)
+        vx = self.velocity[0] + a_d*(raw_vx - self.velocity[0])
+        vy = self.velocity[1] + a_d*(raw_vy - self.velocity[1])
+
+        cutoff = self.min_cutoff + self.beta*math.hypot(vx, vy)
+        a = smoothing_factor(cutoff, dt)
+        x = self.position[0] + a*(point[0] - self.position[0])
+        y = self.position[1] + a*(point[1] - self.position[1])
+        return (x, y), (vx, vy)
+
+# Constant-velocity Kalman filter, one independent [position, velocity]
+# state per axis. process_noise is the acceleration variance (units/s^2)^2,
+# measurement_noise the variance of a single measurement (units^2).
+class KalmanFilter(CursorFilter):
+    def __init__(self, process_noise=5e5, measurement_noise=25.0, lead=0.0):
+        super().__init__(lead)
+        self.process_noise = process_noise
+        self.measurement_noise = measurement_noise
+        self.covariance = None
+
+    def reset(self):
+        super().reset()
+        self.covariance = None
+
+    def update(self, point, dt):
+        if self.covariance is None:
+            self.covariance = [np.eye(2) * self.measurement_noise for _ in range(2)]
+        F = np.array([[1.0, dt], [0.0, 1.0]])
+        Q = self.process_noise * np.array([[dt**4/4, dt**3/2], [dt**3/2, dt**2]])
+        position, velocity = [], []
+        for axis in range(2):
+            state = F @ np.array([self.position[axis], self.velocity[axis]])
+            P = F @ self.covariance[axis] @ F.T + Q
+            gain = P[:, 0] / (P[0, 0] + self.measurement_noise)
+            state = state + gain * (point[axis] - state[0])
+            self.covariance[axis] = P - np.outer(gain, P[0])
+            position.append(float(state[0]))
+            velocity.append(float(state[1]))
+        return tuple(position), tuple(velocity)
+
+FILTERS = {
+    'none': NoFilter,
+    'exponential': ExponentialFilter,
+    'one_euro': OneEuroFilter,
+    'kalman': KalmanFilter,
+}
+
+# Build a filter from a name plus keyword settings, or from a dict like
+# {'type': 'one_euro', 'min_cutoff': 1.0, 'beta': 0.007, 'lead': 0.03}
+def make_filter(spec='one_euro', **settings):
+    if isinstance(spec, CursorFilter):
+        return spec
+    if isinstance(spec, dict):
+        settings = dict(spec, **settings)
+        spec = settings.pop('type', 'one_euro')
+    if spec not in FILTERS:
+        raise ValueError(f"Unknown cursor filter: {spec}")
+    return FILTERS[spec](**settings)
+
+# Filter presets compared by the benchmark (screen pixel units)
+PRESETS = {
+    'none': {'type': 'none'},
+    'exponential': {'type': 'exponential', 'alpha': 0.4},
+    'one_euro': {'type': 'one_euro', 'min_cutoff': 1.0, 'beta': 0.007},
+    'one_euro+lead': {'type': 'one_euro', 'min_cutoff': 1.0, 'beta': 0.007, 'lead': 0.03},
+    'kalman': {'type': 'kalman'},
+    'kalman+lead': {'type': 'kalman', 'lead': 0.03},
+}
+
+# Load a cursor trace as an (N, 3) array of t, x, y in screen pixels.
+# Accepts LandmarkSource JSONL recordings (hand landmark 9, or the iris
+# centre for face recordings) and plain "t,x,y" CSV files in pixels.
+def load_trace(path, screen=(1920, 1080)):
+    rows = []
+    if path.endswith('.jsonl'):
+        with open(path) as f:
+            for idx, line in enumerate(f):
+                if not line.strip():
+                    continue
+                frame = json.loads(line)
+                t = frame.get('t', idx / 30.0)
+                if frame.get('hands'):
+                    x, y = frame['hands'][0]['landmarks'][9][:2]
+                elif frame.get('face'):
+                    iris = np.asarray(frame['face'][474:478])
+                    x, y = iris[:, :2].mean(axis=0)
+                else:
+                    continue
+                rows.append((t, x*screen[0], y*screen[1]))
+    else:
+        with open(path) as f:
+            for line in f:
+                parts = line.strip().split(',')
+                try:
+                    rows.append(tuple(float(p) for p in parts[:3]))
+                except ValueError:
+                    continue  # header line
+    return np.array(rows, dtype=np.float64).reshape(-1, 3)
+
+# Replay a trace through a filter and measure
+#   jitter: RMS frame-to-frame output movement (px) while the hand is still
+#   lag: delay (ms) that best aligns the output with the true path while moving
+#   error: RMS distance (px) from the true path
+# The "true" path is a centered moving average of the raw trace.
+def evaluate(cursor_filter, trace, still_speed=60.0, window=9, max_lag=0.3):
+    cursor_filter.reset()
+    t = trace[:, 0]
+    raw = trace[:, 1:]
+    output = np.array([cursor_filter(point, ts) for ts, point in zip(t, raw)])
+
+    kernel = np.ones(window) / window
+    pad = window // 2
+    padded = np.pad(raw, ((pad, pad), (0, 0)), mode='edge')
+    truth = np.stack([np.convolve(padded[:, i], kernel, mode='valid') for i in range(2)], axis=1)
+
+    dt = np.diff(t)
+    frame_dt = float(np.median(dt)) if len(dt) else 1/30.0
+    speed = np.linalg.norm(np.diff(truth, axis=0), axis=1) / np.maximum(dt, 1e-6)
+    still = speed < still_speed
+    steps = np.linalg.norm(np.diff(output, axis=0), axis=1)
+    jitter = float(np.sqrt(np.mean(steps[still]**2))) if still.any() else float('nan')
+
+    moving = np.concatenate([[False], ~still])
+    best_shift, best_err = 0, float('inf')
+    for shift in range(0, int(max_lag / frame_dt) + 1):
+        idx = np.nonzero(moving[:len(moving) - shift])[0]
+        if len(idx) == 0:
+            break
+        err = np.mean(np.sum((output[idx + shift] - truth[idx])**2, axis=1))
+        if err < best_err:
+            best_shift, best_err = shift, err
+    lag = best_shift * frame_dt * 1000.0 if moving.any() else float('nan')
+
+    error = float(np.sqrt(np.mean(np.sum((output - truth)**2, axis=1))))
+    return {'jitter_px': jitter, 'lag_ms': lag, 'error_px': error, 'frames': len(trace)}
+
+def benchmark(paths, presets=PRESETS):
+    report = {}
+    for path in paths:
+        trace = load_trace(path)
+        report[path] = {name: evaluate(make_filter(spec), trace) for name, spec in presets.items()}
+    return report
+
+# Compare filter presets on recorded traces:
+#   python filters.py trace.jsonl [more traces ...]
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("usage: python filters.py TRACE.jsonl|TRACE.csv [...]")
+        sys.exit(1)
+    for path, results in benchmark(sys.argv[1:]).items():
+        print(f"📈 {path}")
+        print(f"{'filter':<16}{'jitter px':>12}{'lag ms':>10}{'error px':>12}")
+        for name, r in results.items():
+            print(f"{name:<16}{r['jitter_px']:>12.2f}{r['lag_ms']:>10.1f}{r['error_px']:>12.2f}")
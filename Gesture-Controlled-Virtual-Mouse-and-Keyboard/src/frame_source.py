@@ -0,0 +1,371 @@
+import contextlib
+import glob
+import json
+import os
+import sys
+import time
+import cv2
+import numpy as np
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+# Common interface for everything the controllers read frames from.
+# It mirrors the parts of cv2.VideoCapture the controllers already use
+# (read, isOpened, get, set, release), so a source can stand in for `cap`.
+# After each read(), `timestamp` holds the frame time in seconds and
+# `landmarks` holds recorded model output for that frame (None when the
+# source only provides pixels and the model still has to run).
+class FrameSource:
+    provides_landmarks = False
+
+    def __init__(self, fps=None, realtime=False):
+        self.fps = fps
+        self.realtime = realtime  # pace reads to `fps` instead of running flat out
+        self.width = 0
+        self.height = 0
+        self.timestamp = None
+        self.landmarks = None
+        self.frame_index = -1
+        self._next_due = None
+
+    def read(self):
+        raise NotImplementedError
+
+    def isOpened(self):
+        return False
+
+    def release(self):
+        pass
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return self.width
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return self.height
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps or 0
+        return 0
+
+    def set(self, prop, value):
+        return False
+
+    # Sleep until the next frame is due when replaying at a fixed rate
+    def _pace(self):
+        if not (self.realtime and self.fps):
+            return
+        now = time.monotonic()
+        if self._next_due is None:
+            self._next_due = now
+        elif now < self._next_due:
+            time.sleep(self._next_due - now)
+        self._next_due += 1.0 / self.fps
+
+    # Deterministic frame time for recorded input
+    def _media_time(self):
+        return self.frame_index / float(self.fps or 30)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+# Live webcam
+class CameraSource(FrameSource):
+    def __init__(self, index=0, api=cv2.CAP_ANY, width=None, height=None):
+        super().__init__()
+        self.cap = cv2.VideoCapture(index, api)
+        if width:
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        if height:
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        self.width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or None
+
+    def read(self):
+        success, image = self.cap.read()
+        self.timestamp = time.monotonic()
+        if success:
+            self.frame_index += 1
+        return success, image
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def release(self):
+        self.cap.release()
+
+    def get(self, prop):
+        return self.cap.get(prop)
+
+    def set(self, prop, value):
+        return self.cap.set(prop, value)
+
+# Recorded video file, or a directory of still images read in name order
+class VideoSource(FrameSource):
+    def __init__(self, path, fps=None, realtime=False, loop=False):
+        super().__init__(fps, realtime)
+        self.path = path
+        self.loop = loop
+        self.cap = None
+        self.images = None
+        self.finished = False
+        if os.path.isdir(path):
+            self.images = sorted(p for p in glob.glob(os.path.join(path, '*'))
+                                 if p.lower().endswith(IMAGE_EXTENSIONS))
+            if self.images:
+                first = cv2.imread(self.images[0])
+                self.height, self.width = first.shape[:2]
+            self.fps = fps or 30
+        else:
+            self.cap = cv2.VideoCapture(path)
+            self.width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+            self.height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            self.fps = fps or self.cap.get(cv2.CAP_PROP_FPS) or 30
+
+    def _next_image(self):
+        if self.images is not None:
+            position = self.frame_index + 1
+            if position >= len(self.images):
+                if not (self.loop and self.images):
+                    return False, None
+                position %= len(self.images)
+            return True, cv2.imread(self.images[position])
+
+        success, image = self.cap.read()
+        if not success and self.loop:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            success, image = self.cap.read()
+        return success, image
+
+    def read(self):
+        if self.finished:
+            return False, None
+        self._pace()
+        success, image = self._next_image()
+        if not success:
+            self.finished = True
+            return False, None
+        self.frame_index += 1
+        self.timestamp = self._media_time()
+        return True, image
+
+    def isOpened(self):
+        if self.finished:
+            return False
+        if self.images is not None:
+            return bool(self.images)
+        return self.cap.isOpened()
+
+    def release(self):
+        self.finished = True
+        if self.cap is not None:
+            self.cap.release()
+
+# Plain stand-ins for the MediaPipe result messages, with the same attribute
+# names the controllers and mp_drawing read.
+class ReplayLandmark:
+    __slots__ = ('x', 'y', 'z')
+
+    def __init__(self, x, y, z):
+        self.x = x
+        self.y = y
+        self.z = z
+
+    def HasField(self, name):
+        return False
+
+class ReplayLandmarkList:
+    def __init__(self, points):
+        self.array = np.asarray(points, dtype=np.float64)
+        self.landmark = [ReplayLandmark(float(x), float(y), float(z)) for x, y, z in self.array]
+
+class ReplayCategory:
+    def __init__(self, label, score, index=0):
+        self.label = label
+        self.score = score
+        self.index = index
+
+class ReplayClassificationList:
+    def __init__(self, label, score):
+        self.classification = [ReplayCategory(label, score, 0 if label == 'Left' else 1)]
+
+class ReplayResults:
+    def __init__(self, hands=(), face=None):
+        self.multi_hand_landmarks = None
+        self.multi_handedness = None
+        self.multi_face_landmarks = None
+        if hands:
+            self.multi_hand_landmarks = [ReplayLandmarkList(h['landmarks']) for h in hands]
+            self.multi_handedness = [ReplayClassificationList(h.get('label', 'Right'), h.get('score', 1.0)) for h in hands]
+        if face is not None:
+            self.multi_face_landmarks = [ReplayLandmarkList(face)]
+
+# Convert a landmark list (a hand's 21 or the face mesh's 478 points) to an
+# (N, 3) array, once per frame
+def landmarks_to_array(landmark_list):
+    array = getattr(landmark_list, 'array', None)  # replayed landmarks already carry one
+    if array is not None:
+        return array
+    return np.array([(lm.x, lm.y, lm.z) for lm in landmark_list.landmark], dtype=np.float64)
+
+# Recorded landmark stream (JSONL or NPZ). Frames are blank canvases and
+# `landmarks` carries the recorded model output, so no model runs at all.
+#
+# JSONL: one object per frame
+#   {"t": 0.033, "hands": [{"label": "Right", "score": 0.98, "landmarks": [[x, y, z], ...]}],
+#    "face": [[x, y, z], ...]}
+# NPZ: arrays t (N,), hands (N, H, 21, 3) with NaN for missing hands,
+#   labels (N, H), scores (N, H) and optionally face (N, 478, 3).
+class LandmarkSource(FrameSource):
+    provides_landmarks = True
+
+    def __init__(self, path, width=640, height=480, fps=30, realtime=False, loop=False):
+        super().__init__(fps, realtime)
+        self.path = path
+        self.loop = loop
+        self.width = width
+        self.height = height
+        self.blank = np.zeros((height, width, 3), np.uint8)
+        self.frames = LandmarkSource.load(path)
+        self.finished = False
+        self.loops = 0
+
+    @staticmethod
+    def load(path):
+        if path.endswith('.npz'):
+            return LandmarkSource.load_npz(path)
+        frames = []
+        with open(path) as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    frames.append(json.loads(line))
+        return frames
+
+    @staticmethod
+    def load_npz(path):
+        data = np.load(path, allow_pickle=False)
+        count = len(data['t'])
+        frames = []
+        for i in range(count):
+            frame = {'t': float(data['t'][i]), 'hands': []}
+            if 'hands' in data:
+                for h in range(data['hands'].shape[1]):
+                    points = data['hands'][i, h]
+                    if np.isnan(points).any():
+                        continue
+                    frame['hands'].append({
+                        'label': str(data['labels'][i, h]) if 'labels' in data else 'Right',
+                        'score': float(data['scores'][i, h]) if 'scores' in data else 1.0,
+                        'landmarks': points,
+                    })
+            if 'face' in data and not np.isnan(data['face'][i]).any():
+                frame['face'] = data['face'][i]
+            frames.append(frame)
+        return frames
+
+    def read(self):
+        if self.finished:
+            return False, None
+        self._pace()
+        position = self.frame_index + 1 - self.loops * len(self.frames)
+        if position >= len(self.frames):
+            if not (self.loop and self.frames):
+                self.finished = True
+                self.landmarks = None
+                return False, None
+            self.loops += 1
+            position = 0
+        self.frame_index += 1
+        frame = self.frames[position]
+        self.landmarks = ReplayResults(frame.get('hands', ()), frame.get('face'))
+        # Recorded times are offset per loop so they keep increasing
+        duration = len(self.frames) / float(self.fps or 30)
+        if 't' in frame:
+            self.timestamp = frame['t'] + self.loops * duration
+        else:
+            self.timestamp = self._media_time()
+        return True, self.blank.copy()
+
+    def isOpened(self):
+        return not self.finished and bool(self.frames)
+
+    def release(self):
+        self.finished = True
+
+# Writes model output to the JSONL format LandmarkSource reads
+class LandmarkRecorder:
+    def __init__(self, path):
+        self.file = open(path, 'w')
+        self.start = None
+
+    def write(self, results, timestamp):
+        if self.start is None:
+            self.start = timestamp
+        frame = {'t': round(timestamp - self.start, 4), 'hands': []}
+        hand_landmarks = getattr(results, 'multi_hand_landmarks', None) or []
+        handedness = getattr(results, 'multi_handedness', None) or []
+        for idx, hand in enumerate(hand_landmarks):
+            label, score = 'Right', 1.0
+            if idx < len(handedness) and handedness[idx].classification:
+                label = handedness[idx].classification[0].label
+                score = round(handedness[idx].classification[0].score, 4)
+            frame['hands'].append({
+                'label': label,
+                'score': score,
+                'landmarks': [[round(lm.x, 5), round(lm.y, 5), round(lm.z, 5)] for lm in hand.landmark],
+            })
+        faces = getattr(results, 'multi_face_landmarks', None)
+        if faces:
+            frame['face'] = [[round(lm.x, 5), round(lm.y, 5), round(lm.z, 5)] for lm in faces[0].landmark]
+        self.file.write(json.dumps(frame) + '\n')
+
+    def close(self):
+        self.file.close()
+
+# Build a source from a command line style spec:
+# a camera index, a .jsonl/.npz landmark recording, a video file or an image directory
+def open_source(spec, realtime=False, loop=False, fps=None):
+    if isinstance(spec, FrameSource):
+        return spec
+    if isinstance(spec, int) or str(spec).isdigit():
+        return CameraSource(int(spec))
+    if str(spec).endswith(('.jsonl', '.npz')):
+        return LandmarkSource(spec, fps=fps or 30, realtime=realtime, loop=loop)
+    return VideoSource(spec, fps=fps, realtime=realtime, loop=loop)
+
+# Model context for a source: the real model for pixel sources,
+# nothing at all when the source already carries landmarks
+def landmark_model(source, factory):
+    if source.provides_landmarks:
+        return contextlib.nullcontext(None)
+    return factory()
+
+# Record hand (default) or face landmarks from the camera:
+#   python frame_source.py out.jsonl [hands|face] [camera index]
+if __name__ == "__main__":
+    import mediapipe as mp
+    out_path = sys.argv[1] if len(sys.argv) > 1 else 'session.jsonl'
+    kind = sys.argv[2] if len(sys.argv) > 2 else 'hands'
+    source = CameraSource(int(sys.argv[3]) if len(sys.argv) > 3 else 0)
+    if kind == 'face':
+        model = mp.solutions.face_mesh.FaceMesh(refine_landmarks=True)
+    else:
+        model = mp.solutions.hands.Hands(max_num_hands=2, min_detection_confidence=0.5, min_tracking_confidence=0.5)
+    recorder = LandmarkRecorder(out_path)
+    print(f"⏺ Recording {kind} landmarks to {out_path} - press 'q' to stop")
+    while source.isOpened():
+        success, image = source.read()
+        if not success:
+            continue
+        image = cv2.flip(image, 1)
+        results = model.process(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+        recorder.write(results, source.timestamp)
+        cv2.imshow('Recording', image)
+        if cv2.waitKey(1) & 0xFF == ord('q'):
+            break
+    recorder.close()
+    source.release()
+    cv2.destroyAllWindows()
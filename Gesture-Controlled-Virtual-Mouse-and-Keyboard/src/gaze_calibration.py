@@ -0,0 +1,133 @@
+import getpass
+import json
+import os
+import numpy as np
+
+CALIBRATION_DIR = os.environ.get('GVE_CALIBRATION_DIR', os.path.join(os.path.expanduser('~'), '.gve', 'calibration'))
+
+# Model features for (N, 2) gaze vectors
+def gaze_features(gaze, kind):
+    gaze = np.asarray(gaze, np.float64).reshape(-1, 2)
+    x, y = gaze[:, 0], gaze[:, 1]
+    one = np.ones_like(x)
+    if kind == 'poly2':
+        return np.stack([one, x, y, x*y, x*x, y*y], axis=1)
+    if kind == 'homography':
+        return np.stack([x, y, one], axis=1)
+    raise ValueError(f"unknown calibration kind {kind!r}")
+
+# Gaze (eye.eye_features' head-pose-normalised iris offset) to screen
+# position as a fraction of the screen, so a calibration survives a
+# resolution change. Mapping is one feature vector times a matrix:
+#   poly2:       [1, x, y, xy, x^2, y^2] @ W (6x2), least squares
+#   homography:  [x, y, 1] @ H.T (3x3), then divide by the last column
+class GazeCalibration:
+    def __init__(self, kind, matrix, error=None):
+        self.kind = kind
+        self.matrix = np.asarray(matrix, np.float64)
+        self.error = error  # RMS fit error, fraction of the screen
+
+    def map(self, gaze):
+        out = gaze_features(gaze, self.kind) @ self.matrix
+        if self.kind == 'homography':
+            out = out[:, :2] / out[:, 2:]
+        return out[0] if np.ndim(gaze) == 1 else out
+
+    # Fit to (N, 2) gaze samples looking at (N, 2) screen fractions
+    @staticmethod
+    def fit(gaze, targets, kind='poly2'):
+        targets = np.asarray(targets, np.float64).reshape(-1, 2)
+        features = gaze_features(gaze, kind)
+        needed = 6 if kind == 'poly2' else 4
+        if len(targets) < needed:
+            raise ValueError(f"{kind} needs at least {needed} targets, got {len(targets)}")
+        if kind == 'poly2':
+            matrix = np.linalg.lstsq(features, targets, rcond=None)[0]
+        else:
+            # direct linear transform: H is the null vector of the stacked constraints
+            x, y = features[:, 0], features[:, 1]
+            u, v = targets[:, 0], targets[:, 1]
+            zero, one = np.zeros_like(x), np.ones_like(x)
+            rows = np.concatenate([
+                np.stack([x, y, one, zero, zero, zero, -u*x, -u*y, -u], axis=1),
+                np.stack([zero, zero, zero, x, y, one, -v*x, -v*y, -v], axis=1)])
+            matrix = np.linalg.svd(rows)[2][-1].reshape(3, 3).T
+        calibration = GazeCalibration(kind, matrix)
+        calibration.error = float(np.sqrt(np.mean(np.sum((calibration.map(gaze) - targets)**2, axis=1))))
+        return calibration
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump({'kind': self.kind, 'matrix': self.matrix.tolist(), 'error': self.error}, f, indent=2)
+
+    @staticmethod
+    def load(path):
+        with open(path) as f:
+            spec = json.load(f)
+        return GazeCalibration(spec['kind'], spec['matrix'], spec.get('error'))
+
+# Where a user's calibration lives: GVE_CALIBRATION_DIR (default
+# ~/.gve/calibration) / <user>.json, user defaulting to the login name
+def calibration_path(user=None):
+    return os.path.join(CALIBRATION_DIR, (user or getpass.getuser()) + '.json')
+
+# The user's saved calibration, or None if they have not calibrated yet
+def load_calibration(user=None):
+    path = calibration_path(user)
+    if not os.path.exists(path):
+        return None
+    return GazeCalibration.load(path)
+
+# Screen fractions of a cols x rows grid of targets, `margin` from the edges
+def grid_targets(cols=3, rows=3, margin=0.1):
+    xs = np.linspace(margin, 1 - margin, cols)
+    ys = np.linspace(margin, 1 - margin, rows)
+    return [(float(x), float(y)) for y in ys for x in xs]
+
+# Walks the user through the grid targets. Feed it the gaze of every frame
+# with the frame timestamp; each target is shown for `settle` seconds (the
+# eyes get there) and then sampled for `collect` seconds. A target's gaze is
+# the median of its samples, which ignores blinks and saccades.
+class CalibrationSession:
+    def __init__(self, targets=None, settle=0.8, collect=1.0):
+        self.targets = targets or grid_targets()
+        self.settle = settle
+        self.collect = collect
+        self.index = 0
+        self.started = None
+        self.samples = []
+        self.gaze = []  # median gaze per finished target
+
+    @property
+    def done(self):
+        return self.index >= len(self.targets)
+
+    @property
+    def target(self):
+        return None if self.done else self.targets[self.index]
+
+    # True once the current target is past its settle time
+    def sampling(self, now):
+        return self.started is not None and now - self.started >= self.settle
+
+    # gaze may be None when no face was found this frame
+    def update(self, gaze, now):
+        if self.done:
+            return None
+        if self.started is None:
+            self.started = now
+        elapsed = now - self.started
+        if gaze is not None and elapsed >= self.settle:
+            self.samples.append(gaze)
+        if elapsed >= self.settle + self.collect:
+            if self.samples:
+                self.gaze.append(np.median(np.array(self.samples), axis=0))
+                self.index += 1
+            # no samples (face lost): keep the target up for another round
+            self.started = now
+            self.samples = []
+        return self.target
+
+    def fit(self, kind='poly2'):
+        return GazeCalibration.fit(np.array(self.gaze), self.targets[:len(self.gaze)], kind)
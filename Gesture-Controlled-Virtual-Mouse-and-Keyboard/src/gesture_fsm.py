@@ -0,0 +1,56 @@
+# One row of a GestureMachine table.
+#   mode:           state held while this gesture lasts (None = idle)
+#   action:         method of the target run on every step with this gesture
+#   arms:           the gesture arms one-shot actions
+#   requires_armed: the action only runs when armed, and disarms
+class Rule:
+    __slots__ = ('mode', 'action', 'arms', 'requires_armed')
+
+    def __init__(self, mode=None, action=None, arms=False, requires_armed=False):
+        self.mode = mode
+        self.action = action
+        self.arms = arms
+        self.requires_armed = requires_armed
+
+IDLE = Rule()
+
+# Table-driven gesture state machine.
+# `rules` maps gesture -> Rule, `on_enter` / `on_exit` map mode -> method
+# name; the table is shared, the state (mode, armed) lives on the instance,
+# so any number of machines can run side by side. A step is one dict lookup
+# plus at most an exit, an enter and an action call on `target`, each
+# receiving the step's arguments.
+class GestureMachine:
+    def __init__(self, target, rules, on_enter=None, on_exit=None, default=IDLE):
+        self.target = target
+        self.rules = rules
+        self.on_enter = on_enter or {}
+        self.on_exit = on_exit or {}
+        self.default = default
+        self.mode = None
+        self.armed = False
+
+    def reset(self):
+        self.mode = None
+        self.armed = False
+
+    def step(self, gesture, *args):
+        rule = self.rules.get(gesture, self.default)
+        if rule.mode != self.mode:
+            self.call(self.on_exit.get(self.mode), args)
+            self.mode = rule.mode
+            self.call(self.on_enter.get(rule.mode), args)
+
+        if rule.requires_armed:
+            if self.armed:
+                self.armed = False
+                self.call(rule.action, args)
+        else:
+            if rule.arms:
+                self.armed = True
+            self.call(rule.action, args)
+        return self.mode
+
+    def call(self, name, args):
+        if name is not None:
+            getattr(self.target, name)(*args)
@@ -0,0 +1,121 @@
+import math
+
+LABELS = ('Left', 'Right')
+
+def other_label(label):
+    return 'Left' if label == 'Right' else 'Right'
+
+# Top handedness label and score for hand `idx`, read straight from the
+# MediaPipe ClassificationList fields
+def read_handedness(multi_handedness, idx):
+    if not multi_handedness or idx >= len(multi_handedness):
+        return None, 0.0
+    classification = multi_handedness[idx].classification
+    if not classification:
+        return None, 0.0
+    return classification[0].label, classification[0].score
+
+# Palm centre (landmark 9), used to follow a hand from frame to frame
+def palm_position(hand_landmarks):
+    landmark = hand_landmarks.landmark[9]
+    return landmark.x, landmark.y
+
+def distance(p1, p2):
+    return math.hypot(p1[0] - p2[0], p1[1] - p2[1])
+
+# One detected hand after resolution
+class ResolvedHand:
+    def __init__(self, landmarks, label, score, position):
+        self.landmarks = landmarks
+        self.label = label            # label reported by MediaPipe
+        self.score = score            # MediaPipe's confidence in that label
+        self.position = position
+        self.resolved_label = label   # label after tracking
+        self.confidence = score       # confidence in resolved_label
+
+    def assign(self, label):
+        self.resolved_label = label
+        if self.label is None:
+            self.confidence = 0.5
+        elif label == self.label:
+            self.confidence = self.score
+        else:
+            self.confidence = 1.0 - self.score
+
+# Assigns detected hands to the Left/Right slots and keeps the assignment
+# stable across frames: a hand stays in the slot whose last palm position it
+# is closest to, so a one-frame label flip from MediaPipe does not swap hands.
+class HandednessResolver:
+    def __init__(self, max_jump=0.2, max_missed=5):
+        self.max_jump = max_jump      # largest palm move between frames still counted as the same hand
+        self.max_missed = max_missed  # frames a slot keeps its position while its hand is not seen
+        self.tracks = {'Left': None, 'Right': None}
+        self.missed = {'Left': 0, 'Right': 0}
+        self.hands = {'Left': None, 'Right': None}
+
+    def near(self, label, hand):
+        track = self.tracks[label]
+        return track is not None and distance(track, hand.position) < self.max_jump
+
+    def assign_one(self, hand):
+        label = hand.label or 'Right'
+        if not self.near(label, hand) and self.near(other_label(label), hand):
+            label = other_label(label)
+        hand.assign(label)
+
+    def assign_two(self, first, second):
+        # cost of (first -> Left, second -> Right) against the swapped order
+        if self.tracks['Left'] is not None or self.tracks['Right'] is not None:
+            def cost(label, hand):
+                track = self.tracks[label]
+                return self.max_jump if track is None else distance(track, hand.position)
+            keep = cost('Left', first) + cost('Right', second)
+            swap = cost('Right', first) + cost('Left', second)
+            if abs(keep - swap) > 1e-3:
+                first_left = keep < swap
+                first.assign('Left' if first_left else 'Right')
+                second.assign('Right' if first_left else 'Left')
+                return
+
+        if first.label is not None and first.label != second.label:
+            first.assign(first.label)
+            second.assign(other_label(first.label))
+            return
+
+        # Both hands carry the same label: the user's right hand is the one
+        # further right in the mirrored image
+        first_right = first.position[0] > second.position[0]
+        first.assign('Right' if first_right else 'Left')
+        second.assign('Left' if first_right else 'Right')
+
+    # Returns (left, right) ResolvedHand entries, None for a missing hand
+    def resolve(self, results):
+        detected = []
+        multi_hand_landmarks = getattr(results, 'multi_hand_landmarks', None) or []
+        for idx, hand_landmarks in enumerate(multi_hand_landmarks[:2]):
+            label, score = read_handedness(results.multi_handedness, idx)
+            detected.append(ResolvedHand(hand_landmarks, label, score, palm_position(hand_landmarks)))
+
+        if len(detected) == 1:
+            self.assign_one(detected[0])
+        elif len(detected) == 2:
+            self.assign_two(detected[0], detected[1])
+
+        self.hands = {'Left': None, 'Right': None}
+        for hand in detected:
+            self.hands[hand.resolved_label] = hand
+
+        for label in LABELS:
+            hand = self.hands[label]
+            if hand is not None:
+                self.tracks[label] = hand.position
+                self.missed[label] = 0
+            else:
+                self.missed[label] += 1
+                if self.missed[label] > self.max_missed:
+                    self.tracks[label] = None
+        return self.hands['Left'], self.hands['Right']
+
+    def confidence(self, label):
+        hand = self.hands[label]
+        return 0.0 if hand is None else hand.confidence
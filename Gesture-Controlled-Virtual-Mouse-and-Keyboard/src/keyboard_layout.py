@@ -0,0 +1,69 @@
+import json
+import os
+import numpy as np
+
+LAYOUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'layouts')
+
+class Button():
+    def __init__(self, pos, text, size=[85, 85]):
+        self.pos = pos
+        self.size = size
+        self.text = text
+
+# Virtual keyboard layout with O(1) point-to-key lookup.
+# Keys are rasterised once into `key_map`, an int16 image the size of the
+# layout holding the index of the key covering each pixel (-1 for gaps),
+# so finding the key under the fingertip is one array read however many
+# keys there are. Where keys overlap the later one wins, as it is drawn on top.
+class KeyboardLayout:
+    def __init__(self, keys, name='custom'):
+        self.name = name
+        self.keys = keys
+        self.width = max((k.pos[0] + k.size[0] for k in keys), default=0)
+        self.height = max((k.pos[1] + k.size[1] for k in keys), default=0)
+        self.key_map = np.full((self.height + 1, self.width + 1), -1, np.int16)
+        for idx, key in enumerate(keys):
+            x, y = key.pos
+            w, h = key.size
+            # interior only, like the old strict x < px < x + w test
+            self.key_map[y + 1:y + h, x + 1:x + w] = idx
+
+    def key_at(self, x, y):
+        x, y = int(x), int(y)
+        if 0 <= x <= self.width and 0 <= y <= self.height:
+            idx = self.key_map[y, x]
+            if idx >= 0:
+                return self.keys[idx]
+        return None
+
+    # Layout from a parsed JSON description:
+    #   {"origin": [x, y], "key_size": [w, h], "gap": px,
+    #    "rows": [["Q", "W", ...], [{"text": "SPACE", "width": 300}, ...]]}
+    # Keys in a row are placed left to right, `gap` pixels apart; a key can
+    # override its "width"/"height". `scale` resizes the whole layout.
+    @staticmethod
+    def from_dict(spec, scale=1.0):
+        ox, oy = spec.get('origin', [25, 50])
+        kw, kh = spec.get('key_size', [85, 85])
+        gap = spec.get('gap', 15)
+        keys = []
+        y = oy
+        for row in spec['rows']:
+            x = ox
+            for entry in row:
+                if isinstance(entry, str):
+                    entry = {'text': entry}
+                w = entry.get('width', kw)
+                h = entry.get('height', kh)
+                pos = [int(round(x*scale)), int(round(y*scale))]
+                keys.append(Button(pos, entry['text'], [int(round(w*scale)), int(round(h*scale))]))
+                x += w + gap
+            y += kh + gap
+        return KeyboardLayout(keys, spec.get('name', 'custom'))
+
+# Load a layout by name from src/layouts (e.g. 'qwerty', 'qwerty_numbers')
+# or from a path to a JSON file
+def load_layout(name='qwerty', scale=1.0):
+    path = name if name.endswith('.json') else os.path.join(LAYOUT_DIR, name + '.json')
+    with open(path) as f:
+        return KeyboardLayout.from_dict(json.load(f), scale)
@@ -0,0 +1,232 @@
+import bisect
+import math
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Per-frame stages every vision loop reports, in pipeline order
+STAGES = ('capture', 'colour', 'inference', 'gesture', 'actuation', 'render')
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Latency histogram with a fixed set of log-spaced buckets (10 us to 30 s,
+# `per_decade` buckets per factor of ten, ~6% wide at the default), so
+# recording is O(log buckets) and memory never grows. Quantiles are
+# interpolated inside the bucket they fall in.
+class Histogram:
+    def __init__(self, low=1e-5, high=30.0, per_decade=40):
+        decades = math.log10(high / low)
+        steps = int(math.ceil(decades * per_decade))
+        self.edges = [low * 10 ** (i / per_decade) for i in range(steps + 1)]
+        self.counts = [0] * (len(self.edges) + 1)  # last bucket: above `high`
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.edges, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def snapshot(self):
+        return list(self.counts)
+
+    # q-quantile of the whole history, or of `counts - since` for an interval
+    def quantile(self, q, since=None):
+        counts = self.counts if since is None else [a - b for a, b in zip(self.counts, since)]
+        total = sum(counts)
+        if total == 0:
+            return float('nan')
+        rank = q * total
+        seen = 0
+        for idx, n in enumerate(counts):
+            if n and seen + n >= rank:
+                if idx == 0:
+                    return self.edges[0]
+                if idx == len(self.edges):
+                    return self.edges[-1]
+                lo, hi = self.edges[idx - 1], self.edges[idx]
+                return lo * (hi / lo) ** ((rank - seen) / n)
+            seen += n
+        return self.edges[-1]
+
+# Timings for one vision loop: one histogram per stage plus the end-to-end
+# latency from frame capture to the cursor move / key press it caused.
+# Loops get a FrameTimer per frame and call done() once it is finished;
+# every `log_every` seconds a summary of the last interval is printed.
+class LoopMetrics:
+    def __init__(self, name, log_every=10.0):
+        self.name = name
+        self.log_every = log_every
+        self.interval = log_every if log_every > 0 else 10.0  # fps window
+        self.stages = {stage: Histogram() for stage in STAGES}
+        self.latency = Histogram()
+        self.frames = 0
+        self.lock = threading.Lock()
+        self.started = time.monotonic()
+        self.fps = 0.0
+        self.log_start = self.started
+        self.log_frames = 0
+        self.log_marks = self.marks()
+
+    def timer(self):
+        return FrameTimer(self)
+
+    def marks(self):
+        marks = {stage: h.snapshot() for stage, h in self.stages.items()}
+        marks['latency'] = self.latency.snapshot()
+        return marks
+
+    def observe_latency(self, seconds):
+        with self.lock:
+            self.latency.observe(seconds)
+
+    def frame_done(self, totals):
+        with self.lock:
+            for stage, seconds in totals.items():
+                self.stages[stage].observe(seconds)
+            self.frames += 1
+            now = time.monotonic()
+            if now - self.log_start < self.interval:
+                return
+            self.fps = (self.frames - self.log_frames) / (now - self.log_start)
+            line = self.summary(self.log_marks)
+            self.log_start, self.log_frames, self.log_marks = now, self.frames, self.marks()
+        if self.log_every > 0:
+            print(line)
+
+    # One line of p50/p95 per stage in ms over the interval since `marks`
+    def summary(self, marks):
+        parts = [f"⏱ {self.name} {self.fps:.1f} fps"]
+        for stage, h in self.stages.items():
+            if h.count:
+                p50, p95 = (1000*h.quantile(q, marks[stage]) for q in QUANTILES[:2])
+                if not math.isnan(p50):
+                    parts.append(f"{stage} {p50:.1f}/{p95:.1f}")
+        p50, p99 = (1000*self.latency.quantile(q, marks['latency']) for q in (0.5, 0.99))
+        if not math.isnan(p50):
+            parts.append(f"photon-to-cursor {p50:.1f}/{p99:.1f}")
+        return " | ".join(parts) + " ms (p50/p95, latency p50/p99)"
+
+    # Prometheus samples for this loop, keyed by metric family
+    def prometheus(self):
+        with self.lock:
+            families = {
+                'gve_fps': [f'gve_fps{{loop="{self.name}"}} {self.fps:.3f}'],
+                'gve_frames_total': [f'gve_frames_total{{loop="{self.name}"}} {self.frames}'],
+                'gve_stage_seconds': [],
+                'gve_photon_to_cursor_seconds':
+                    summary_lines('gve_photon_to_cursor_seconds', f'loop="{self.name}"', self.latency),
+            }
+            for stage, h in self.stages.items():
+                labels = f'loop="{self.name}",stage="{stage}"'
+                families['gve_stage_seconds'].extend(summary_lines('gve_stage_seconds', labels, h))
+        return families
+
+def summary_lines(metric, labels, histogram):
+    lines = []
+    for q in QUANTILES:
+        value = histogram.quantile(q)
+        if not math.isnan(value):
+            lines.append(f'{metric}{{{labels},quantile="{q}"}} {value:.6f}')
+    lines.append(f'{metric}_sum{{{labels}}} {histogram.sum:.6f}')
+    lines.append(f'{metric}_count{{{labels}}} {histogram.count}')
+    return lines
+
+# Stage times of one frame. mark(stage) charges the time since the previous
+# mark (or begin()) to `stage`; a stage marked several times in one frame is
+# summed, so each histogram gets one sample per frame. A frame can be handed
+# between threads (capture -> inference -> action) as long as only one
+# thread uses it at a time. `captured` is the monotonic time the camera
+# delivered the frame, the start of the photon-to-cursor latency.
+class FrameTimer:
+    def __init__(self, metrics):
+        self.metrics = metrics
+        self.totals = {}
+        self.captured = time.monotonic()
+        self.last = time.perf_counter()
+
+    def begin(self):
+        self.last = time.perf_counter()
+
+    def mark(self, stage):
+        now = time.perf_counter()
+        self.totals[stage] = self.totals.get(stage, 0.0) + now - self.last
+        self.last = now
+
+    def add(self, stage, seconds):
+        self.totals[stage] = self.totals.get(stage, 0.0) + seconds
+
+    # The cursor (or keyboard) acted on this frame; safe to call from any thread
+    def acted(self):
+        self.metrics.observe_latency(time.monotonic() - self.captured)
+
+    def done(self):
+        self.metrics.frame_done(self.totals)
+
+_loops = {}
+_loops_lock = threading.Lock()
+_server = None
+
+# Metrics for a named loop, created on first use. The first call also starts
+# the HTTP endpoint when GVE_METRICS_PORT is set; GVE_METRICS_LOG sets the
+# log interval in seconds (0 turns the log line off).
+def loop_metrics(name):
+    global _server
+    with _loops_lock:
+        if name not in _loops:
+            _loops[name] = LoopMetrics(name, float(os.environ.get('GVE_METRICS_LOG', 10.0)))
+        port = os.environ.get('GVE_METRICS_PORT')
+        if port and _server is None:
+            _server = MetricsServer(int(port))
+            _server.start()
+        return _loops[name]
+
+FAMILIES = {
+    'gve_fps': ('gauge', 'Frames per second over the last log interval'),
+    'gve_frames_total': ('counter', 'Frames fully processed'),
+    'gve_stage_seconds': ('summary', 'Time per frame spent in each stage'),
+    'gve_photon_to_cursor_seconds': ('summary', 'Camera frame to the cursor move or key press it caused'),
+}
+
+def prometheus_text():
+    with _loops_lock:
+        loops = list(_loops.values())
+    samples = [loop.prometheus() for loop in loops]
+    lines = []
+    for family, (kind, help_text) in FAMILIES.items():
+        lines.append(f'# HELP {family} {help_text}')
+        lines.append(f'# TYPE {family} {kind}')
+        for loop_samples in samples:
+            lines.extend(loop_samples[family])
+    return "\n".join(lines) + "\n"
+
+# Serves prometheus_text() on http://127.0.0.1:PORT/metrics
+class MetricsServer:
+    def __init__(self, port):
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = prometheus_text().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.port = port
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="metrics-http", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        print(f"📊 Metrics at http://127.0.0.1:{self.port}/metrics")
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
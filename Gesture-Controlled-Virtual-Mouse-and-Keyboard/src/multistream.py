@@ -0,0 +1,171 @@
+import argparse
+import contextlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pipeline import FrameRing, CaptureStage
+from frame_source import open_source, landmark_model
+from metrics import loop_metrics
+from preview import handle_stop_signals, restore_signals
+from Gesture_Controller import GestureController, hands_model
+
+# Frames/s, dropped frames and inference cost of one stream
+class StreamStats:
+    def __init__(self):
+        self.frames = 0
+        self.busy = 0.0       # seconds spent in inference + gesture logic
+        self.window_frames = 0
+        self.window_start = time.monotonic()
+        self.fps = 0.0
+
+    def record(self, seconds):
+        self.frames += 1
+        self.window_frames += 1
+        self.busy += seconds
+
+    # Close the current reporting window and return its frame rate
+    def roll(self, now):
+        elapsed = now - self.window_start
+        if elapsed > 0:
+            self.fps = self.window_frames / elapsed
+        self.window_frames = 0
+        self.window_start = now
+        return self.fps
+
+# One input station: its source, capture thread, hand model and a
+# GestureController holding all of its tracking and gesture state
+class Stream:
+    def __init__(self, name, source, controller, wake, capacity=2):
+        self.name = name
+        self.source = source
+        self.controller = controller
+        self.ring = FrameRing(capacity, listener=wake)
+        self.stop_event = threading.Event()
+        self.capture = CaptureStage(source, self.ring, self.stop_event, controller.metrics)
+        self.capture.name = f"capture-{name}"
+        self.hands = None
+        self.future = None    # the stream's task in flight, at most one
+        self.stats = StreamStats()
+
+    # Worker task: inference and gesture logic for one frame
+    def step(self, packet):
+        started = time.perf_counter()
+        packet.results = self.controller.process_frame(self.hands, packet)
+        self.controller.handle_frame(packet)
+        packet.timer.done()
+        self.stats.record(time.perf_counter() - started)
+
+# Runs several frame sources in one process.
+# Each source gets its own capture thread and latest-only ring; a scheduler
+# hands the newest frame of every idle stream to a worker pool sized to the
+# machine's cores. A stream never has more than one frame in flight, so its
+# MediaPipe graph (which tracks across frames and is not thread-safe) and
+# gesture state are only touched by one worker at a time, while different
+# streams run in parallel. Only the stream at `control` drives the cursor,
+# since there is a single system cursor; the others recognise gestures only.
+class MultiStreamRunner:
+    def __init__(self, sources, workers=None, adaptive_input=True, control=0, report_every=5.0):
+        self.wake = threading.Event()
+        self.stop_event = threading.Event()
+        self.report_every = report_every
+        self.streams = []
+        for idx, spec in enumerate(sources):
+            source = open_source(spec)
+            controller = GestureController(source, adaptive_input, preview='headless', control=(idx == control),
+                                           metrics=loop_metrics(f"gesture-{idx}"))
+            self.streams.append(Stream(f"{idx}:{spec}", source, controller, self.wake))
+        self.workers = workers or min(len(self.streams), os.cpu_count() or 1)
+
+    def stop(self):
+        self.stop_event.set()
+        self.wake.set()
+
+    def run(self, duration=None):
+        deadline = None if duration is None else time.monotonic() + duration
+        next_report = time.monotonic() + self.report_every
+        errors = []  # worker errors found while shutting down
+        with contextlib.ExitStack() as models, ThreadPoolExecutor(self.workers, thread_name_prefix="hands") as pool:
+            for stream in self.streams:
+                stream.hands = models.enter_context(landmark_model(stream.source, hands_model))
+                stream.capture.start()
+            previous_signals = handle_stop_signals(self.stop_event)
+            try:
+                while not self.stop_event.is_set() and GestureController.gc_mode:
+                    self.wake.clear()
+                    live = self.schedule(pool)
+                    now = time.monotonic()
+                    if now >= next_report:
+                        print(self.report(now))
+                        next_report = now + self.report_every
+                    if not live or (deadline is not None and now >= deadline):
+                        break
+                    self.wake.wait(0.1)
+            finally:
+                restore_signals(previous_signals)
+                for stream in self.streams:
+                    stream.stop_event.set()
+                    stream.ring.close()
+                for stream in self.streams:
+                    # finish releasing every stream before reporting a failed one
+                    if stream.future is not None:
+                        try:
+                            stream.future.result()
+                        except Exception as e:
+                            errors.append(e)
+                    stream.capture.join(2.0)
+                    stream.source.release()
+                    stream.controller.preview.close()
+        if errors:
+            raise errors[0]
+        print(self.report(time.monotonic()))
+        return self.stats()
+
+    # Submit the newest frame of every idle stream; returns False once all
+    # sources are exhausted and their work has finished
+    def schedule(self, pool):
+        live = False
+        for stream in self.streams:
+            if stream.future is not None:
+                if not stream.future.done():
+                    live = True
+                    continue
+                stream.future.result()  # re-raise worker errors here
+                stream.future = None
+            packet = stream.ring.get_latest(timeout=0)
+            if packet is not None:
+                stream.future = pool.submit(stream.step, packet)
+                stream.future.add_done_callback(lambda future: self.wake.set())
+                live = True
+            elif not stream.ring.exhausted():
+                live = True
+        return live
+
+    def stats(self):
+        return {stream.name: {
+                    'frames': stream.stats.frames,
+                    'fps': round(stream.stats.fps, 1),
+                    'dropped': stream.ring.dropped,
+                    'ms_per_frame': round(1000.0 * stream.stats.busy / max(stream.stats.frames, 1), 2),
+                    'gesture': None if stream.controller.gesture is None else int(stream.controller.gesture),
+                } for stream in self.streams}
+
+    def report(self, now):
+        parts = []
+        for stream in self.streams:
+            fps = stream.stats.roll(now)
+            parts.append(f"{stream.name} {fps:.1f} fps, {stream.ring.dropped} dropped")
+        return "📊 " + " | ".join(parts)
+
+# Serve several cameras or recordings from one process:
+#   python multistream.py 0 1 station3.mp4 [--workers N] [--seconds S]
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run gesture recognition on several sources")
+    parser.add_argument('sources', nargs='+', help="camera index, video, image folder or landmark recording")
+    parser.add_argument('--workers', type=int, default=None, help="inference threads (default: cores, at most one per stream)")
+    parser.add_argument('--control', type=int, default=0, help="index of the stream driving the cursor, -1 for none")
+    parser.add_argument('--seconds', type=float, default=None, help="stop after this long")
+    args = parser.parse_args()
+
+    runner = MultiStreamRunner(args.sources, args.workers, control=args.control)
+    runner.run(args.seconds)
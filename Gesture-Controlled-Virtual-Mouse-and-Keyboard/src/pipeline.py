@@ -0,0 +1,144 @@
+import threading
+import time
+from collections import deque
+
+# Bounded ring buffer between pipeline stages.
+# Producers never block: when the ring is full the oldest entry is overwritten.
+# Consumers always take the newest entry and throw away anything older,
+# so stale frames are dropped instead of queued.
+# `listener` is an optional threading.Event set on every put and on close,
+# so one thread can wait on several rings at once.
+class FrameRing:
+    def __init__(self, capacity=2, listener=None):
+        self.capacity = capacity
+        self.items = deque(maxlen=capacity)
+        self.dropped = 0
+        self.closed = False
+        self.cond = threading.Condition()
+        self.listener = listener
+
+    def put(self, item):
+        with self.cond:
+            if len(self.items) == self.capacity:
+                self.dropped += 1
+            self.items.append(item)
+            self.cond.notify()
+        if self.listener is not None:
+            self.listener.set()
+
+    def get_latest(self, timeout=None):
+        with self.cond:
+            if not self.items and not self.closed and timeout != 0:
+                self.cond.wait(timeout)
+            if not self.items:
+                return None
+            item = self.items.pop()
+            self.dropped += len(self.items)
+            self.items.clear()
+            return item
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+        if self.listener is not None:
+            self.listener.set()
+
+    def exhausted(self):
+        with self.cond:
+            return self.closed and not self.items
+
+# One camera frame travelling through the pipeline
+class FramePacket:
+    def __init__(self, seq, timestamp, image, landmarks=None, timer=None):
+        self.seq = seq
+        self.timestamp = timestamp  # frame time reported by the source
+        self.image = image
+        self.landmarks = landmarks  # recorded model output, if the source has it
+        self.results = None
+        self.timer = timer  # metrics.FrameTimer following the frame, if measured
+
+# Producer: reads frames as fast as the camera delivers them.
+# With `metrics` (a metrics.LoopMetrics) every packet carries a FrameTimer
+# with the capture time already charged.
+class CaptureStage(threading.Thread):
+    def __init__(self, cap, ring, stop_event, metrics=None):
+        super().__init__(name="capture", daemon=True)
+        self.cap = cap
+        self.ring = ring
+        self.stop_event = stop_event
+        self.metrics = metrics
+
+    def run(self):
+        seq = 0
+        try:
+            while not self.stop_event.is_set() and self.cap.isOpened():
+                timer = self.metrics.timer() if self.metrics is not None else None
+                success, image = self.cap.read()
+                if not success:
+                    print("Ignoring empty camera frame.")
+                    continue
+                seq += 1
+                timestamp = getattr(self.cap, 'timestamp', None)
+                if timestamp is None:
+                    timestamp = time.monotonic()
+                if timer is not None:
+                    timer.mark('capture')
+                    timer.captured = time.monotonic()
+                self.ring.put(FramePacket(seq, timestamp, image, getattr(self.cap, 'landmarks', None), timer))
+        finally:
+            self.ring.close()
+
+# Worker: runs the model on the newest captured frame only
+class InferenceStage(threading.Thread):
+    def __init__(self, in_ring, out_ring, process, stop_event):
+        super().__init__(name="inference", daemon=True)
+        self.in_ring = in_ring
+        self.out_ring = out_ring
+        self.process = process
+        self.stop_event = stop_event
+
+    def run(self):
+        try:
+            while not self.stop_event.is_set():
+                packet = self.in_ring.get_latest(timeout=0.5)
+                if packet is None:
+                    if self.in_ring.exhausted():
+                        break
+                    continue
+                packet.results = self.process(packet)
+                self.out_ring.put(packet)
+        finally:
+            self.out_ring.close()
+
+# Capture -> inference -> action/render pipeline.
+# The capture and inference stages run on their own threads; the caller
+# pulls finished packets with get() and runs the action/render stage itself
+# (cv2.imshow has to stay on the calling thread).
+class FramePipeline:
+    def __init__(self, cap, process, capacity=2, metrics=None):
+        self.stop_event = threading.Event()
+        self.captured = FrameRing(capacity)
+        self.inferred = FrameRing(capacity)
+        self.capture = CaptureStage(cap, self.captured, self.stop_event, metrics)
+        self.inference = InferenceStage(self.captured, self.inferred, process, self.stop_event)
+
+    def start(self):
+        self.capture.start()
+        self.inference.start()
+
+    def get(self, timeout=None):
+        return self.inferred.get_latest(timeout)
+
+    def finished(self):
+        return self.inferred.exhausted()
+
+    def dropped(self):
+        return self.captured.dropped + self.inferred.dropped
+
+    def stop(self, timeout=2.0):
+        self.stop_event.set()
+        self.captured.close()
+        self.inferred.close()
+        self.capture.join(timeout)
+        self.inference.join(timeout)
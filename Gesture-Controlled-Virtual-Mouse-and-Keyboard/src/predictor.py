@@ -0,0 +1,127 @@
+import mmap
+import os
+import struct
+import sys
+import numpy as np
+
+DICTIONARY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dictionary')
+MAGIC = b'GVEDICT1'
+
+# Packed dictionary file, little-endian:
+#   magic "GVEDICT1" | uint32 count | uint32 offsets[count + 1] |
+#   uint32 freqs[count] | UTF-8 words, sorted and concatenated
+# Word i is blob[offsets[i]:offsets[i + 1]]. Sorted order puts every word
+# sharing a prefix in one contiguous run, so a prefix is two binary searches
+# and the file is used straight from the page cache, never parsed.
+def build_dictionary(txt_path, bin_path):
+    freqs = {}
+    with open(txt_path, encoding='utf-8') as f:
+        for line in f:
+            parts = line.split()
+            if not parts:
+                continue
+            word = parts[0].lower()
+            freq = int(parts[1]) if len(parts) > 1 else 1
+            freqs[word] = max(freq, freqs.get(word, 0))
+
+    words = sorted(w.encode('utf-8') for w in freqs)
+    offsets = np.zeros(len(words) + 1, '<u4')
+    offsets[1:] = np.cumsum([len(w) for w in words])
+    counts = np.array([freqs[w.decode('utf-8')] for w in words], '<u4')
+    tmp_path = bin_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC + struct.pack('<I', len(words)))
+        f.write(offsets.tobytes())
+        f.write(counts.tobytes())
+        f.write(b''.join(words))
+    os.replace(tmp_path, bin_path)
+    return len(words)
+
+# Top-k word completion over a memory-mapped packed dictionary.
+# complete() is a binary search for the run of words starting with the
+# prefix and an argpartition over their frequencies: a few microseconds
+# for the bundled list and well under a millisecond for 100k+ words.
+class WordPredictor:
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.map[:8] != MAGIC:
+            raise ValueError(f"{path} is not a packed dictionary")
+        self.count = struct.unpack_from('<I', self.map, 8)[0]
+        start = 12
+        self.offsets = np.frombuffer(self.map, '<u4', self.count + 1, start)
+        self.freqs = np.frombuffer(self.map, '<u4', self.count, start + 4*(self.count + 1))
+        self.blob = start + 8*self.count + 4
+
+    def __len__(self):
+        return self.count
+
+    def word(self, idx):
+        return self.map[self.blob + self.offsets[idx]:self.blob + self.offsets[idx + 1]]
+
+    # Index of the first word >= key
+    def lower_bound(self, key):
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.word(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    # Index range [lo, hi) of the words starting with `prefix`
+    def prefix_range(self, prefix):
+        key = prefix.lower().encode('utf-8')
+        lo = self.lower_bound(key)
+        hi = self.lower_bound(key + b'\xff')  # no UTF-8 byte is 0xff
+        return lo, hi
+
+    # The k most frequent words starting with `prefix`, most frequent first
+    def complete(self, prefix, k=3):
+        if not prefix or k <= 0:
+            return []
+        lo, hi = self.prefix_range(prefix)
+        if lo >= hi:
+            return []
+        freqs = self.freqs[lo:hi]
+        if hi - lo > k:
+            top = np.argpartition(freqs, -k)[-k:]
+        else:
+            top = np.arange(hi - lo)
+        top = top[np.argsort(-freqs[top], kind='stable')]
+        return [self.word(lo + int(i)).decode('utf-8') for i in top]
+
+    def close(self):
+        # drop the array views first, an mmap with exported buffers can't close
+        self.offsets = self.freqs = None
+        self.map.close()
+        self.file.close()
+
+# Predictor for a word list ("word frequency" per line) or a packed file.
+# A word list is packed next to itself on first use and repacked when it
+# changes; if its folder is read-only the packed copy goes to the temp dir.
+def load_predictor(path=None):
+    path = path or os.path.join(DICTIONARY_DIR, 'words.txt')
+    if path.endswith('.bin'):
+        return WordPredictor(path)
+    bin_path = os.path.splitext(path)[0] + '.bin'
+    try:
+        if not os.path.exists(bin_path) or os.path.getmtime(bin_path) < os.path.getmtime(path):
+            build_dictionary(path, bin_path)
+    except OSError:
+        import tempfile
+        bin_path = os.path.join(tempfile.gettempdir(), 'gve-' + os.path.basename(bin_path))
+        build_dictionary(path, bin_path)
+    return WordPredictor(bin_path)
+
+# Pack a larger word list:    python predictor.py build words.txt words.bin
+# Try completions:            python predictor.py complete th [words.txt]
+if __name__ == "__main__":
+    if len(sys.argv) >= 4 and sys.argv[1] == 'build':
+        print(f"📖 {build_dictionary(sys.argv[2], sys.argv[3])} words packed into {sys.argv[3]}")
+    elif len(sys.argv) >= 3 and sys.argv[1] == 'complete':
+        predictor = load_predictor(sys.argv[3] if len(sys.argv) > 3 else None)
+        print(predictor.complete(sys.argv[2], 5))
+    else:
+        print("usage: predictor.py build WORDS.txt WORDS.bin | complete PREFIX [WORDS.txt]")
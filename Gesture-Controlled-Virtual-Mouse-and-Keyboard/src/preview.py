@@ -0,0 +1,162 @@
+import os
+import signal
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import cv2
+
+# Debug output for the vision loops.
+#   window      cv2.imshow every frame (the old behaviour)
+#   window/N    cv2.imshow every Nth frame
+#   headless    no drawing and no GUI calls at all
+#   mjpeg[:PORT][/N]  every Nth frame as MJPEG on http://127.0.0.1:PORT/
+# Loops ask due() once per frame and only draw overlays when it says so.
+class Preview:
+    def __init__(self, window_name, mode='window', every=1, port=8090, quit_keys=()):
+        self.window_name = window_name
+        self.mode = mode
+        self.every = max(1, every)
+        self.port = port
+        self.quit_keys = quit_keys
+        self.frame_index = -1
+        self.showing = False
+        self.server = None
+        self.opened = set()
+        if mode == 'mjpeg':
+            self.server = MjpegServer(port)
+            self.server.start()
+            print(f"📡 Preview at http://127.0.0.1:{port}/")
+
+    @property
+    def headless(self):
+        return self.mode == 'headless'
+
+    # Call once per frame: True when this frame will be shown
+    def due(self):
+        self.frame_index += 1
+        if self.mode == 'headless':
+            self.showing = False
+        elif self.mode == 'mjpeg':
+            self.showing = self.frame_index % self.every == 0 and self.server.has_clients()
+        else:
+            self.showing = self.frame_index % self.every == 0
+        return self.showing
+
+    # Show a frame that due() approved. Returns True when a quit key was pressed.
+    def show(self, image, name=None):
+        if not self.showing:
+            return False
+        if self.mode == 'mjpeg':
+            if name is None:
+                self.server.publish(image)
+            return False
+        name = name or self.window_name
+        self.opened.add(name)
+        cv2.imshow(name, image)
+        if name != self.window_name:
+            return False
+        key = cv2.waitKey(1) & 0xFF
+        return key in self.quit_keys
+
+    def close(self):
+        if self.server is not None:
+            self.server.stop()
+            self.server = None
+        if self.opened:
+            cv2.destroyAllWindows()
+            self.opened.clear()
+
+# Build a Preview from a spec string (see Preview); None reads GVE_PREVIEW
+# and falls back to a window on every frame
+def make_preview(spec, window_name, quit_keys=()):
+    if isinstance(spec, Preview):
+        return spec
+    spec = spec or os.environ.get('GVE_PREVIEW') or 'window'
+    mode, _, every = spec.partition('/')
+    mode, _, port = mode.partition(':')
+    if mode not in ('window', 'headless', 'mjpeg'):
+        raise ValueError(f"Unknown preview mode: {spec}")
+    return Preview(window_name, mode, int(every or 1), int(port or 8090), quit_keys)
+
+# Serves the latest published frame as a multipart MJPEG stream on localhost
+class MjpegServer:
+    def __init__(self, port, quality=70):
+        self.port = port
+        self.quality = quality
+        self.jpeg = None
+        self.seq = 0
+        self.clients = 0
+        self.cond = threading.Condition()
+        self.running = False
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                self.send_response(200)
+                self.send_header('Content-Type', 'multipart/x-mixed-replace; boundary=frame')
+                self.end_headers()
+                with server.cond:
+                    server.clients += 1
+                sent = 0
+                try:
+                    while server.running:
+                        with server.cond:
+                            if server.seq == sent:
+                                server.cond.wait(1.0)
+                            jpeg, seq = server.jpeg, server.seq
+                        if jpeg is None or seq == sent:
+                            continue
+                        sent = seq
+                        self.wfile.write(b'--frame\r\nContent-Type: image/jpeg\r\n\r\n' + jpeg + b'\r\n')
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                finally:
+                    with server.cond:
+                        server.clients -= 1
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="preview-mjpeg", daemon=True)
+
+    def start(self):
+        self.running = True
+        self.thread.start()
+
+    def has_clients(self):
+        return self.clients > 0
+
+    def publish(self, image):
+        ok, jpeg = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        if not ok:
+            return
+        with self.cond:
+            self.jpeg = jpeg.tobytes()
+            self.seq += 1
+            self.cond.notify_all()
+
+    def stop(self):
+        self.running = False
+        with self.cond:
+            self.cond.notify_all()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+# Set `stop_event` on SIGINT/SIGTERM and return the previous handlers for
+# restore_signals(). Signal handlers can only be installed from the main
+# thread; loops started on other threads rely on the event alone.
+def handle_stop_signals(stop_event):
+    def handler(signum, frame):
+        stop_event.set()
+    previous = {}
+    try:
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            previous[signum] = signal.signal(signum, handler)
+    except ValueError:
+        pass
+    return previous
+
+def restore_signals(previous):
+    for signum, handler in previous.items():
+        signal.signal(signum, handler)
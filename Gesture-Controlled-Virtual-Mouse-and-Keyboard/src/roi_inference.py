@@ -0,0 +1,173 @@
+import cv2
+
+# A MediaPipe landmark model as two graphs: `detect` in static image mode
+# for whole frames, `track` in video mode for the stream it follows.
+# factory(static_image_mode) makes one graph; tracking=False uses the static
+# graph for both (for a model that only runs now and then).
+# A video-mode graph keeps its tracking ROI in the coordinates of its last
+# input, so RoiInference resets it whenever the next input is not the next
+# frame through the same crop.
+class LandmarkModels:
+    def __init__(self, factory, tracking=True):
+        self.detect = factory(True)
+        self.track = factory(False) if tracking else self.detect
+        self.tracking = tracking
+        self.frame = None   # frame index and region of the last tracked input
+        self.region = None
+
+    def follow(self, frame, region):
+        if self.tracking and self.frame is not None and (frame != self.frame + 1 or region != self.region):
+            self.track.reset()
+        self.frame, self.region = frame, region
+
+    def close(self):
+        self.detect.close()
+        if self.track is not self.detect:
+            self.track.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# Runs a MediaPipe landmark model (LandmarkModels) on as few pixels as
+# possible. With nothing tracked the whole frame is downscaled to
+# `detect_width` for detection. Once landmarks are found, later frames only
+# send a square crop around them (grown by `margin` on each side,
+# downscaled to at most `track_size`) and the landmarks are mapped back to
+# full-frame coordinates, so callers never see the difference. The crop
+# stays where it is while the landmarks keep `margin` / 2 of their size
+# clear of its edges, so the tracking graph sees one geometry for as long
+# as possible. If the crop loses the target the same frame is retried at
+# detection size.
+# While fewer than `max_targets` are tracked (e.g. one of two hands), the
+# full frame is also searched every `detect_every` frames, so a target
+# entering outside the crop is still found; when that search finds more
+# targets than the crop, its results are used and the next crop covers
+# them all. Detection and search go through the static graph, never the
+# tracking one.
+# Input frames are BGR; only the small model input is converted to RGB, so
+# the frame itself can be drawn on and shown without converting it back.
+# Pass a metrics.FrameTimer to process() to split the time into 'colour'
+# (crop, resize, BGR->RGB) and 'inference' (the model).
+class RoiInference:
+    def __init__(self, field='multi_hand_landmarks', detect_width=320, track_size=256, margin=0.35, enabled=True,
+                 max_targets=1, detect_every=5):
+        self.field = field  # results attribute holding the landmark lists
+        self.max_targets = max_targets
+        self.detect_every = detect_every
+        self.since_detect = 0  # frames tracked since the last full-frame search
+        self.detect_width = detect_width
+        self.track_size = track_size
+        self.margin = margin
+        self.enabled = enabled
+        self.box = None  # (x0, y0, x1, y1) around the last landmarks, in frame pixels
+        self.region = None  # crop being tracked through
+        self.frame_index = -1
+        self.counts = {'detect': 0, 'track': 0, 'lost': 0, 'search': 0}
+
+    def reset(self):
+        self.box = None
+        self.region = None
+        self.since_detect = 0
+
+    def process(self, models, image, timer=None):
+        self.frame_index += 1
+        h, w = image.shape[:2]
+        if not self.enabled:
+            return self.track(models, image, None, timer)
+        if self.box is not None:
+            region = self.region if self.region is not None and self.holds(self.region, w, h) \
+                else self.crop_region(w, h)
+            results = self.track(models, image, region, timer)
+            found = getattr(results, self.field)
+            if found:
+                self.counts['track'] += 1
+                self.since_detect += 1
+                self.region = region
+                if region is not None and len(found) < self.max_targets and self.since_detect >= self.detect_every:
+                    # look for the missing targets outside the crop
+                    self.counts['search'] += 1
+                    self.since_detect = 0
+                    full = self.run(models.detect, image, None, timer)
+                    if len(getattr(full, self.field) or []) > len(found):
+                        results = full
+                        self.region = None
+                self.update_box(results, w, h)
+                return results
+            self.counts['lost'] += 1
+
+        self.counts['detect'] += 1
+        self.since_detect = 0
+        self.region = None
+        results = self.run(models.detect, image, None, timer)
+        if getattr(results, self.field):
+            self.update_box(results, w, h)
+        else:
+            self.box = None
+        return results
+
+    # The tracking graph on `region` (None: the whole downscaled frame)
+    def track(self, models, image, region, timer):
+        models.follow(self.frame_index, region)
+        return self.run(models.track, image, region, timer)
+
+    # Whether the last box still sits well inside `region`; edges on the
+    # frame border need no clearance
+    def holds(self, region, w, h):
+        x0, y0, x1, y1 = self.box
+        left, top, right, bottom = region
+        pad = self.margin / 2 * max(x1 - x0, y1 - y0)
+        if right - left > 2 * (1 + 2*self.margin) * max(x1 - x0, y1 - y0, 16):
+            return False  # the targets shrank (moved away): crop closer
+        return (left == 0 or x0 - left >= pad) and (top == 0 or y0 - top >= pad) and \
+            (right == w or right - x1 >= pad) and (bottom == h or bottom - y1 >= pad)
+
+    # Square region around the last box, kept inside the frame; None when
+    # the targets are too far apart for a square crop to hold them
+    def crop_region(self, w, h):
+        x0, y0, x1, y1 = self.box
+        if max(x1 - x0, y1 - y0) > min(w, h):
+            return None
+        side = max(x1 - x0, y1 - y0) * (1 + 2*self.margin)
+        side = int(min(max(side, 32), w, h))
+        cx, cy = (x0 + x1) / 2, (y0 + y1) / 2
+        left = int(min(max(cx - side/2, 0), w - side))
+        top = int(min(max(cy - side/2, 0), h - side))
+        return left, top, left + side, top + side
+
+    def run(self, model, image, region, timer=None):
+        h, w = image.shape[:2]
+        x0, y0, x1, y1 = region if region is not None else (0, 0, w, h)
+        crop = image[y0:y1, x0:x1]
+        cw, ch = x1 - x0, y1 - y0
+
+        limit = self.track_size if region is not None else self.detect_width
+        if self.enabled and limit and max(cw, ch) > limit:
+            scale = limit / float(cw if region is None else max(cw, ch))
+            crop = cv2.resize(crop, (max(1, round(cw*scale)), max(1, round(ch*scale))), interpolation=cv2.INTER_AREA)
+
+        rgb = cv2.cvtColor(crop, cv2.COLOR_BGR2RGB)
+        rgb.flags.writeable = False
+        if timer is not None:
+            timer.mark('colour')
+        results = model.process(rgb)
+        if timer is not None:
+            timer.mark('inference')
+
+        if region is not None:
+            for landmark_list in getattr(results, self.field) or []:
+                for lm in landmark_list.landmark:
+                    lm.x = (x0 + lm.x*cw) / w
+                    lm.y = (y0 + lm.y*ch) / h
+                    lm.z = lm.z*cw / w
+        return results
+
+    def update_box(self, results, w, h):
+        xs, ys = [], []
+        for landmark_list in getattr(results, self.field):
+            for lm in landmark_list.landmark:
+                xs.append(lm.x)
+                ys.append(lm.y)
+        self.box = (min(xs)*w, min(ys)*h, max(xs)*w, max(ys)*h)
@@ -4,157 +4,311 @@ from cvzone.HandTrackingModule import HandDetector
 from time import sleep
 import numpy as np
 from pynput.keyboard import Controller
+import sys
+import threading
+import time
+from frame_source import CameraSource
+from keyboard_layout import Button, load_layout
+from preview import make_preview, handle_stop_signals, restore_signals
+from metrics import loop_metrics
+from predictor import load_predictor
+from swipe import load_decoder, save_trace
+from timing import Cooldown
 
-class Button():
-    def __init__(self, pos, text, size=[85, 85]):
-        self.pos = pos
-        self.size = size
-        self.text = text
+# Convert recorded landmarks to the hand dicts cvzone's findHands returns
+def replay_hands(results, img):
+    h, w = img.shape[:2]
+    hands = []
+    for hand_landmarks in (results.multi_hand_landmarks or [])[:1]:
+        lmList = [[int(lm.x * w), int(lm.y * h), int(lm.z * w)] for lm in hand_landmarks.landmark]
+        hands.append({'lmList': lmList})
+    return hands
 
-def vk_keyboard():
-    cap = cv2.VideoCapture(0)
-    cap.set(3, 1280)
-    cap.set(4, 720)
+KEY_COLOUR = (255, 144, 30)
+HOVER_COLOUR = (0, 255, 255)
+PRESS_COLOUR = (0, 255, 0)
+INSTRUCTIONS = [
+    "Bring index & middle fingers VERY close to click",
+    "Distance < 30px required for click",
+    "Press ESC or Q to close",
+]
+SUGGESTIONS = 3  # word completions offered above the text area
+
+def draw_key(img, button, colour):
+    x, y = button.pos
+    w, h = button.size
+    cv2.rectangle(img, (x, y), (x + w, y + h), colour, cv2.FILLED)
+    cv2.putText(img, button.text, (x + 15, y + h - 25), 
+               cv2.FONT_HERSHEY_PLAIN, 3, (0, 0, 0), 3)
+
+# The last, partly typed word of `text` ('' right after a space or enter)
+def current_word(text):
+    return '' if not text or text[-1].isspace() else text.split()[-1]
+
+# The static part of the keyboard screen (keys, text box, instructions) is
+# rendered once per frame size into a BGRA image and laid over each frame
+# with one vectorized blend over its bounding box. Only the hovered and
+# pressed keys, the suggestions and the typed text are drawn per frame.
+class KeyboardOverlay:
+    def __init__(self, layout, opacity=1.0, suggestions=SUGGESTIONS):
+        self.layout = layout
+        self.opacity = opacity
+        # suggestion keys in a bar under the keyboard, the text area below it
+        left = min((k.pos[0] for k in layout.keys), default=25)
+        gap = 15
+        width = (layout.width - left - gap*(suggestions - 1)) // max(suggestions, 1)
+        top = layout.height + 15
+        self.suggestion_keys = [Button([left + i*(width + gap), top], "", [width, 70])
+                                for i in range(suggestions)]
+        self.text_top = top + 85
+        self.shape = None
+        self.bgra = None
+        self.box = None
+
+    def render(self, shape):
+        h, w = shape[:2]
+        top = self.text_top
+        if self.layout.width + 25 > w or top + 82 > h:
+            raise ValueError(f"{self.layout.name} keyboard needs a {self.layout.width + 25}x{top + 82} "
+                             f"frame, the camera gives {w}x{h}")
+        canvas = np.zeros((h, w, 3), np.uint8)
+        solid = np.zeros((h, w), np.uint8)  # opaque boxes; elsewhere only drawn strokes show
+        for button in self.layout.keys:
+            x, y = button.pos
+            bw, bh = button.size
+            # Draw key with rounded corners
+            cvzone.cornerRect(canvas, (x, y, bw, bh), 20, rt=0)
+            draw_key(canvas, button, KEY_COLOUR)
+            cv2.rectangle(solid, (x, y), (x + bw, y + bh), 255, cv2.FILLED)
+
+        # Text area across the frame, the instructions in the space under it
+        # (moved up towards the box on short frames; lines that still do not
+        # fit are left out)
+        right = w - 30
+        cv2.rectangle(canvas, (25, top), (right, top + 80), (255, 255, 255), cv2.FILLED)
+        cv2.rectangle(canvas, (25, top), (right, top + 80), (0, 0, 0), 2)
+        cv2.rectangle(solid, (24, top - 1), (right + 1, top + 81), 255, cv2.FILLED)
+        first = max(min(top + 110, h - 10 - 25*(len(INSTRUCTIONS) - 1)), top + 105)
+        for idx, line in enumerate(INSTRUCTIONS):
+            if first + 25*idx < h - 5:
+                cv2.putText(canvas, line, (25, first + 25*idx), 
+                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+
+        opaque = (solid > 0) | canvas.any(axis=2)
+        alpha = np.where(opaque, int(255 * self.opacity), 0).astype(np.uint8)
+        self.bgra = np.dstack([canvas, alpha])
+        ys, xs = np.nonzero(opaque)
+        self.box = (0, 0, 0, 0) if len(xs) == 0 else (xs.min(), ys.min(), xs.max() + 1, ys.max() + 1)
+        self.shape = shape[:2]
+
+    def blend(self, img):
+        if self.shape != img.shape[:2]:
+            self.render(img.shape)
+        x0, y0, x1, y1 = self.box
+        roi = img[y0:y1, x0:x1]
+        overlay = self.bgra[y0:y1, x0:x1]
+        if self.opacity >= 1.0:
+            np.copyto(roi, overlay[..., :3], where=overlay[..., 3:] > 0)
+        else:
+            a = overlay[..., 3:].astype(np.uint16)
+            roi[:] = ((overlay[..., :3] * a + roi * (255 - a) + 127) // 255).astype(np.uint8)
+        return img
+
+    def draw_text(self, img, text):
+        cv2.putText(img, text, (30, self.text_top + 55), cv2.FONT_HERSHEY_PLAIN, 2, (0, 0, 0), 2)
+
+    # Show `words` on the suggestion keys; empty keys are hidden and inert
+    def set_suggestions(self, words):
+        for idx, button in enumerate(self.suggestion_keys):
+            button.text = words[idx].upper() if idx < len(words) else ""
+
+    def suggestion_at(self, x, y):
+        for button in self.suggestion_keys:
+            bx, by = button.pos
+            bw, bh = button.size
+            if button.text and bx < x < bx + bw and by < y < by + bh:
+                return button
+        return None
+
+    def draw_suggestions(self, img):
+        for button in self.suggestion_keys:
+            if button.text:
+                draw_key(img, button, KEY_COLOUR)
+
+# Type `button` (a key or a suggestion) and return the updated text
+def press_key(keyboard, button, text, overlay):
+    if button in overlay.suggestion_keys:
+        # finish the word and add a space
+        suffix = button.text[len(current_word(text)):] + " "
+        keyboard.type(suffix)
+        text += suffix
+        print(f"📝 Word completed: {button.text}")
+    elif button.text == "SPACE":
+        keyboard.press(' ')
+        text += " "
+        print("📝 Space added")
+    elif button.text == "BACK":
+        if text:
+            text = text[:-1]
+            keyboard.press('\b')
+            print("📝 Backspace pressed")
+    elif button.text == "CLEAR":
+        text = ""
+        # Clear multiple characters
+        for _ in range(50):
+            keyboard.press('\b')
+        print("📝 Text cleared")
+    elif button.text == "ENTER":
+        keyboard.press('\n')
+        text += "\n"
+        print("📝 Enter pressed")
+    else:
+        keyboard.press(button.text)
+        text += button.text
+        print(f"📝 Key pressed: {button.text}")
+    return text
+
+# source: any frame_source.FrameSource; defaults to the live camera at 1280x720
+# preview: preview.make_preview spec, e.g. 'window', 'headless', 'mjpeg/5'
+# stop_event: threading.Event that ends the loop when set (SIGINT/SIGTERM set it too)
+# layout: keyboard_layout name ('qwerty', 'qwerty_numbers') or path to a layout JSON
+# dictionary: word list for the suggestion keys (predictor.load_predictor), default the bundled one
+# swipe: swipe typing; hold index & middle together and trace the word, release to type it.
+#        A short trace is a tap on the key where it started.
+# swipe_log: file object that decoded swipes are appended to as swipe.py traces
+# metrics: metrics.LoopMetrics for the stage timings, 'keyboard' by default
+def vk_keyboard(source=None, preview=None, stop_event=None, layout='qwerty', dictionary=None,
+                swipe=False, swipe_log=None, metrics=None):
+    cap = source if source is not None else CameraSource(0, width=1280, height=720)
+    preview = make_preview(preview, "Virtual Keyboard", quit_keys=(27, ord('q'), ord('Q')))
+    stop_event = stop_event or threading.Event()
+    metrics = metrics or loop_metrics('keyboard')
     
     # Increase detection confidence for better accuracy
     detector = HandDetector(detectionCon=0.8, maxHands=1)
     
-    keyboard_keys = [
-        ["Q", "W", "E", "R", "T", "Y", "U", "I", "O", "P"],
-        ["A", "S", "D", "F", "G", "H", "J", "K", "L", ";"],
-        ["Z", "X", "C", "V", "B", "N", "M", ",", ".", "/"],
-        ["SPACE", "BACK", "CLEAR", "ENTER"]
-    ]
+    layout = load_layout(layout) if isinstance(layout, str) else layout
+    overlay = KeyboardOverlay(layout)
+    predictor = load_predictor(dictionary)
+    decoder = load_decoder(layout, dictionary) if swipe else None
+    swipe_points, swipe_times = [], []
     
     final_text = ""
+    suggested_for = None  # word the suggestion keys were computed for
     keyboard = Controller()
     last_key_pressed = None
-    click_cooldown = 0
-
-    def draw(img, buttonList):
-        for button in buttonList:
-            x, y = button.pos
-            w, h = button.size
-            
-            # Draw key with rounded corners
-            cvzone.cornerRect(img, (x, y, w, h), 20, rt=0)
-            cv2.rectangle(img, (x, y), (x + w, y + h), (255, 144, 30), cv2.FILLED)
-            cv2.putText(img, button.text, (x + 15, y + 60), 
-                       cv2.FONT_HERSHEY_PLAIN, 3, (0, 0, 0), 3)
-        return img
-
-    # Create button list
-    buttonList = []
-    for k in range(len(keyboard_keys)):
-        for x, key in enumerate(keyboard_keys[k]):
-            if k == 3:  # Bottom row special keys
-                if key == "SPACE":
-                    buttonList.append(Button([100 * x + 25, 100 * k + 50], key, [300, 85]))
-                elif key == "BACK":
-                    buttonList.append(Button([100 * x + 25, 100 * k + 50], key, [200, 85]))
-                elif key == "CLEAR":
-                    buttonList.append(Button([100 * x + 25, 100 * k + 50], key, [200, 85]))
-                elif key == "ENTER":
-                    buttonList.append(Button([100 * x + 25, 100 * k + 50], key, [200, 85]))
-            else:
-                buttonList.append(Button([100 * x + 25, 100 * k + 50], key))
+    click_cooldown = Cooldown(0.5)  # seconds between presses (was 15 frames)
 
     print("🎹 Virtual Keyboard Started - Press 'ESC' or 'q' to close")
-    
-    while True:
-        success, img = cap.read()
-        if not success:
-            continue
+    previous_signals = handle_stop_signals(stop_event)
+    try:
+        while cap.isOpened() and not stop_event.is_set():
+            timer = metrics.timer()
+            success, img = cap.read()
+            if not success:
+                continue
+            timer.mark('capture')
+            timer.captured = time.monotonic()
             
-        img = cv2.flip(img, 1)
-        hands, img = detector.findHands(img, flipType=False)
-        
-        # Draw keyboard
-        img = draw(img, buttonList)
+            img = cv2.flip(img, 1)
+            show = preview.due()
+            if cap.landmarks is not None:
+                hands = replay_hands(cap.landmarks, img)
+            else:
+                # cvzone converts and runs the model in one call, so colour
+                # conversion is included in 'inference' here
+                hands, img = detector.findHands(img, draw=show, flipType=False)
+            timer.mark('inference')
         
-        # Update cooldown
-        if click_cooldown > 0:
-            click_cooldown -= 1
+            # Completions only change when the word being typed does
+            word = current_word(final_text)
+            if word != suggested_for:
+                overlay.set_suggestions(predictor.complete(word, len(overlay.suggestion_keys)))
+                suggested_for = word
         
-        if hands:
-            lmList = hands[0]['lmList']
+            pinched = False
+            hover = pressing = fingers = None  # key under the finger / key being clicked
+            to_press, to_type = None, None  # what this frame sends
+            if hands:
+                lmList = hands[0]['lmList']
             
-            if lmList:
-                for button in buttonList:
-                    x, y = button.pos
-                    w, h = button.size
-                    
-                    # Check if index finger tip is over button
-                    if x < lmList[8][0] < x + w and y < lmList[8][1] < y + h:
-                        # Highlight hover
-                        cv2.rectangle(img, (x, y), (x + w, y + h), (0, 255, 255), cv2.FILLED)
-                        cv2.putText(img, button.text, (x + 15, y + 60), 
-                                   cv2.FONT_HERSHEY_PLAIN, 3, (0, 0, 0), 3)
-                        
-                        # Check distance between index and middle finger for click
-                        length, info, img = detector.findDistance(lmList[8][:2], lmList[12][:2], img)
-                        
-                        # More strict distance threshold to prevent accidental clicks
-                        if length < 30 and click_cooldown == 0:  # Reduced from 40 to 30
-                            cv2.rectangle(img, (x, y), (x + w, y + h), (0, 255, 0), cv2.FILLED)
-                            cv2.putText(img, button.text, (x + 15, y + 60), 
-                                       cv2.FONT_HERSHEY_PLAIN, 3, (0, 0, 0), 3)
-                            
-                            # Prevent multiple presses for same key
-                            if last_key_pressed != button.text:
-                                last_key_pressed = button.text
-                                click_cooldown = 15  # Add cooldown
-                                
-                                if button.text == "SPACE":
-                                    keyboard.press(' ')
-                                    final_text += " "
-                                    print("📝 Space added")
-                                elif button.text == "BACK":
-                                    if final_text:
-                                        final_text = final_text[:-1]
-                                        keyboard.press('\b')
-                                        print("📝 Backspace pressed")
-                                elif button.text == "CLEAR":
-                                    final_text = ""
-                                    # Clear multiple characters
-                                    for _ in range(50):
-                                        keyboard.press('\b')
-                                    print("📝 Text cleared")
-                                elif button.text == "ENTER":
-                                    keyboard.press('\n')
-                                    final_text += "\n"
-                                    print("📝 Enter pressed")
-                                else:
-                                    keyboard.press(button.text)
-                                    final_text += button.text
-                                    print(f"📝 Key pressed: {button.text}")
-        
-        # Display text area
-        cv2.rectangle(img, (25, 400), (1250, 500), (255, 255, 255), cv2.FILLED)
-        cv2.rectangle(img, (25, 400), (1250, 500), (0, 0, 0), 2)
+                if lmList:
+                    x, y = lmList[8][0], lmList[8][1]
+                    hover = overlay.suggestion_at(x, y) or layout.key_at(x, y)
+                
+                    # Check distance between index and middle finger for click
+                    fingers = (lmList[8][:2], lmList[12][:2])
+                    length, info = detector.findDistance(*fingers)
+                    # More strict distance threshold to prevent accidental clicks
+                    pinched = length < 30  # Reduced from 40 to 30
+                
+                    if decoder is not None:
+                        # Swipe mode: the path is traced while the fingers are together
+                        if pinched:
+                            swipe_points.append((x, y))
+                            swipe_times.append(cap.timestamp)
+                    elif hover is not None and pinched and click_cooldown.ready(cap.timestamp):
+                        pressing = hover
+                        # Prevent multiple presses for same key
+                        if last_key_pressed != hover.text:
+                            last_key_pressed = hover.text
+                            click_cooldown.trigger(now=cap.timestamp)
+                            to_press = hover
         
-        # Display text with proper formatting
-        display_text = final_text[-40:]  # Show last 40 characters
-        cv2.putText(img, display_text, (30, 470), cv2.FONT_HERSHEY_PLAIN, 2, (0, 0, 0), 2)
+            # Swipe released (or hand lost): a long path is a word, a short one a tap
+            swiped = None
+            if decoder is not None and swipe_points and not pinched:
+                if decoder.is_swipe(swipe_points):
+                    candidates = decoder.decode(swipe_points)
+                    if candidates:
+                        to_type = candidates[0][0].upper()
+                        others = ", ".join(w for w, _ in candidates[1:])
+                        swiped = (swipe_times, swipe_points)
+                else:
+                    to_press = overlay.suggestion_at(*swipe_points[0]) or layout.key_at(*swipe_points[0])
+                swipe_points, swipe_times = [], []
+            timer.mark('gesture')
         
-        # Add instructions
-        cv2.putText(img, "Bring index & middle fingers VERY close to click", (25, 550), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-        cv2.putText(img, "Distance < 30px required for click", (25, 580), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-        cv2.putText(img, "Press ESC or Q to close", (25, 610), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+            if to_press is not None:
+                final_text = press_key(keyboard, to_press, final_text, overlay)
+                timer.acted()
+            if to_type is not None:
+                keyboard.type(to_type + " ")
+                timer.acted()
+                final_text += to_type + " "
+                print(f"📝 Swiped: {to_type}" + (f" (or {others})" if others else ""))
+                if swipe_log is not None:
+                    save_trace(swipe_log, to_type.lower(), *swiped)
+            timer.mark('actuation')
         
-        cv2.imshow("Virtual Keyboard", img)
+            if show:
+                # Draw keyboard
+                overlay.blend(img)
+                overlay.draw_suggestions(img)
+                # Highlight hover
+                if hover is not None:
+                    draw_key(img, hover, HOVER_COLOUR)
+                if fingers is not None:
+                    length, info, img = detector.findDistance(*fingers, img)
+                if pressing is not None:
+                    draw_key(img, pressing, PRESS_COLOUR)
+                if len(swipe_points) > 1:
+                    cv2.polylines(img, [np.int32(swipe_points)], False, PRESS_COLOUR, 4)
+                # Display text with proper formatting
+                overlay.draw_text(img, final_text[-40:])  # Show last 40 characters
         
-        # Close with ESC or Q
-        key = cv2.waitKey(1)
-        if key == 27 or key == ord('q') or key == ord('Q'):
-            break
-            
-    cap.release()
-    cv2.destroyAllWindows()
+            # Close with ESC or Q
+            closed = preview.show(img)
+            timer.mark('render')
+            timer.done()
+            if closed:
+                break
+    finally:
+        restore_signals(previous_signals)
+        predictor.close()
+        cap.release()
+        preview.close()
     print("🎹 Virtual Keyboard Closed")
 
 if __name__ == "__main__":
-    vk_keyboard()
\ No newline at end of file
+    vk_keyboard(swipe='--swipe' in sys.argv[1:])
\ No newline at end of file
@@ -0,0 +1,303 @@
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+from voice_stream import put_latest
+
+# Speech recognizer backends for Proton, chosen with PROTON_ASR:
+#   google             Google Web Speech through speech_recognition (online)
+#   vosk[:MODEL_DIR]   Vosk, offline; the model is loaded once and kept warm,
+#                      and partial results stream while the user speaks
+#                      (default model dir: PROTON_VOSK_MODEL or src/models/vosk)
+#   stub[:FILE|TEXT]   deterministic: the lines of FILE, or TEXT split on
+#                      '|', one per utterance, for tests and replays
+#
+# A backend hands out one session per utterance. feed() takes 16-bit mono
+# PCM as it arrives and returns the partial transcript so far (or None),
+# finish() returns the final transcript ("" when nothing was understood).
+# Failures to reach a service raise BackendError.
+
+class BackendError(Exception):
+    pass
+
+# Collects the audio and recognizes it in one go at the end, for engines
+# without streaming
+class BufferedSession:
+    def __init__(self, backend, sample_rate):
+        self.backend = backend
+        self.sample_rate = sample_rate
+        self.chunks = []
+
+    def feed(self, pcm):
+        self.chunks.append(pcm)
+        return None
+
+    def finish(self):
+        return self.backend.recognize(b''.join(self.chunks), self.sample_rate)
+
+class SpeechBackend:
+    name = 'base'
+
+    def session(self, sample_rate):
+        return BufferedSession(self, sample_rate)
+
+    # Whole-utterance recognition of 16-bit mono PCM
+    def recognize(self, pcm, sample_rate):
+        raise NotImplementedError
+
+class GoogleBackend(SpeechBackend):
+    name = 'google'
+
+    def __init__(self, language='en-US'):
+        import speech_recognition as sr
+        self.sr = sr
+        self.recognizer = sr.Recognizer()
+        self.language = language
+
+    def recognize(self, pcm, sample_rate):
+        audio = self.sr.AudioData(pcm, sample_rate, 2)
+        try:
+            return self.recognizer.recognize_google(audio, language=self.language).lower()
+        except self.sr.UnknownValueError:
+            return ""
+        except self.sr.RequestError as e:
+            raise BackendError(e)
+
+class VoskSession:
+    def __init__(self, model, sample_rate):
+        from vosk import KaldiRecognizer
+        self.recognizer = KaldiRecognizer(model, sample_rate)
+        self.done = []  # segments Vosk has already finalised
+
+    def text(self, partial=""):
+        return " ".join(self.done + ([partial] if partial else []))
+
+    def feed(self, pcm):
+        if self.recognizer.AcceptWaveform(pcm):
+            segment = json.loads(self.recognizer.Result()).get('text', '')
+            if segment:
+                self.done.append(segment)
+            return self.text()
+        return self.text(json.loads(self.recognizer.PartialResult()).get('partial', ''))
+
+    def finish(self):
+        return self.text(json.loads(self.recognizer.FinalResult()).get('text', ''))
+
+class VoskBackend(SpeechBackend):
+    name = 'vosk'
+
+    def __init__(self, model_path=None):
+        from vosk import Model, SetLogLevel
+        SetLogLevel(-1)
+        model_path = model_path or os.environ.get('PROTON_VOSK_MODEL') or \
+            os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models', 'vosk')
+        if not os.path.isdir(model_path):
+            raise BackendError(f"Vosk model not found at {model_path} (set PROTON_VOSK_MODEL)")
+        self.model = Model(model_path)
+
+    def session(self, sample_rate):
+        return VoskSession(self.model, sample_rate)
+
+    def recognize(self, pcm, sample_rate):
+        session = self.session(sample_rate)
+        session.feed(pcm)
+        return session.finish()
+
+# Reveals its text word by word as audio arrives, one word per
+# `seconds_per_word`, so partial results can be tested too
+class StubSession:
+    def __init__(self, text, sample_rate, seconds_per_word):
+        self.words = text.split()
+        self.bytes_per_word = max(1, int(sample_rate * seconds_per_word) * 2)
+        self.received = 0
+
+    def feed(self, pcm):
+        self.received += len(pcm)
+        return " ".join(self.words[:self.received // self.bytes_per_word]) or None
+
+    def finish(self):
+        return " ".join(self.words)
+
+class StubBackend(SpeechBackend):
+    name = 'stub'
+
+    # texts: what each utterance says, in order; once they run out (or
+    # without any) utterances are "utterance 1", "utterance 2", ...
+    def __init__(self, texts=(), seconds_per_word=0.3):
+        self.texts = [t.strip().lower() for t in texts if t.strip()]
+        self.seconds_per_word = seconds_per_word
+        self.count = 0
+
+    def next_text(self):
+        self.count += 1
+        if self.count <= len(self.texts):
+            return self.texts[self.count - 1]
+        return f"utterance {self.count}"
+
+    def session(self, sample_rate):
+        return StubSession(self.next_text(), sample_rate, self.seconds_per_word)
+
+    def recognize(self, pcm, sample_rate):
+        return self.next_text()
+
+def make_stub(arg=None):
+    if arg and os.path.isfile(arg):
+        with open(arg, encoding='utf-8') as f:
+            return StubBackend(f.readlines())
+    return StubBackend(arg.split('|') if arg else ())
+
+BACKENDS = {
+    'google': lambda arg=None: GoogleBackend(arg or 'en-US'),
+    'vosk': lambda arg=None: VoskBackend(arg),
+    'stub': make_stub,
+}
+
+# Backend from a spec like 'vosk:/path/to/model', default PROTON_ASR or google
+def make_backend(spec=None):
+    if isinstance(spec, SpeechBackend):
+        return spec
+    spec = spec or os.environ.get('PROTON_ASR', 'google')
+    name, _, arg = spec.partition(':')
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown speech backend: {name}")
+    return BACKENDS[name](arg or None)
+
+# One recognized utterance. `early` means it was taken from a partial result
+# before the utterance ended; otherwise `latency` is the seconds from the end
+# of the utterance being detected to its transcript. `heard` is when the
+# utterance started (time.monotonic()).
+class Transcript:
+    def __init__(self, text, utterance=None, early=False, error=None, heard=None):
+        self.text = text
+        self.utterance = utterance
+        self.early = early
+        self.error = error
+        self.ready = time.monotonic()
+        self.heard = self.ready if heard is None else heard
+
+    @property
+    def latency(self):
+        return None if self.utterance is None else self.ready - self.utterance.queued
+
+# Recognizer thread behind a voice_stream.VoiceListener: give the listener
+# `events=transcriber.events` and read transcripts with next_transcript().
+# Audio goes to the backend while the user is still speaking. on_partial
+# (text) sees every new partial result; early(text) may accept a partial as
+# the whole command, which skips waiting for the end of the utterance. It is
+# only asked once the partial has stayed the same for `early_after` seconds
+# of audio, so a pause between words does not cut a longer command short.
+# At most `max_pending` transcripts wait to be read; older ones are dropped.
+class Transcriber(threading.Thread):
+    def __init__(self, backend=None, on_partial=None, early=None, early_after=0.4, max_pending=4):
+        super().__init__(name="transcriber", daemon=True)
+        self.backend = make_backend(backend)
+        self.on_partial = on_partial
+        self.early = early
+        self.early_after = early_after
+        self.events = queue.Queue()
+        self.transcripts = queue.Queue(max_pending)
+        self.session = None
+        self.heard = None       # when the utterance in progress started
+        self.partial = None
+        self.stable = 0         # bytes of audio since the partial last changed
+        self.stable_bytes = 0
+        self.committed = False  # an early transcript was already sent for this utterance
+
+    # The next Transcript, or None after `timeout` seconds or once the
+    # listener has closed. With `since` (a time.monotonic() value),
+    # transcripts of utterances that started before it are skipped: speech
+    # from while nobody was listening is not an answer to the next prompt.
+    def next_transcript(self, timeout=None, since=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            try:
+                wait = None if deadline is None else max(0.0, deadline - time.monotonic())
+                transcript = self.transcripts.get(timeout=wait)
+            except queue.Empty:
+                return None
+            if transcript is None or since is None or transcript.heard >= since:
+                return transcript
+
+    def run(self):
+        while True:
+            kind, data = self.events.get()
+            if kind == 'closed':
+                put_latest(self.transcripts, None)
+                return
+            try:
+                self.handle(kind, data)
+            except BackendError as e:
+                self.session = None
+                put_latest(self.transcripts, Transcript("", data if kind == 'end' else None, error=e,
+                                                        heard=self.heard))
+            except Exception as e:
+                self.session = None
+                print(f"Speech recognition failed: {e}")
+
+    def handle(self, kind, data):
+        if kind == 'start':
+            sample_rate, pcm = data
+            self.heard = time.monotonic()
+            self.session = self.backend.session(sample_rate)
+            self.partial = None
+            self.stable = 0
+            self.stable_bytes = int(sample_rate * self.early_after) * 2
+            self.committed = False
+            self.feed(pcm)
+            return
+        if kind == 'abort':
+            self.session = None
+            return
+        if self.session is None:
+            return
+        if kind == 'audio':
+            self.feed(data)
+        elif kind == 'end':
+            session, self.session = self.session, None
+            if not self.committed:
+                put_latest(self.transcripts, Transcript(session.finish(), data, heard=self.heard))
+
+    def feed(self, pcm):
+        partial = self.session.feed(pcm)
+        if self.committed:
+            return
+        if partial and partial != self.partial:
+            self.partial = partial
+            self.stable = 0
+            if self.on_partial is not None:
+                self.on_partial(partial)
+        else:
+            self.stable += len(pcm)
+        if self.partial and self.early is not None and self.stable >= self.stable_bytes \
+                and self.early(self.partial):
+            self.committed = True
+            put_latest(self.transcripts, Transcript(self.partial, early=True, heard=self.heard))
+
+# Transcribe a recording, showing partial results as they stream:
+#   PROTON_ASR=vosk python speech_backends.py speech.wav
+#   python speech_backends.py speech.wav --asr "stub:hello proton|what time is it"
+if __name__ == "__main__":
+    from voice_stream import VoiceListener, WavSource
+
+    parser = argparse.ArgumentParser(description="Run a speech backend over a WAV file")
+    parser.add_argument('wav', help="16-bit WAV file")
+    parser.add_argument('--asr', default=None, help="backend spec (default: PROTON_ASR or google)")
+    parser.add_argument('--realtime', action='store_true', help="replay the file at its own pace")
+    args = parser.parse_args()
+
+    transcriber = Transcriber(args.asr, on_partial=lambda text: print(f"   … {text}"))
+    transcriber.start()
+    VoiceListener(WavSource(args.wav, realtime=args.realtime), events=transcriber.events).open()
+    print(f"🎤 {transcriber.backend.name}: {args.wav}")
+    while True:
+        transcript = transcriber.next_transcript()
+        if transcript is None:
+            break
+        if transcript.error is not None:
+            print(f"❌ {transcript.error}")
+            continue
+        utterance = transcript.utterance
+        print(f"🗣 {utterance.started:7.2f}s - {utterance.ended:7.2f}s  {transcript.text!r} "
+              f"({transcript.latency * 1000:.1f} ms after the end of speech)")
@@ -0,0 +1,157 @@
+import argparse
+import json
+import sys
+import numpy as np
+from keyboard_layout import load_layout
+from predictor import load_predictor
+
+# Points along a polyline, `n` of them evenly spaced by arc length
+def resample(points, n):
+    points = np.asarray(points, np.float32).reshape(-1, 2)
+    if len(points) == 1:
+        return np.repeat(points, n, axis=0)
+    seg = np.hypot(*np.diff(points, axis=0).T)
+    dist = np.concatenate([[0.0], np.cumsum(seg)])
+    if dist[-1] == 0:
+        return np.repeat(points[:1], n, axis=0)
+    at = np.linspace(0.0, dist[-1], n)
+    return np.stack([np.interp(at, dist, points[:, 0]), np.interp(at, dist, points[:, 1])], axis=1)
+
+def path_length(points):
+    points = np.asarray(points, np.float32).reshape(-1, 2)
+    return float(np.hypot(*np.diff(points, axis=0).T).sum()) if len(points) > 1 else 0.0
+
+# Translation and scale invariant copy of resampled paths (..., n, 2)
+def normalise(paths):
+    centred = paths - paths.mean(axis=-2, keepdims=True)
+    size = np.abs(centred).max(axis=(-2, -1), keepdims=True)
+    return centred / np.maximum(size, 1e-6)
+
+# Swipe (shape writing) decoder for a keyboard layout.
+# Every lexicon word becomes a template: the polyline through its keys'
+# centres, resampled to `samples` points. Templates are grouped by first and
+# last letter, so a swipe is only compared with words starting near where
+# it started and ending near where it ended, then scored all at once with
+# numpy: mean point distance in key widths (location) plus the distance
+# between the normalised shapes, minus a word frequency prior. A decode
+# over a few thousand candidates takes well under a millisecond.
+class SwipeDecoder:
+    def __init__(self, layout, lexicon, samples=32, radius=1.0, shape_weight=1.0, prior_weight=0.1):
+        self.layout = layout
+        self.samples = samples
+        self.shape_weight = shape_weight
+        self.prior_weight = prior_weight
+        letters = [k for k in layout.keys if len(k.text) == 1 and k.text.isalpha()]
+        self.key_size = float(np.median([k.size[0] for k in letters]))
+        self.radius = radius * self.key_size
+        self.letters = [k.text.lower() for k in letters]
+        self.centres = np.array([[k.pos[0] + k.size[0]/2, k.pos[1] + k.size[1]/2] for k in letters], np.float32)
+        index = {c: i for i, c in enumerate(self.letters)}
+
+        groups = {}
+        for word, freq in lexicon:
+            word = word.lower()
+            if not word or any(c not in index for c in word):
+                continue
+            groups.setdefault((word[0], word[-1]), []).append((word, freq))
+
+        # per (first, last) letter: words, templates (m, n, 2), shapes and log prior
+        self.groups = {}
+        top = max((f for entries in groups.values() for _, f in entries), default=1)
+        for key, entries in groups.items():
+            words = [w for w, _ in entries]
+            templates = np.stack([resample(self.centres[[index[c] for c in w]], samples) for w in words])
+            prior = np.log(np.array([max(f, 1) for _, f in entries], np.float32) / top)
+            self.groups[key] = (words, templates, normalise(templates), prior)
+
+    # Letters whose key centre is within the search radius of a point, the
+    # nearest one always included
+    def letters_near(self, point):
+        dist = np.hypot(*(self.centres - point).T)
+        near = np.flatnonzero(dist <= self.radius)
+        if len(near) == 0:
+            near = [int(np.argmin(dist))]
+        return [self.letters[i] for i in near]
+
+    # A path long enough to be a swipe rather than a tap on one key
+    def is_swipe(self, points):
+        return path_length(points) > self.key_size
+
+    # Up to k (word, cost) pairs for a fingertip path, best (lowest cost) first
+    def decode(self, points, k=3):
+        path = resample(points, self.samples)
+        shape = normalise(path)
+        words, costs = [], []
+        for first in self.letters_near(path[0]):
+            for last in self.letters_near(path[-1]):
+                group = self.groups.get((first, last))
+                if group is None:
+                    continue
+                group_words, templates, shapes, prior = group
+                location = np.hypot(*(templates - path).transpose(2, 0, 1)).mean(axis=1) / self.key_size
+                shape_cost = np.hypot(*(shapes - shape).transpose(2, 0, 1)).mean(axis=1)
+                words.extend(group_words)
+                costs.append(location + self.shape_weight*shape_cost - self.prior_weight*prior)
+        if not words:
+            return []
+        costs = np.concatenate(costs)
+        best = np.argsort(costs)[:k]
+        return [(words[i], float(costs[i])) for i in best]
+
+# Decoder for a layout name and a word list (predictor.load_predictor)
+def load_decoder(layout='qwerty', dictionary=None, **kwargs):
+    layout = load_layout(layout) if isinstance(layout, str) else layout
+    predictor = load_predictor(dictionary)
+    lexicon = [(predictor.word(i).decode('utf-8'), int(predictor.freqs[i])) for i in range(len(predictor))]
+    predictor.close()
+    return SwipeDecoder(layout, lexicon, **kwargs)
+
+# Swipe traces are JSONL, one word per line, in keyboard pixel coordinates:
+#   {"word": "hello", "t": [0.0, 0.033, ...], "points": [[x, y], ...]}
+# "word" is what was meant (or what was decoded, for live recordings).
+def load_traces(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def save_trace(f, word, times, points):
+    f.write(json.dumps({'word': word, 't': [round(t, 4) for t in times],
+                        'points': [[round(float(x), 1), round(float(y), 1)] for x, y in points]}) + "\n")
+
+# Synthetic traces: the key-centre path of each word, sampled at `fps` while
+# moving at `speed` px/s, with gaussian jitter of `noise` px
+def synth_traces(decoder, words, fps=30.0, speed=900.0, noise=12.0, seed=0):
+    rng = np.random.default_rng(seed)
+    index = {c: i for i, c in enumerate(decoder.letters)}
+    traces = []
+    for word in words:
+        keys = decoder.centres[[index[c] for c in word]]
+        n = max(int(path_length(keys) / speed * fps) + 1, 2)
+        points = resample(keys, n) + rng.normal(0.0, noise, (n, 2))
+        traces.append({'word': word, 't': list(np.arange(n) / fps), 'points': points.tolist()})
+    return traces
+
+# Make traces for the bench:   python swipe.py synth traces.jsonl [--words 200 --noise 12]
+# Decode a trace file:         python swipe.py decode traces.jsonl
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Swipe typing decoder")
+    parser.add_argument('command', choices=['synth', 'decode'])
+    parser.add_argument('traces')
+    parser.add_argument('--layout', default='qwerty')
+    parser.add_argument('--dictionary', default=None)
+    parser.add_argument('--words', type=int, default=200, help="synth: number of traces")
+    parser.add_argument('--noise', type=float, default=12.0, help="synth: jitter in px")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    decoder = load_decoder(args.layout, args.dictionary)
+    if args.command == 'synth':
+        rng = np.random.default_rng(args.seed)
+        lexicon = sorted({w for words, *_ in decoder.groups.values() for w in words if len(w) > 1})
+        words = rng.choice(lexicon, args.words)
+        with open(args.traces, 'w') as f:
+            for trace in synth_traces(decoder, words, noise=args.noise, seed=args.seed):
+                save_trace(f, trace['word'], trace['t'], trace['points'])
+        print(f"✍ {args.words} traces written to {args.traces}")
+    else:
+        for trace in load_traces(args.traces):
+            print(trace['word'], decoder.decode(trace['points']), file=sys.stdout)
@@ -0,0 +1,175 @@
+import os
+import sys
+import threading
+import time
+
+VOLUME = 'volume'
+BRIGHTNESS = 'brightness'
+
+# Backends read and write system levels as floats in [0, 1].
+# Handles are created lazily on first use and then kept for the life of the
+# backend. All calls happen on the SystemLevels worker thread.
+class SystemBackend:
+    # Called once on the worker thread before any other call
+    def thread_init(self):
+        pass
+
+    def get_level(self, channel):
+        raise NotImplementedError
+
+    def set_level(self, channel, level):
+        raise NotImplementedError
+
+# Windows: pycaw for the speaker endpoint, screen_brightness_control for display 0
+class WindowsBackend(SystemBackend):
+    def __init__(self):
+        self.volume = None
+        self.sbcontrol = None
+
+    def thread_init(self):
+        import comtypes
+        comtypes.CoInitialize()
+
+    def volume_endpoint(self):
+        if self.volume is None:
+            from ctypes import cast, POINTER
+            from comtypes import CLSCTX_ALL
+            from pycaw.pycaw import AudioUtilities, IAudioEndpointVolume
+            devices = AudioUtilities.GetSpeakers()
+            interface = devices.Activate(IAudioEndpointVolume._iid_, CLSCTX_ALL, None)
+            self.volume = cast(interface, POINTER(IAudioEndpointVolume))
+        return self.volume
+
+    def brightness_control(self):
+        if self.sbcontrol is None:
+            import screen_brightness_control as sbcontrol
+            self.sbcontrol = sbcontrol
+        return self.sbcontrol
+
+    def get_level(self, channel):
+        if channel == VOLUME:
+            return self.volume_endpoint().GetMasterVolumeLevelScalar()
+        return self.brightness_control().get_brightness(display=0)[-1]/100.0
+
+    def set_level(self, channel, level):
+        if channel == VOLUME:
+            self.volume_endpoint().SetMasterVolumeLevelScalar(level, None)
+        else:
+            self.brightness_control().set_brightness(int(100*level), display=0)
+
+# In-memory backend for Linux boxes and tests; records every level it is given
+class FakeBackend(SystemBackend):
+    def __init__(self, volume=0.5, brightness=0.5):
+        self.levels = {VOLUME: volume, BRIGHTNESS: brightness}
+        self.history = []
+
+    def get_level(self, channel):
+        return self.levels[channel]
+
+    def set_level(self, channel, level):
+        self.levels[channel] = level
+        self.history.append((channel, level))
+
+# Pick a backend: GVE_SYSTEM_BACKEND=windows|fake, otherwise by platform
+def create_backend(name=None):
+    name = name or os.environ.get('GVE_SYSTEM_BACKEND')
+    if name is None:
+        name = 'windows' if sys.platform == 'win32' else 'fake'
+    if name == 'windows':
+        return WindowsBackend()
+    if name == 'fake':
+        return FakeBackend()
+    raise ValueError(f"Unknown system control backend: {name}")
+
+def clamp(level):
+    return min(1.0, max(0.0, level))
+
+# Applies level changes off the caller's thread.
+# Requests only update a pending target per channel, so a burst of pinch
+# steps is coalesced into a single set with the final level. The last level
+# written is cached and re-read from the backend only once it is older than
+# `refresh_after` seconds (the user may have changed it some other way).
+class SystemLevels:
+    def __init__(self, backend=None, refresh_after=5.0):
+        self.backend = backend
+        self.refresh_after = refresh_after
+        self.levels = {}     # channel -> (level, time read or written)
+        self.pending = {}    # channel -> ('delta' | 'set', value)
+        self.cond = threading.Condition()
+        self.thread = None
+        self.running = False
+        self.busy = False
+
+    def start(self):
+        with self.cond:
+            if self.thread is not None:
+                return
+            if self.backend is None:
+                self.backend = create_backend()
+            self.running = True
+            self.thread = threading.Thread(target=self.run, name="system-levels", daemon=True)
+            self.thread.start()
+
+    def stop(self, timeout=1.0):
+        with self.cond:
+            self.running = False
+            self.cond.notify_all()
+        if self.thread is not None:
+            self.thread.join(timeout)
+            self.thread = None
+
+    # Change a level by `delta`, relative to the latest requested level
+    def nudge(self, channel, delta):
+        self.start()
+        with self.cond:
+            kind, value = self.pending.get(channel, ('delta', 0.0))
+            self.pending[channel] = (kind, value + delta)
+            self.cond.notify()
+
+    def set(self, channel, level):
+        self.start()
+        with self.cond:
+            self.pending[channel] = ('set', clamp(level))
+            self.cond.notify()
+
+    # Last known level, without touching the backend
+    def level(self, channel):
+        cached = self.levels.get(channel)
+        return None if cached is None else cached[0]
+
+    # Block until every pending change has been applied
+    def flush(self, timeout=1.0):
+        deadline = time.monotonic() + timeout
+        with self.cond:
+            while (self.pending or self.busy) and time.monotonic() < deadline:
+                self.cond.wait(deadline - time.monotonic())
+            return not (self.pending or self.busy)
+
+    def current(self, channel):
+        cached = self.levels.get(channel)
+        if cached is None or time.monotonic() - cached[1] > self.refresh_after:
+            return self.backend.get_level(channel)
+        return cached[0]
+
+    def run(self):
+        self.backend.thread_init()
+        while True:
+            with self.cond:
+                while self.running and not self.pending:
+                    self.cond.wait()
+                if not self.running:
+                    return
+                requests, self.pending = self.pending, {}
+                self.busy = True
+
+            for channel, (kind, value) in requests.items():
+                try:
+                    level = clamp(value if kind == 'set' else self.current(channel) + value)
+                    self.backend.set_level(channel, level)
+                    self.levels[channel] = (level, time.monotonic())
+                except Exception as e:
+                    print(f"System control error ({channel}): {e}")
+
+            with self.cond:
+                self.busy = False
+                self.cond.notify_all()
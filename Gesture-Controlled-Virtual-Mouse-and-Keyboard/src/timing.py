@@ -0,0 +1,93 @@
+import time
+
+# Interaction timing (cooldowns, holds, debouncing) for every controller.
+# Everything is measured in seconds on a monotonic clock, never in frames,
+# so click and gesture behaviour stays the same when the camera or the
+# pipeline runs at a different frame rate.
+#
+# Every method takes an optional `now`. Loops pass the frame timestamp
+# (monotonic seconds for a camera, media time for recordings, see
+# frame_source), which keeps replays deterministic; None reads the object's
+# clock, `clock` below unless another one is injected.
+clock = time.monotonic
+
+def now(timestamp=None):
+    return clock() if timestamp is None else timestamp
+
+class Clocked:
+    def __init__(self, clock=None):
+        self.clock = clock
+
+    def now(self, now=None):
+        if now is not None:
+            return now
+        return self.clock() if self.clock is not None else clock()
+
+# Blocks an action for `seconds` after it fires
+class Cooldown(Clocked):
+    def __init__(self, seconds, clock=None):
+        super().__init__(clock)
+        self.seconds = seconds
+        self.until = None
+
+    def ready(self, now=None):
+        return self.until is None or self.now(now) >= self.until
+
+    # Start the cooldown, optionally for a different length than usual
+    def trigger(self, seconds=None, now=None):
+        self.until = self.now(now) + (self.seconds if seconds is None else seconds)
+
+    def remaining(self, now=None):
+        return 0.0 if self.until is None else max(0.0, self.until - self.now(now))
+
+    def reset(self):
+        self.until = None
+
+# Time since a condition started holding. restart() when it (re)starts,
+# expired() once it has held for `hold` seconds.
+class HoldTimer(Clocked):
+    def __init__(self, hold, clock=None):
+        super().__init__(clock)
+        self.hold = hold
+        self.since = None
+
+    @property
+    def running(self):
+        return self.since is not None
+
+    def restart(self, now=None):
+        self.since = self.now(now)
+
+    def stop(self):
+        self.since = None
+
+    def elapsed(self, now=None):
+        return 0.0 if self.since is None else self.now(now) - self.since
+
+    def expired(self, now=None):
+        return self.since is not None and self.elapsed(now) >= self.hold
+
+# Reports a value only once it has stayed the same for `hold` seconds,
+# so debouncing behaves the same at any frame rate
+class Debouncer:
+    def __init__(self, hold, initial=None, clock=None):
+        self.timer = HoldTimer(hold, clock)
+        self.value = initial      # last stable value
+        self.candidate = initial  # value currently being held
+
+    @property
+    def hold(self):
+        return self.timer.hold
+
+    def reset(self, value=None):
+        self.value = self.candidate = value
+        self.timer.stop()
+
+    def update(self, value, now=None):
+        now = self.timer.now(now)
+        if value != self.candidate or not self.timer.running:
+            self.candidate = value
+            self.timer.restart(now)
+        if self.timer.expired(now):
+            self.value = value
+        return self.value
@@ -0,0 +1,338 @@
+import argparse
+import queue
+import threading
+import time
+import wave
+from collections import deque
+from contextlib import contextmanager
+import numpy as np
+
+# Streaming voice input for Proton: one microphone stream stays open, a
+# background thread reads it in fixed-size chunks, a voice activity detector
+# splits it into utterances and finished utterances wait in a queue for the
+# recognizer. Nothing is calibrated per command; the noise floor follows the
+# room continuously.
+
+# Queue put for listeners nobody may be waiting on: when `q` is full the
+# oldest entries are dropped, so what is waiting is always the latest
+def put_latest(q, item):
+    while True:
+        try:
+            q.put_nowait(item)
+            return
+        except queue.Full:
+            try:
+                q.get_nowait()
+            except queue.Empty:
+                pass
+
+# One finished utterance: 16-bit mono PCM plus where it sits in the stream
+# (seconds since the stream opened)
+class Utterance:
+    def __init__(self, pcm, sample_rate, started, ended):
+        self.pcm = pcm
+        self.sample_rate = sample_rate
+        self.sample_width = 2
+        self.started = started
+        self.ended = ended
+        self.queued = time.monotonic()
+
+    @property
+    def seconds(self):
+        return len(self.pcm) / (self.sample_rate * self.sample_width)
+
+    # As speech_recognition.AudioData, for its recognize_* functions
+    def audio_data(self):
+        import speech_recognition as sr
+        return sr.AudioData(self.pcm, self.sample_rate, self.sample_width)
+
+# Energy voice activity detector over 16-bit PCM chunks.
+# A chunk is speech when its RMS energy is `ratio` times the noise floor and
+# above `min_energy`. The floor is an exponential average of non-speech
+# chunks: it drops quickly (`fall`) and rises slowly (`rise`), and creeps up
+# even during speech (`creep`) so a lasting new noise cannot pass for speech
+# forever.
+class EnergyVAD:
+    def __init__(self, ratio=3.0, min_energy=50.0, rise=0.02, fall=0.2, creep=0.002):
+        self.ratio = ratio
+        self.min_energy = min_energy
+        self.rise = rise
+        self.fall = fall
+        self.creep = creep
+        self.floor = None
+
+    def is_speech(self, chunk):
+        samples = np.frombuffer(chunk, np.int16).astype(np.float32)
+        energy = float(np.sqrt(np.mean(samples * samples))) if len(samples) else 0.0
+        if self.floor is None:
+            self.floor = energy
+        speech = energy > max(self.floor * self.ratio, self.min_energy)
+        if speech:
+            rate = self.creep
+        else:
+            rate = self.fall if energy < self.floor else self.rise
+        self.floor += rate * (energy - self.floor)
+        return speech
+
+# Cuts a chunk stream into utterances.
+#   - An utterance starts after `start` seconds of consecutive speech chunks
+#     and includes the `pre_roll` seconds before it (kept in a ring buffer),
+#     so the first syllable is not clipped.
+#   - It ends after `hangover` seconds without speech, or at `max_seconds`.
+# push() returns the finished Utterance, or None.
+class UtteranceSegmenter:
+    def __init__(self, sample_rate, chunk_samples, vad=None, start=0.09, hangover=0.6, pre_roll=0.3,
+                 max_seconds=8.0, min_seconds=0.25):
+        self.sample_rate = sample_rate
+        self.chunk_seconds = chunk_samples / sample_rate
+        self.vad = vad if vad is not None else EnergyVAD()
+        self.start_chunks = max(1, round(start / self.chunk_seconds))
+        self.hangover_chunks = max(1, round(hangover / self.chunk_seconds))
+        self.max_chunks = round(max_seconds / self.chunk_seconds)
+        self.min_chunks = round(min_seconds / self.chunk_seconds)
+        self.ring = deque(maxlen=round(pre_roll / self.chunk_seconds) + self.start_chunks)
+        self.position = 0   # chunks seen
+        self.reset()
+
+    def reset(self):
+        self.ring.clear()
+        self.chunks = None  # chunks of the utterance in progress
+        self.lead = 0       # pre-roll chunks before its first speech chunk
+        self.speech_run = 0
+        self.silence_run = 0
+
+    @property
+    def active(self):
+        return self.chunks is not None
+
+    def push(self, chunk):
+        self.position += 1
+        speech = self.vad.is_speech(chunk)
+        if not self.active:
+            self.ring.append(chunk)
+            self.speech_run = self.speech_run + 1 if speech else 0
+            if self.speech_run >= self.start_chunks:
+                self.chunks = list(self.ring)
+                self.lead = len(self.chunks) - self.start_chunks
+                self.ring.clear()
+                self.silence_run = 0
+            return None
+
+        self.chunks.append(chunk)
+        self.silence_run = 0 if speech else self.silence_run + 1
+        if self.silence_run >= self.hangover_chunks or len(self.chunks) >= self.max_chunks:
+            return self.finish()
+        return None
+
+    # push() as events, for recognizers that take audio as it arrives:
+    #   ('start', (sample rate, pre-roll and first chunks)), ('audio', chunk),
+    #   ('end', Utterance), or ('abort', None) when a started utterance
+    #   turns out too short
+    def stream(self, chunk):
+        was_active = self.active
+        utterance = self.push(chunk)
+        if not was_active:
+            return [('start', (self.sample_rate, b''.join(self.chunks)))] if self.active else []
+        events = [('audio', chunk)]
+        if utterance is not None:
+            events.append(('end', utterance))
+        elif not self.active:
+            events.append(('abort', None))
+        return events
+
+    # Drop a chunk unheard (muted input), abandoning any utterance in progress
+    def skip(self):
+        self.position += 1
+        was_active = self.active
+        if self.active or self.speech_run:
+            self.reset()
+        return [('abort', None)] if was_active else []
+
+    # End of stream: stream() events for the utterance in progress
+    def close(self):
+        if not self.active:
+            return []
+        utterance = self.finish()
+        return [('end', utterance)] if utterance is not None else [('abort', None)]
+
+    # End the utterance in progress (end of stream), if it is long enough:
+    # at least `min_seconds` from its first speech chunk, not counting the
+    # pre-roll or the trailing silence
+    def finish(self):
+        chunks, lead, silence = self.chunks, self.lead, self.silence_run
+        self.reset()
+        if not chunks or len(chunks) - lead - silence < self.min_chunks:
+            return None
+        ended = self.position * self.chunk_seconds
+        return Utterance(b''.join(chunks), self.sample_rate, ended - len(chunks) * self.chunk_seconds, ended)
+
+# The default microphone through speech_recognition (PyAudio), opened once
+class MicrophoneSource:
+    def __init__(self, sample_rate=16000, chunk_samples=480, device_index=None):
+        self.sample_rate = sample_rate
+        self.chunk_samples = chunk_samples
+        self.device_index = device_index
+        self.microphone = None
+
+    def open(self):
+        import speech_recognition as sr
+        self.microphone = sr.Microphone(device_index=self.device_index, sample_rate=self.sample_rate,
+                                        chunk_size=self.chunk_samples)
+        self.microphone.__enter__()
+        self.sample_rate = self.microphone.SAMPLE_RATE
+
+    def read(self):
+        return self.microphone.stream.read(self.chunk_samples)
+
+    def close(self):
+        if self.microphone is not None:
+            self.microphone.__exit__(None, None, None)
+            self.microphone = None
+
+# A WAV file as a stream (mixed down to 16-bit mono), for replays and the
+# bench; realtime=True paces the chunks like a live microphone
+class WavSource:
+    def __init__(self, path, chunk_seconds=0.03, realtime=False):
+        self.path = path
+        self.chunk_seconds = chunk_seconds
+        self.realtime = realtime
+        self.wav = None
+
+    def open(self):
+        self.wav = wave.open(self.path, 'rb')
+        if self.wav.getsampwidth() != 2:
+            raise ValueError(f"{self.path}: only 16-bit WAV files are supported")
+        self.sample_rate = self.wav.getframerate()
+        self.channels = self.wav.getnchannels()
+        self.chunk_samples = max(1, int(self.sample_rate * self.chunk_seconds))
+        self.next_due = time.monotonic()
+
+    def read(self):
+        frames = self.wav.readframes(self.chunk_samples)
+        if len(frames) < self.chunk_samples * self.channels * 2:
+            return None  # end of file
+        if self.realtime:
+            self.next_due += self.chunk_seconds
+            time.sleep(max(0.0, self.next_due - time.monotonic()))
+        if self.channels > 1:
+            samples = np.frombuffer(frames, np.int16).reshape(-1, self.channels)
+            frames = samples.mean(axis=1).astype(np.int16).tobytes()
+        return frames
+
+    def close(self):
+        if self.wav is not None:
+            self.wav.close()
+            self.wav = None
+
+# Background thread reading a source (the microphone by default) into an
+# UtteranceSegmenter; next_utterance() hands out finished utterances.
+# Given an `events` queue instead, it posts the segmenter's stream() events
+# there (for a streaming recognizer, see speech_backends.Transcriber),
+# followed by ('closed', None) when the source ends.
+# While muted() (e.g. while Proton is talking) chunks are read and dropped,
+# plus `tail` seconds after, so the assistant does not hear itself.
+# At most `max_pending` finished utterances wait; older ones are dropped.
+class VoiceListener(threading.Thread):
+    def __init__(self, source=None, vad=None, tail=0.2, events=None, max_pending=4, **segmenter_settings):
+        super().__init__(name="voice-listener", daemon=True)
+        self.source = source if source is not None else MicrophoneSource()
+        self.vad = vad
+        self.tail = tail
+        self.segmenter_settings = segmenter_settings
+        self.segmenter = None
+        self.utterances = queue.Queue(max_pending)
+        self.events = events
+        self.stop_event = threading.Event()
+        self.ready = threading.Event()
+        self.error = None
+        self.mute_count = 0
+        self.unmute_at = 0.0
+
+    # Start the thread and wait until the stream is open; raises what
+    # opening it raised
+    def open(self, timeout=5.0):
+        self.start()
+        self.ready.wait(timeout)
+        if self.error is not None:
+            raise self.error
+        return self
+
+    @contextmanager
+    def muted(self):
+        self.mute_count += 1
+        try:
+            yield
+        finally:
+            self.unmute_at = time.monotonic() + self.tail
+            self.mute_count -= 1
+
+    # The next utterance, or None after `timeout` seconds (None waits forever)
+    # or once the source has ended
+    def next_utterance(self, timeout=None):
+        try:
+            return self.utterances.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def deliver(self, events):
+        for kind, data in events:
+            if self.events is not None:
+                self.events.put((kind, data))
+            elif kind == 'end':
+                put_latest(self.utterances, data)
+
+    def run(self):
+        try:
+            self.source.open()
+            self.segmenter = UtteranceSegmenter(self.source.sample_rate, self.source.chunk_samples, self.vad,
+                                                **self.segmenter_settings)
+        except Exception as e:
+            self.error = e
+            self.ready.set()
+            return
+        self.ready.set()
+        try:
+            while not self.stop_event.is_set():
+                chunk = self.source.read()
+                if chunk is None:
+                    self.deliver(self.segmenter.close())
+                    break
+                if self.mute_count or time.monotonic() < self.unmute_at:
+                    self.deliver(self.segmenter.skip())
+                else:
+                    self.deliver(self.segmenter.stream(chunk))
+        except Exception as e:
+            print(f"Microphone stream failed: {e}")
+        finally:
+            self.source.close()
+            # wake whoever is waiting for the next utterance
+            put_latest(self.utterances, None)
+            if self.events is not None:
+                self.events.put(('closed', None))
+
+    def stop(self, timeout=1.0):
+        self.stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
+
+# Print utterances as they are detected:
+#   python voice_stream.py              (default microphone)
+#   python voice_stream.py speech.wav   (a recording)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Streaming voice activity detection")
+    parser.add_argument('wav', nargs='?', help="16-bit WAV file instead of the microphone")
+    parser.add_argument('--realtime', action='store_true', help="replay the file at its own pace")
+    args = parser.parse_args()
+
+    source = WavSource(args.wav, realtime=args.realtime) if args.wav else MicrophoneSource()
+    listener = VoiceListener(source).open()
+    print("🎤 Listening..." if not args.wav else f"🎤 Replaying {args.wav}")
+    try:
+        while True:
+            utterance = listener.next_utterance()
+            if utterance is None:
+                break
+            print(f"🗣 {utterance.started:7.2f}s - {utterance.ended:7.2f}s ({utterance.seconds:.2f}s of audio)")
+    except KeyboardInterrupt:
+        pass
+    listener.stop()
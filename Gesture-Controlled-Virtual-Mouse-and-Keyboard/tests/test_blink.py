@@ -0,0 +1,107 @@
+import functools
+import pytest
+from blink import BlinkDetector, evaluate, synth_trace
+
+# Replays of synthetic EAR traces (blink.synth_trace, 3 minutes each). The
+# detector's settings were chosen on seeds 0-11, so everything here uses
+# seeds from 100 up that it was not tuned on.
+HELD_OUT = range(100, 110)
+# held-out seeds whose open level defeats the fixed threshold
+HARD = [113, 142, 150]
+
+@functools.lru_cache(maxsize=None)
+def trace(seed, blink_rate=15.0):
+    return synth_trace(3.0, seed=seed, blink_rate=blink_rate)
+
+# Per-event recall and precision over several traces together
+def replay(seeds, blink_rate=15.0, **settings):
+    totals = {}
+    false_clicks = []
+    for seed in seeds:
+        report = evaluate(BlinkDetector(**settings), trace(seed, blink_rate))
+        false_clicks.append(report['false_clicks_per_min'])
+        for event in ('left_wink', 'right_wink', 'double_blink'):
+            labelled, found, detected = totals.get(event, (0, 0, 0))
+            totals[event] = (labelled + report[event]['labelled'],
+                             found + round((report[event]['recall'] or 0) * report[event]['labelled']),
+                             detected + report[event]['detected'])
+    summary = {event: {'recall': found / labelled, 'precision': found / max(detected, 1)}
+               for event, (labelled, found, detected) in totals.items()}
+    summary['false_clicks_per_min'] = false_clicks
+    return summary
+
+def test_wink_recall():
+    summary = replay(HELD_OUT)
+    for event in ('left_wink', 'right_wink'):
+        assert summary[event]['recall'] >= 0.95, (event, summary)
+        assert summary[event]['precision'] >= 0.95, (event, summary)
+
+def test_double_blink_recall():
+    assert replay(HELD_OUT)['double_blink']['recall'] >= 0.95
+
+# At 15 blinks a minute some natural blinks come in pairs as close as a
+# deliberate double blink; at 8 a minute nearly all detections must be real
+def test_double_blink_precision():
+    assert replay(HELD_OUT, blink_rate=8.0)['double_blink']['precision'] >= 0.9
+
+def test_false_clicks_per_minute():
+    false_clicks = replay(HELD_OUT)['false_clicks_per_min']
+    assert sum(false_clicks) / len(false_clicks) <= 1.0, false_clicks
+    assert max(false_clicks) <= 2.0, false_clicks
+
+@pytest.mark.parametrize('seed', HARD)
+def test_adaptive_beats_fixed_threshold(seed):
+    adaptive, fixed = replay([seed]), replay([seed], adaptive=False)
+    for event in ('left_wink', 'right_wink', 'double_blink'):
+        assert adaptive[event]['recall'] >= 0.85, (event, adaptive)
+    assert sum(adaptive[e]['recall'] for e in ('left_wink', 'right_wink', 'double_blink')) > \
+        sum(fixed[e]['recall'] for e in ('left_wink', 'right_wink', 'double_blink'))
+    assert adaptive['false_clicks_per_min'][0] < fixed['false_clicks_per_min'][0]
+
+# Frames at 30 fps: `closures` are (start, seconds, eyes) with eyes a tuple
+# of 0 (left) and 1 (right); everything else is open at 0.3
+def events(closures, seconds=6.0, fps=30.0):
+    detector = BlinkDetector(adaptive=False)
+    found = []
+    for i in range(int(seconds * fps)):
+        t = i / fps
+        ears = [0.3, 0.3]
+        for start, length, eyes in closures:
+            if start <= t < start + length:
+                for eye in eyes:
+                    ears[eye] = 0.05
+        event = detector.update(ears, t)
+        if event:
+            found.append(event)
+    return found
+
+def test_blinks_far_apart_are_not_a_double_blink():
+    assert events([(2.0, 0.15, (0, 1)), (2.6, 0.15, (0, 1))]) == []
+
+def test_double_blink_needs_a_deliberate_first_blink():
+    assert events([(2.0, 0.15, (0, 1)), (2.3, 0.15, (0, 1))]) == ["double_blink"]
+    assert events([(2.0, 0.04, (0, 1)), (2.2, 0.15, (0, 1))]) == []
+    assert events([(2.0, 0.8, (0, 1)), (2.9, 0.15, (0, 1))]) == []
+
+def test_blink_right_after_a_double_blink_is_ignored():
+    assert events([(2.0, 0.15, (0, 1)), (2.3, 0.15, (0, 1)), (2.6, 0.15, (0, 1))]) == ["double_blink"]
+
+def test_wink_that_starts_during_a_blink():
+    assert events([(2.0, 0.15, (0, 1)), (2.0, 0.5, (0,))]) == ["left_wink"]
+    # one eye reopening a frame late is still just a blink
+    assert events([(2.0, 0.15, (0, 1)), (2.0, 0.2, (1,))]) == []
+
+def test_session_event_counts():
+    closures = [
+        (1.0, 0.12, (0, 1)),                          # natural blinks
+        (3.0, 0.18, (0, 1)),
+        (5.0, 0.15, (0, 1)), (5.3, 0.15, (0, 1)),     # double blink
+        (7.0, 0.4, (1,)),                             # right wink
+        (9.0, 1.0, (0, 1)),                           # eyes shut for a second
+        (10.1, 0.15, (0, 1)),                         # blink right after it
+        (12.0, 0.12, (0, 1)), (12.9, 0.12, (0, 1)),   # blinks 0.8 s apart
+        (15.0, 0.45, (0,)),                           # left wink
+        (17.0, 0.2, (0, 1)), (17.35, 0.12, (0, 1)),   # double blink
+        (18.0, 0.15, (0, 1)),                         # natural blink after it
+    ]
+    assert events(closures, seconds=20.0) == ["double_blink", "right_wink", "left_wink", "double_blink"]